@@ -1,5 +1,8 @@
+from django import forms
 from django.contrib import admin
 from . import models
+from .renderers import content_format_choices
+from .search import matching_entries, search_terms
 
 
 class TagAdmin(admin.ModelAdmin):
@@ -7,20 +10,60 @@ class TagAdmin(admin.ModelAdmin):
     search_fields = ('name', )
 
 
+class EntryAdminForm(forms.ModelForm):
+    # The configured formats (see ``blargg.renderers``), rather than the
+    # model field's fixed choices.
+    content_format = forms.ChoiceField(choices=content_format_choices)
+
+    class Meta:
+        model = models.Entry
+        fields = '__all__'
+
+
 class EntryAdmin(admin.ModelAdmin):
+    form = EntryAdminForm
     list_display = (
         'title', 'content_format', 'author', 'published',
         'published_on', 'updated_on'
     )
     date_hierarchy = 'created_on'
     list_filter = ('published', 'content_format')
-    search_fields = ('title', 'raw_content', 'tag_string')
+    # Content is searched through the word counts (see get_search_results).
+    search_fields = ('title', 'tag_string')
     prepopulated_fields = {"slug": ("title", )}
-    actions = ['publish_entries']
+    actions = ['publish_entries', 'unpublish_entries']
+
+    def get_search_results(self, request, queryset, search_term):
+        """Also finds Entries (published or not) whose content uses all the
+        words in the search, from the search index rather than a ``LIKE``
+        over every Entry's content."""
+        results, use_distinct = super(EntryAdmin, self).get_search_results(
+            request, queryset, search_term
+        )
+        terms = search_terms(search_term)
+        if terms:
+            results |= queryset.filter(
+                pk__in=matching_entries(terms, published=False)
+            )
+        return results, use_distinct
 
     def publish_entries(self, request, queryset):
-        for entry in queryset:
-            entry.publish()
+        queryset.publish()
+    publish_entries.short_description = "Publish selected entries"
+
+    def unpublish_entries(self, request, queryset):
+        queryset.unpublish()
+    unpublish_entries.short_description = "Unpublish selected entries"
+
+
+class QueuedMailAdmin(admin.ModelAdmin):
+    list_display = (
+        'subject', 'recipients', 'status', 'attempts', 'next_attempt_on',
+        'sent_on'
+    )
+    list_filter = ('status', )
+    search_fields = ('subject', )
 
 admin.site.register(models.Tag, TagAdmin)
 admin.site.register(models.Entry, EntryAdmin)
+admin.site.register(models.QueuedMail, QueuedMailAdmin)
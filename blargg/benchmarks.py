@@ -0,0 +1,387 @@
+"""
+Benchmarks for blargg's hot paths. ``seed_corpus`` creates a synthetic corpus
+of published Entries (in a mix of html, reStructuredText and Markdown, tagged
+from a Zipf-distributed vocabulary, so a few tags are very common and most are
+rare), and ``run_benchmarks`` times saving an Entry in each format,
+``entry_stats``, and rendering the tagged list, archives, search results,
+feeds and sitemaps through the test client, and how long a new process takes
+to set up Django (and load blargg's models). Each benchmark records its wall
+time, the number of queries it ran and its peak memory (on Python 3).
+
+Caches are invalidated before each run, so the numbers are for pages (and
+stats) that have to be built. Run them with ``manage.py benchmark_blargg``,
+which rolls the corpus back afterwards, saves the results as JSON, and can
+compare them against an earlier (baseline) run.
+
+"""
+import bisect
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+
+from collections import OrderedDict
+from datetime import timedelta
+from timeit import default_timer
+
+try:
+    import tracemalloc
+except ImportError:  # pragma: no cover
+    tracemalloc = None  # pragma: no cover
+
+import django
+
+from django.contrib.auth import get_user_model
+from django.contrib.sites.models import Site
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test import Client, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.http import urlencode
+from django.utils.timezone import now as utc_now
+
+from . import __version__
+from .cache import bump_generation
+from .feeds import AtomEntriesFeed, RSSEntriesFeed
+from .models import Entry, Tag, entry_stats
+from .sitemaps import EntrySitemap, sitemap
+
+FORMATS = ('html', 'rst', 'md')
+
+# Syllables for the corpus' made-up words.
+SYLLABLES = (
+    'ba', 'ko', 'ri', 'ne', 'tu', 'sa', 'mo', 'li', 'de', 'fa', 'gu', 'pe',
+    'zo', 'vi', 'la', 'ha', 'ju', 'ce', 'wo', 'xi',
+)
+
+# Cached values invalidated before each benchmark run.
+GENERATIONS = ('tags', 'entries', 'stats', 'calendar')
+
+
+class ZipfSampler(object):
+    """Draws ranks in ``range(n)``; rank ``k`` is drawn with a probability
+    proportional to ``1 / (k + 1) ** s``."""
+
+    def __init__(self, n, rng, s=1.1):
+        self.rng = rng
+        self.cumulative = []
+        total = 0.0
+        for k in range(n):
+            total += 1.0 / (k + 1) ** s
+            self.cumulative.append(total)
+
+    def sample(self):
+        x = self.rng.random() * self.cumulative[-1]
+        return bisect.bisect_left(self.cumulative, x)
+
+    def sample_distinct(self, k):
+        """Returns ``k`` different (sorted) ranks."""
+        k = min(k, len(self.cumulative))
+        ranks = set()
+        while len(ranks) < k:
+            ranks.add(self.sample())
+        return sorted(ranks)
+
+
+def make_vocabulary(size, rng):
+    """Returns ``size`` different made-up words."""
+    words = []
+    seen = set()
+    while len(words) < size:
+        word = ''.join(
+            rng.choice(SYLLABLES) for i in range(rng.randint(1, 4))
+        )
+        if word not in seen:
+            seen.add(word)
+            words.append(word)
+    return words
+
+
+def make_content(content_format, words, rng, paragraphs=4):
+    """Returns some content in the given format: a heading, ``paragraphs``
+    paragraphs of text drawn from ``words`` (a ``(vocabulary, sampler)``
+    tuple), and a short list."""
+    vocabulary, sampler = words
+
+    def sentence(n):
+        return ' '.join(vocabulary[sampler.sample()] for i in range(n))
+
+    heading = sentence(3).capitalize()
+    texts = [sentence(rng.randint(40, 120)) + '.' for i in range(paragraphs)]
+    items = [sentence(4) for i in range(3)]
+    if content_format == 'rst':
+        lines = [heading, '=' * len(heading), '']
+        for text in texts:
+            lines.extend([text, ''])
+        lines.extend('* {0}'.format(item) for item in items)
+    elif content_format == 'md':
+        lines = ['# {0}'.format(heading), '']
+        for text in texts:
+            lines.extend([text, ''])
+        lines.extend('* {0}'.format(item) for item in items)
+    else:
+        lines = ['<h1>{0}</h1>'.format(heading)]
+        lines.extend('<p>{0}</p>'.format(text) for text in texts)
+        lines.append('<ul>')
+        lines.extend('<li>{0}</li>'.format(item) for item in items)
+        lines.append('</ul>')
+    return '\n'.join(lines)
+
+
+def seed_corpus(entries=500, tags=100, seed=0, days=730):
+    """Creates ``entries`` published Entries (cycling through the html, rst
+    and md formats) spread over the last ``days`` days, each with 1 to 5 tags
+    drawn from a vocabulary of ``tags`` tags. The same ``seed`` always gives
+    the same corpus.
+
+    Returns a dict describing the corpus, which is passed to the benchmarks.
+
+    """
+    rng = random.Random(seed)
+    words = make_vocabulary(2000, rng)
+    words = (words, ZipfSampler(len(words), rng))
+    tag_names = ['tag{0}'.format(i) for i in range(tags)]
+    tag_sampler = ZipfSampler(tags, rng)
+
+    User = get_user_model()
+    author, created = User._default_manager.get_or_create(
+        **{User.USERNAME_FIELD: 'blargg-benchmark'}
+    )
+    site = Site.objects.get_current()
+    now = utc_now()
+    for i in range(entries):
+        tag_ranks = tag_sampler.sample_distinct(rng.randint(1, 5))
+        content_format = FORMATS[i % len(FORMATS)]
+        Entry(
+            site=site,
+            author=author,
+            title="Benchmark Entry {0}".format(i),
+            raw_content=make_content(content_format, words, rng),
+            content_format=content_format,
+            tag_string=', '.join(tag_names[k] for k in tag_ranks),
+            published=True,
+            published_on=now - timedelta(
+                days=rng.randint(0, days - 1),
+                seconds=rng.randint(0, 86399)
+            ),
+        ).save()
+
+    latest = Entry.objects.published().latest('published_on')
+    return {
+        'entries': entries,
+        'tags': tags,
+        'seed': seed,
+        'days': days,
+        'author': author,
+        'site': site,
+        # Content for the save benchmarks (made up front, so it isn't timed).
+        'samples': dict(
+            (content_format, make_content(content_format, words, rng))
+            for content_format in FORMATS
+        ),
+        'tag': Tag.objects.order_by('-entry_count', 'name')[0].slug,
+        'archive_date': latest.archive_date,
+        # The two most common words, so most Entries match.
+        'search': ' '.join(words[0][:2]),
+    }
+
+
+# Benchmarks
+# ----------
+# Each one is called with the corpus dict, and runs one (complete) operation.
+
+def _save(content_format):
+    def save(corpus):
+        corpus['saved'] = corpus.get('saved', 0) + 1
+        Entry(
+            site=corpus['site'],
+            author=corpus['author'],
+            title="Benchmark Save {0}".format(corpus['saved']),
+            # Different each time, so it's never in the render cache.
+            raw_content="{0}\n\nSave {1}.\n".format(
+                corpus['samples'][content_format], corpus['saved']
+            ),
+            content_format=content_format,
+            tag_string="tag0, tag1, tag2",
+            published=True,
+        ).save()
+    return save
+
+
+def _get(view_name, args):
+    def get(corpus):
+        path = reverse('blargg:{0}'.format(view_name), args=args(corpus))
+        _consume(Client().get(path), path)
+    return get
+
+
+def _search(corpus):
+    path = '{0}?{1}'.format(
+        reverse('blargg:search'), urlencode({'q': corpus['search']})
+    )
+    _consume(Client().get(path), path)
+
+
+def _feed(feed_class):
+    def get(corpus):
+        request = RequestFactory().get('/feed/')
+        _consume(feed_class()(request), feed_class.__name__)
+    return get
+
+
+def _sitemap(corpus):
+    request = RequestFactory().get('/sitemap-blog.xml')
+    _consume(sitemap(request, {'blog': EntrySitemap}, 'blog'), 'sitemap')
+
+
+def _consume(response, name):
+    if response.status_code != 200:
+        raise ValueError(
+            "{0} returned a {1} response".format(name, response.status_code)
+        )
+    if response.streaming:
+        for chunk in response.streaming_content:
+            pass
+    return response
+
+
+def _startup(corpus):
+    """Starts a new Python process that sets up Django, as a worker or a
+    management command would."""
+    if 'DJANGO_SETTINGS_MODULE' not in os.environ:
+        raise ValueError("startup needs DJANGO_SETTINGS_MODULE to be set")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    subprocess.check_call(
+        [sys.executable, '-c', 'import django; django.setup()'],
+        env=env
+    )
+
+
+def _date_args(*formats):
+    def args(corpus):
+        return [corpus['archive_date'].strftime(f) for f in formats]
+    return args
+
+
+BENCHMARKS = OrderedDict([
+    ('save_html', _save('html')),
+    ('save_rst', _save('rst')),
+    ('save_md', _save('md')),
+    ('entry_stats', lambda corpus: entry_stats(Entry.objects.published())),
+    ('tagged_entry_list', _get(
+        'tagged_entry_list', lambda corpus: [corpus['tag']]
+    )),
+    ('entry_archive_year', _get('entry_archive_year', _date_args('%Y'))),
+    ('entry_archive_month', _get(
+        'entry_archive_month', _date_args('%Y', '%m')
+    )),
+    ('entry_archive_day', _get(
+        'entry_archive_day', _date_args('%Y', '%m', '%d')
+    )),
+    ('search', _search),
+    ('rss_feed', _feed(RSSEntriesFeed)),
+    ('atom_feed', _feed(AtomEntriesFeed)),
+    ('sitemap', _sitemap),
+    ('startup', _startup),
+])
+
+
+def _invalidate_caches():
+    for name in GENERATIONS:
+        bump_generation(name)
+
+
+def measure(func, corpus, repeat=5):
+    """Runs a benchmark ``repeat`` times (after a run that counts its queries,
+    and one that measures its memory) and returns its median and best
+    ``wall_time`` in seconds, ``queries`` and ``peak_memory`` in bytes (or
+    ``None`` if ``tracemalloc`` isn't available)."""
+    _invalidate_caches()
+    with CaptureQueriesContext(connection) as queries:
+        func(corpus)
+    # Count them now: the captured queries are read from the connection's
+    # log, which the next request clears.
+    query_count = len(queries)
+
+    peak_memory = None
+    if tracemalloc is not None:
+        _invalidate_caches()
+        tracemalloc.start()
+        try:
+            func(corpus)
+            peak_memory = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    times = []
+    for i in range(repeat):
+        _invalidate_caches()
+        start = default_timer()
+        func(corpus)
+        times.append(default_timer() - start)
+    times.sort()
+    return OrderedDict([
+        ('wall_time', times[len(times) // 2]),
+        ('min_time', times[0]),
+        ('queries', query_count),
+        ('peak_memory', peak_memory),
+    ])
+
+
+def run_benchmarks(corpus, repeat=5, names=None):
+    """Runs the named (or all) benchmarks against a corpus; returns the
+    results as a dict that can be saved as JSON."""
+    results = OrderedDict()
+    with override_settings(ALLOWED_HOSTS=['testserver']):
+        for name, func in BENCHMARKS.items():
+            if names and name not in names:
+                continue
+            results[name] = measure(func, corpus, repeat=repeat)
+    return OrderedDict([
+        ('blargg', __version__),
+        ('django', django.get_version()),
+        ('python', platform.python_version()),
+        ('platform', sys.platform),
+        ('database', connection.vendor),
+        ('corpus', OrderedDict(
+            (key, corpus[key]) for key in ('entries', 'tags', 'seed', 'days')
+        )),
+        ('repeat', repeat),
+        ('results', results),
+    ])
+
+
+def write_results(path, results):
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2)
+        f.write('\n')
+
+
+def read_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(results, baseline, threshold=0.1):
+    """Compares results with a baseline. Returns a list of
+    ``(benchmark, metric, baseline value, value)`` tuples for regressions:
+    benchmarks that ran more queries, or took more time or memory (by more
+    than ``threshold``, as a fraction of the baseline)."""
+    regressions = []
+    old_results = baseline.get('results', {})
+    for name, result in results['results'].items():
+        old = old_results.get(name)
+        if old is None:
+            continue
+        if result['queries'] > old['queries']:
+            regressions.append(
+                (name, 'queries', old['queries'], result['queries'])
+            )
+        for metric in ('wall_time', 'peak_memory'):
+            if result[metric] is None or old.get(metric) is None:
+                continue
+            if result[metric] > old[metric] * (1 + threshold):
+                regressions.append((name, metric, old[metric], result[metric]))
+    return regressions
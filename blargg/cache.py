@@ -0,0 +1,167 @@
+"""
+Caching helpers for django-blargg. Anything cached here goes to the Django
+cache named by the ``cache`` setting (``'default'`` unless configured), so
+it's shared by every process that uses the same cache backend.
+
+"""
+import hashlib
+import threading
+import time
+
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.encoding import force_bytes
+
+from .signals import blargg_settings
+
+
+def get_cache():
+    """Returns the Django cache used by blargg."""
+    return caches[blargg_settings.get('cache', 'default')]
+
+
+def make_key(*parts):
+    """Builds a cache key from a prefix and a hash of the remaining parts, so
+    arbitrarily long (or non-ascii) values make safe keys."""
+    digest = hashlib.sha1()
+    for part in parts[1:]:
+        digest.update(force_bytes(part))
+        digest.update(b'\0')
+    return "blargg:{0}:{1}".format(parts[0], digest.hexdigest())
+
+
+def _generation_key(name):
+    return "blargg:generation:{0}".format(name)
+
+
+def get_generation(name):
+    """Returns the current generation for a named group of cached values.
+    Including this in cache keys lets ``bump_generation`` invalidate the whole
+    group at once."""
+    cache = get_cache()
+    key = _generation_key(name)
+    generation = cache.get(key)
+    if generation is None:
+        # Start from the current time (rather than 1), so a generation that
+        # was evicted doesn't resurrect values cached under an old one.
+        cache.add(key, int(time.time() * 1000), None)
+        generation = cache.get(key)
+    return generation
+
+
+def bump_generation(name):
+    """Invalidates everything cached under the named generation."""
+    cache = get_cache()
+    try:
+        cache.incr(_generation_key(name))
+    except ValueError:
+        get_generation(name)
+
+
+def bump_generation_on_commit(name):
+    """Bumps the named generation once the current transaction commits (or
+    right away, outside of one). Bumping it earlier would let a concurrent
+    request cache the data from before the commit under the new generation,
+    where it would stay until the next bump."""
+    transaction.on_commit(lambda: bump_generation(name))
+
+
+def get_or_set_locked(key, func, timeout=None, lock_timeout=30, wait=5.0):
+    """Returns the cached value for ``key``, calling ``func`` to compute (and
+    cache) it if it's missing. Only one process computes a missing value at a
+    time: the others wait (for up to ``wait`` seconds) for it to be cached,
+    rather than all computing it at once."""
+    cache = get_cache()
+    value = cache.get(key)
+    if value is not None:
+        return value
+
+    lock = key + ':lock'
+    deadline = time.time() + wait
+    while not cache.add(lock, 1, lock_timeout):
+        if time.time() >= deadline:
+            # Whoever holds the lock is taking too long; don't wait for them.
+            return func()
+        time.sleep(0.05)
+        value = cache.get(key)
+        if value is not None:
+            return value
+
+    try:
+        # It may have been cached while we were waiting for the lock.
+        value = cache.get(key)
+        if value is None:
+            value = func()
+            cache.set(key, value, timeout)
+    finally:
+        cache.delete(lock)
+    return value
+
+
+class LRUCache(object):
+    """A small, thread-safe, in-process cache that evicts the least recently
+    used item once it holds more than ``maxsize`` items."""
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                return default
+            self._data[key] = value  # Move to the most recently used end.
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = value
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class RenderCache(object):
+    """Caches rendered content in a per-process ``LRUCache``, backed by the
+    shared Django cache. Keys are built from a hash of the content format,
+    the raw content and the renderer's version, so an entry is only rendered
+    again when one of those changes."""
+
+    def __init__(self):
+        self.local = LRUCache(blargg_settings.get('render_cache_size', 128))
+
+    @property
+    def enabled(self):
+        return blargg_settings.get('render_cache', True)
+
+    def key(self, content_format, raw_content, version):
+        return make_key('render', content_format, version, raw_content)
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        rendered = self.local.get(key)
+        if rendered is None:
+            rendered = get_cache().get(key)
+            if rendered is not None:
+                self.local.set(key, rendered)
+        return rendered
+
+    def set(self, key, rendered):
+        if not self.enabled:
+            return
+        self.local.set(key, rendered)
+        timeout = blargg_settings.get('render_cache_timeout', None)
+        get_cache().set(key, rendered, timeout)
+
+
+render_cache = RenderCache()
@@ -0,0 +1,211 @@
+"""
+Exports blargg's pages as static files, so a front-end web server (e.g. nginx)
+can serve anonymous readers without touching Django. Pages are rendered by
+requesting them through Django (middleware and all) and written to a directory
+tree that mirrors their URLs: ``/blog/a-sample-entry/`` is written to
+``blog/a-sample-entry/index.html``.
+
+Each export records the pages that depend on each ``Entry`` in a manifest, so
+the next export only needs to re-render the pages of Entries that have been
+published, edited or unpublished (or deleted) since. The pages of Entries that
+are no longer published are removed (unpublished Entries can still be seen by
+going to their URL in Django, but aren't exported).
+
+"""
+import json
+import os
+import tempfile
+
+from django.core.urlresolvers import reverse
+from django.db.models import Q
+from django.test import Client
+from django.utils.dateparse import parse_datetime
+
+from .models import Entry
+from .signals import blargg_settings
+
+MANIFEST_NAME = '.blargg-export.json'
+
+
+def entry_paths(entry):
+    """Returns the paths of the pages that show a (published) ``Entry`` as a
+    dict: its own ``pages``, and the ``lists`` it appears in (its archives and
+    the lists of its tags)."""
+    pages = [entry.get_absolute_url(), entry.get_absolute_url_with_date()]
+    lists = []
+    if entry.archive_date:
+        day = entry.archive_date
+        year, month = day.strftime("%Y"), day.strftime("%m")
+        lists.extend([
+            reverse('blargg:entry_archive_year', args=[year]),
+            reverse('blargg:entry_archive_month', args=[year, month]),
+            reverse(
+                'blargg:entry_archive_day',
+                args=[year, month, day.strftime("%d")]
+            ),
+        ])
+    for tag in entry.tags.all():
+        lists.append(tag.get_absolute_url())
+    return {'pages': pages, 'lists': lists}
+
+
+def site_paths():
+    """Returns the paths of pages that are exported every time: the entry and
+    tag lists, and any listed in the ``export_paths`` setting (e.g. feeds)."""
+    paths = [reverse('blargg:list_entries'), reverse('blargg:list_tags')]
+    paths.extend(blargg_settings.get('export_paths', []))
+    return paths
+
+
+def page_filename(path, content_type):
+    """Returns the (relative) file name a page is written to. Pages whose path
+    ends with a slash are written to an index file in that directory."""
+    filename = path.lstrip('/')
+    if not filename or filename.endswith('/'):
+        if 'html' in content_type:
+            filename += 'index.html'
+        elif 'xml' in content_type:
+            filename += 'index.xml'
+        else:
+            filename += 'index'
+    return filename
+
+
+def _write_file(filename, content):
+    """Writes a file atomically, so a web server never serves half of one."""
+    dirname = os.path.dirname(filename)
+    if not os.path.isdir(dirname):
+        try:
+            os.makedirs(dirname)
+        except OSError:  # pragma: no cover
+            # Another worker got there first.
+            if not os.path.isdir(dirname):
+                raise
+    fd, tmp = tempfile.mkstemp(dir=dirname, prefix='.blargg-')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(content)
+    os.chmod(tmp, 0o644)
+    os.rename(tmp, filename)
+
+
+def remove_pages(output, paths):
+    """Removes any files previously exported for some pages. Returns the
+    number of pages removed."""
+    removed = 0
+    for path in paths:
+        filenames = set(
+            os.path.join(output, page_filename(path, content_type))
+            for content_type in ('html', 'xml', '')
+        )
+        for filename in filenames:
+            if os.path.isfile(filename):
+                os.remove(filename)
+                removed += 1
+    return removed
+
+
+def export_pages(args):
+    """Renders and writes a list of pages; runs in a worker process. ``args``
+    is an ``(output, host, secure, paths)`` tuple. Returns the number of pages
+    written, and the number removed because they no longer exist."""
+    output, host, secure, paths = args
+    client = Client(HTTP_HOST=host)
+    written = removed = 0
+    for path in paths:
+        response = client.get(path, secure=secure)
+        if response.status_code in (404, 410):
+            removed += remove_pages(output, [path])
+            continue
+        if response.status_code != 200:
+            raise ValueError(
+                "{0} returned a {1} response".format(path, response.status_code)
+            )
+        if response.streaming:
+            content = b''.join(response.streaming_content)
+        else:
+            content = response.content
+        filename = page_filename(path, response.get('Content-Type', ''))
+        _write_file(os.path.join(output, filename), content)
+        written += 1
+    return written, removed
+
+
+def read_manifest(output):
+    """Returns ``(exported_at, {entry pk: entry_paths})`` for the last export
+    to ``output``, or ``(None, {})`` if there hasn't been one."""
+    try:
+        with open(os.path.join(output, MANIFEST_NAME)) as f:
+            manifest = json.load(f)
+    except (IOError, ValueError):
+        return None, {}
+    entries = dict(
+        (int(pk), entry) for pk, entry in manifest['entries'].items()
+    )
+    return parse_datetime(manifest['exported_at']), entries
+
+
+def write_manifest(output, exported_at, entries):
+    """Records an export's time, and the pages of each ``Entry``."""
+    manifest = {
+        'exported_at': exported_at.isoformat(),
+        'entries': dict((str(pk), entry) for pk, entry in entries.items()),
+    }
+    content = json.dumps(manifest, indent=1, sort_keys=True)
+    _write_file(os.path.join(output, MANIFEST_NAME), content.encode('utf-8'))
+
+
+def plan_export(output, full=False):
+    """Works out what needs exporting to ``output``. Returns the (sorted) paths
+    of pages to export, the paths of pages to remove, and the manifest to write
+    once that's done.
+
+    Unless ``full`` is given, only the pages of Entries that changed since the
+    last export (or that are no longer published) are included, along with the
+    ``site_paths``.
+
+    """
+    exported_at, old_manifest = read_manifest(output)
+    if full:
+        exported_at = None
+
+    published = Entry.objects.published()
+    published_pks = set(published.values_list('pk', flat=True))
+
+    if exported_at is None:
+        changed_pks = published_pks
+    else:
+        # Entries edited (or whose related Entries changed, or were edited)
+        # since the last export, and those that weren't shown then (e.g.
+        # because they were still being rendered).
+        changed_pks = set(published.filter(
+            Q(updated_on__gte=exported_at) |
+            Q(related_entries__related__updated_on__gte=exported_at)
+        ).values_list('pk', flat=True))
+        changed_pks.update(published_pks.difference(old_manifest))
+
+    paths = set(site_paths())
+    old_pages = set()
+    manifest = dict(
+        (pk, entry) for pk, entry in old_manifest.items()
+        if pk in published_pks
+    )
+    changed_pks = sorted(changed_pks)
+    for i in range(0, len(changed_pks), 500):
+        entries = published.filter(pk__in=changed_pks[i:i + 500]).only(
+            'slug', 'published', 'published_on', 'archive_date'
+        ).prefetch_related('tags')
+        for entry in entries:
+            old = old_manifest.get(entry.pk, {'pages': [], 'lists': []})
+            old_pages.update(old['pages'])
+            paths.update(old['lists'])
+            manifest[entry.pk] = entry_paths(entry)
+            paths.update(manifest[entry.pk]['pages'])
+            paths.update(manifest[entry.pk]['lists'])
+
+    # Unpublished (or deleted) Entries: remove their pages, and re-export the
+    # lists they were in.
+    for pk in set(old_manifest).difference(published_pks):
+        old_pages.update(old_manifest[pk]['pages'])
+        paths.update(old_manifest[pk]['lists'])
+
+    return sorted(paths), sorted(old_pages.difference(paths)), manifest
@@ -9,12 +9,22 @@ need to set up a couple of URL patterns; e.g.
         (r'^feed/atom/$', AtomEntriesFeed()),
     )
 
+Feeds include the latest ``feed_items`` published entries. The generated
+feeds are cached (for ``feed_cache_timeout`` seconds, or until an entry is
+published, edited or unpublished), and support conditional GETs.
+
 """
+import hashlib
 
 from django.contrib.syndication.views import Feed
+from django.db.models import Max
+from django.http import HttpResponse
 from django.utils.feedgenerator import Atom1Feed
+from django.views.decorators.http import condition
 
+from .cache import get_cache, get_generation, make_key
 from .models import Entry
+from .signals import blargg_settings
 
 
 class RSSEntriesFeed(Feed):
@@ -23,8 +33,50 @@ class RSSEntriesFeed(Feed):
     link = "/blog/"
     description = "Entries from brad's blog"
 
+    def __call__(self, request, *args, **kwargs):
+        feed = self.get_cached_feed(request, *args, **kwargs)
+
+        def serve(request, *args, **kwargs):
+            return HttpResponse(feed['content'], content_type=feed['type'])
+
+        return condition(
+            etag_func=lambda request, *args, **kwargs: feed['etag'],
+            last_modified_func=lambda request, *args, **kwargs: feed['updated']
+        )(serve)(request, *args, **kwargs)
+
+    def get_cached_feed(self, request, *args, **kwargs):
+        """Returns a dict with the generated feed's ``content``, content
+        ``type``, ``etag`` and last ``updated`` time; building it only if
+        it's not cached."""
+        cache = get_cache()
+        key = make_key(
+            'feed',
+            get_generation('entries'),
+            type(self).__module__,
+            type(self).__name__,
+            # Feeds link to the scheme and host they were requested on.
+            request.build_absolute_uri(request.path)
+        )
+        feed = cache.get(key)
+        if feed is None:
+            response = super(RSSEntriesFeed, self).__call__(
+                request, *args, **kwargs
+            )
+            updated = self.items().aggregate(updated=Max('updated_on'))
+            feed = {
+                'content': response.content,
+                'type': response['Content-Type'],
+                'etag': hashlib.md5(response.content).hexdigest(),
+                'updated': updated['updated'],
+            }
+            timeout = blargg_settings.get('feed_cache_timeout', 3600)
+            if timeout:
+                cache.set(key, feed, timeout)
+        return feed
+
     def items(self):
-        return Entry.objects.filter(published=True)
+        limit = blargg_settings.get('feed_items', 10)
+        return Entry.objects.published()[:limit]
 
     def item_title(self, item):
         return item.title
@@ -0,0 +1,165 @@
+"""
+Optional timing of blargg's hot paths: rendering content, syncing tags,
+computing stats, the signal handlers, and evaluating each view's queryset.
+It's off unless the ``instrumentation`` setting is true; while it's off, a
+timed function only checks that setting before it's called.
+
+Each timing is passed to the hooks in the ``instrumentation_hooks`` setting,
+as ``hook(name, duration)`` (with the duration in seconds). Hooks are
+callables, or their dotted paths; the default, ``log_timing``, logs to the
+``blargg.instrumentation`` logger. To send timings to statsd, for example:
+
+    def statsd_timing(name, duration):
+        statsd.timing('blargg.' + name, duration * 1000)
+
+    BLARGG = {
+        'instrumentation': True,
+        'instrumentation_hooks': ['myproject.metrics.statsd_timing'],
+    }
+
+Add ``blargg.instrumentation.ServerTimingMiddleware`` to your middleware to
+report each request's timings in a ``Server-Timing`` header, which browsers
+show in their developer tools.
+
+"""
+import logging
+import threading
+
+from collections import OrderedDict
+from functools import wraps
+from timeit import default_timer
+
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# The timings for the current request (see ``ServerTimingMiddleware``).
+_local = threading.local()
+
+# The hooks, as loaded from ``instrumentation_hooks``.
+_hooks = {}
+
+
+def enabled():
+    """Whether instrumentation is on."""
+    # Imported here, since signals.py's handlers are timed.
+    from .signals import blargg_settings
+    return blargg_settings.get('instrumentation', False)
+
+
+def log_timing(name, duration):
+    """A hook that logs each timing (at DEBUG level)."""
+    logger.debug("%s took %.2fms", name, duration * 1000)
+
+
+def get_hooks():
+    """Returns the hooks in the ``instrumentation_hooks`` setting."""
+    from .signals import blargg_settings
+    paths = tuple(blargg_settings.get(
+        'instrumentation_hooks', ['blargg.instrumentation.log_timing']
+    ))
+    if paths not in _hooks:
+        _hooks[paths] = [
+            path if callable(path) else import_string(path)
+            for path in paths
+        ]
+    return _hooks[paths]
+
+
+def record(name, duration):
+    """Passes a timing to the hooks, and adds it to the current request's
+    timings (if they're being collected)."""
+    for hook in get_hooks():
+        hook(name, duration)
+    timings = getattr(_local, 'timings', None)
+    if timings is not None:
+        timings.append((name, duration))
+
+
+class Timer(object):
+    """Times a block, or (when used as a decorator) each call to a function;
+    see ``timed``."""
+
+    def __init__(self, name):
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        if enabled():
+            self.start = default_timer()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.start is not None:
+            record(self.name, default_timer() - self.start)
+            self.start = None
+
+    def __call__(self, func):
+        name = self.name
+
+        @wraps(func)
+        def timed_func(*args, **kwargs):
+            if not enabled():
+                return func(*args, **kwargs)
+            start = default_timer()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, default_timer() - start)
+        return timed_func
+
+
+def timed(name):
+    """Records how long something takes, as ``name``; either a block:
+
+        with timed('render'):
+            ...
+
+    or every call to a function:
+
+        @timed('render')
+        def render(...):
+            ...
+
+    """
+    return Timer(name)
+
+
+def server_timing(timings):
+    """Formats ``(name, duration)`` timings as a ``Server-Timing`` header
+    value, adding up the durations of those with the same name."""
+    totals = OrderedDict()
+    for name, duration in timings:
+        totals[name] = totals.get(name, 0) + duration
+    return ", ".join(
+        "{0};dur={1:.2f}".format(name, duration * 1000)
+        for name, duration in totals.items()
+    )
+
+
+class ServerTimingMiddleware(object):
+    """Collects the timings for each request, and adds them (and the total
+    time taken) to its response's ``Server-Timing`` header, while
+    instrumentation is on."""
+
+    def __init__(self, get_response=None):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        self.process_request(request)
+        response = self.get_response(request)
+        return self.process_response(request, response)
+
+    def process_request(self, request):
+        if enabled():
+            _local.timings = []
+            request._blargg_started = default_timer()
+
+    def process_response(self, request, response):
+        timings = getattr(_local, 'timings', None)
+        _local.timings = None
+        started = getattr(request, '_blargg_started', None)
+        if timings is not None and started is not None:
+            timings.append(('total', default_timer() - started))
+            response['Server-Timing'] = server_timing(timings)
+        return response
@@ -0,0 +1,111 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from blargg.benchmarks import (
+    BENCHMARKS, compare, read_results, run_benchmarks, seed_corpus,
+    write_results
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds a synthetic corpus of Entries and benchmarks saving Entries, "
+        "entry stats, and the tagged list, archive, feed and sitemap pages. "
+        "Everything runs in a transaction that's rolled back, so the corpus "
+        "isn't kept. Results can be saved as JSON and compared against a "
+        "baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--entries',
+            type=int,
+            default=500,
+            help="Number of Entries in the corpus."
+        )
+        parser.add_argument(
+            '--tags',
+            type=int,
+            default=100,
+            help="Number of tags the Entries' tags are drawn from."
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help="Seed for the corpus; the same seed gives the same corpus."
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help="Number of timed runs of each benchmark."
+        )
+        parser.add_argument(
+            '--benchmark',
+            action='append',
+            dest='benchmarks',
+            choices=list(BENCHMARKS),
+            help="Only run this benchmark (may be given more than once)."
+        )
+        parser.add_argument(
+            '--output',
+            default=None,
+            help="Save the results to this JSON file."
+        )
+        parser.add_argument(
+            '--baseline',
+            default=None,
+            help="Compare the results with those in this JSON file, and "
+                 "fail if any benchmark regressed."
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=0.1,
+            help="How much slower (or bigger), as a fraction of the baseline, "
+                 "a benchmark can be before it counts as a regression."
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            corpus = seed_corpus(
+                entries=options['entries'],
+                tags=options['tags'],
+                seed=options['seed']
+            )
+            results = run_benchmarks(
+                corpus,
+                repeat=options['repeat'],
+                names=options['benchmarks']
+            )
+            transaction.set_rollback(True)
+
+        if options['output']:
+            write_results(options['output'], results)
+
+        if options['verbosity'] > 0:
+            for name, result in results['results'].items():
+                memory = result['peak_memory']
+                self.stdout.write(
+                    "{0:<20} {1:>9.2f} ms {2:>5} queries {3:>9} KiB".format(
+                        name,
+                        result['wall_time'] * 1000,
+                        result['queries'],
+                        '-' if memory is None else memory // 1024
+                    )
+                )
+
+        if options['baseline']:
+            regressions = compare(
+                results,
+                read_results(options['baseline']),
+                threshold=options['threshold']
+            )
+            if regressions:
+                raise CommandError("Regressions from the baseline:\n{0}".format(
+                    "\n".join(
+                        "{0} {1}: {2} -> {3}".format(*regression)
+                        for regression in regressions
+                    )
+                ))
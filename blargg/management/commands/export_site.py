@@ -0,0 +1,106 @@
+from django.contrib.sites.models import Site
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+
+from blargg.export import (
+    export_pages, plan_export, remove_pages, write_manifest
+)
+from blargg.stats import map_chunks, setup_django, worker_pool
+
+
+class Command(BaseCommand):
+    help = (
+        "Exports published Entries, their archives and tag lists, the feeds "
+        "(see the 'export_paths' setting) and the sitemaps to a directory, to "
+        "be served directly by the front-end web server. Only the pages of "
+        "Entries changed since the last export are re-rendered, unless --full "
+        "is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help="Directory to export pages to.")
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            default=False,
+            help="Re-render every page, not only those affected by changes."
+        )
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=None,
+            help="Number of worker processes (defaults to the number of CPUs)."
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=20,
+            help="Number of pages handed to a worker at a time."
+        )
+        parser.add_argument(
+            '--host',
+            default=None,
+            help="Host name pages are rendered for; defaults to the domain "
+                 "of the current Site."
+        )
+        parser.add_argument(
+            '--secure',
+            action='store_true',
+            default=False,
+            help="Render pages as if they were requested over HTTPS."
+        )
+        parser.add_argument(
+            '--sitemaps',
+            default=None,
+            help="Dotted path to a dict of sitemaps (see write_sitemaps)."
+        )
+
+    def handle(self, *args, **options):
+        output = options['output']
+        host = options['host'] or Site.objects.get_current().domain
+
+        # Anything changed from here on is picked up by the next export.
+        started = timezone.now()
+        paths, old_paths, manifest = plan_export(output, full=options['full'])
+        removed = remove_pages(output, old_paths)
+
+        size = options['batch_size']
+        chunks = (
+            (output, host, options['secure'], paths[i:i + size])
+            for i in range(0, len(paths), size)
+        )
+        if options['processes'] != 1:
+            # Don't let forked workers inherit our connections.
+            connections.close_all()
+        pool = worker_pool(options['processes'], initializer=setup_django)
+        written = 0
+        try:
+            for chunk, (chunk_written, chunk_removed) in map_chunks(
+                    export_pages, chunks, options['processes'], pool):
+                written += chunk_written
+                removed += chunk_removed
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+
+        call_command(
+            'write_sitemaps',
+            output,
+            sitemaps=options['sitemaps'],
+            base_url="{0}://{1}".format(
+                'https' if options['secure'] else 'http', host
+            ),
+            protocol='https' if options['secure'] else 'http',
+            verbosity=0
+        )
+        write_manifest(output, started, manifest)
+
+        if options['verbosity'] > 0:
+            self.stdout.write(
+                "Exported {0} pages ({1} removed) to {2}".format(
+                    written, removed, output
+                )
+            )
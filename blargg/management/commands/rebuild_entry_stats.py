@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from blargg.models import rebuild_summaries, rebuild_word_counts
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-calculates the stored word counts (and the archive calendar), "
+        "excerpts and reading times for all Entries."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help="Number of Entries to read (and count) at a time."
+        )
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=None,
+            help="Number of worker processes (defaults to the number of CPUs)."
+        )
+
+    def handle(self, *args, **options):
+        rebuild_word_counts(
+            chunk_size=options['chunk_size'],
+            processes=options['processes']
+        )
+        rebuild_summaries(chunk_size=options['chunk_size'])
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from blargg.models import RelatedEntry
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-calculates the related Entries of all Entries (e.g. after "
+        "changing the related_entries_count setting)."
+    )
+
+    def handle(self, *args, **options):
+        RelatedEntry.objects.rebuild()
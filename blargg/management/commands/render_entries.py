@@ -0,0 +1,95 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Q
+
+from blargg.models import Entry, render_queued_entry, requeue_entries
+from blargg.stats import map_chunks, setup_django, worker_pool
+
+
+def _render_chunk(pks):
+    """Renders a chunk of queued entries; runs in a worker process."""
+    return [render_queued_entry(pk) for pk in pks]
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs workers that render Entries queued while the 'async_render' "
+        "setting is enabled."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=None,
+            help="Number of worker processes (defaults to the number of CPUs)."
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10,
+            help="Number of Entries handed to a worker at a time."
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=2.0,
+            help="Seconds to wait before checking an empty queue again."
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            default=False,
+            help="Exit once the queue is empty."
+        )
+        parser.add_argument(
+            '--requeue',
+            action='store_true',
+            default=False,
+            help="Re-queue Entries that failed to render, and Entries left "
+                 "rendering by workers that died (claimed more than the "
+                 "'claim_timeout' setting's seconds ago)."
+        )
+
+    def handle(self, *args, **options):
+        if options['requeue']:
+            requeue_entries()
+
+        # The workers are started once, and render each batch of the queue.
+        processes = options['processes']
+        if processes != 1:
+            # Don't let forked workers inherit our connections.
+            connections.close_all()
+        pool = worker_pool(processes, initializer=setup_django)
+        try:
+            self.render(pool, **options)
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+
+    def render(self, pool, **options):
+        """Renders the queue until it's empty (with ``--once``), or
+        forever."""
+        while True:
+            pks = list(Entry.objects.filter(
+                Q(render_status=Entry.RENDER_PENDING) | Q(render_queued=True)
+            ).order_by('pk').values_list('pk', flat=True))
+
+            if pks:
+                size = options['batch_size']
+                chunks = (pks[i:i + size] for i in range(0, len(pks), size))
+                rendered = 0
+                for chunk, results in map_chunks(_render_chunk, chunks,
+                                                 options['processes'], pool):
+                    rendered += sum(results)
+                if options['verbosity'] > 0:
+                    self.stdout.write(
+                        "Rendered {0} Entries.".format(rendered)
+                    )
+            elif options['once']:
+                break
+            else:
+                time.sleep(options['interval'])
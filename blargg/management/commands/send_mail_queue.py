@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blargg.models import requeue_mail, send_queued_mail
+
+
+class Command(BaseCommand):
+    help = (
+        "Sends queued mail (e.g. Mail2Blogger cross-posts), a batch at a time "
+        "over a single connection, retrying failed messages later."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help="Number of messages sent over each connection."
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=10.0,
+            help="Seconds to wait before checking for due messages again."
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            default=False,
+            help="Exit once no messages are due."
+        )
+        parser.add_argument(
+            '--requeue',
+            action='store_true',
+            default=False,
+            help="Re-queue failed messages, and messages left sending by "
+                 "workers that died (claimed more than the 'claim_timeout' "
+                 "setting's seconds ago)."
+        )
+
+    def handle(self, *args, **options):
+        if options['requeue']:
+            requeue_mail()
+
+        while True:
+            sent, failed = send_queued_mail(options['batch_size'])
+            if sent or failed:
+                if options['verbosity'] > 0:
+                    self.stdout.write(
+                        "Sent {0} messages ({1} failed).".format(sent, failed)
+                    )
+            elif options['once']:
+                break
+            else:
+                time.sleep(options['interval'])
@@ -0,0 +1,87 @@
+import gzip
+import os
+
+from django.contrib.sites.models import Site
+from django.core.management.base import BaseCommand
+from django.utils.encoding import force_bytes
+from django.utils.module_loading import import_string
+
+from blargg.sitemaps import (
+    EntrySitemap, iter_index_xml, iter_sitemap_urls, iter_sitemap_xml
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Writes gzipped sitemaps (and a sitemap index) to a directory, to be "
+        "served directly by the front-end web server."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help="Directory to write sitemaps to.")
+        parser.add_argument(
+            '--sitemaps',
+            default=None,
+            help="Dotted path to a dict of sitemaps (as passed to the "
+                 "sitemap views); defaults to {'blog': EntrySitemap}."
+        )
+        parser.add_argument(
+            '--base-url',
+            default=None,
+            help="URL at which the sitemap files are served; defaults to "
+                 "the root of the current Site."
+        )
+        parser.add_argument('--protocol', default='http')
+
+    def write(self, path, lines):
+        with gzip.open(path, 'wb') as f:
+            for line in lines:
+                f.write(force_bytes(line))
+
+    def handle(self, *args, **options):
+        if options['sitemaps']:
+            sitemaps = import_string(options['sitemaps'])
+        else:
+            sitemaps = {'blog': EntrySitemap}
+
+        site = Site.objects.get_current()
+        base_url = options['base_url'] or "{0}://{1}".format(
+            options['protocol'], site.domain
+        )
+        base_url = base_url.rstrip('/')
+
+        output = options['output']
+        if not os.path.isdir(output):
+            os.makedirs(output)
+
+        locations = []
+        for section, sitemap in sorted(sitemaps.items()):
+            if callable(sitemap):
+                sitemap = sitemap()
+            for page in sitemap.paginator.page_range:
+                # The index lists the gzipped files, since that's all that's
+                # written.
+                if page == 1:
+                    name = "sitemap-{0}.xml.gz".format(section)
+                else:
+                    name = "sitemap-{0}-{1}.xml.gz".format(section, page)
+                urls = iter_sitemap_urls(
+                    sitemap,
+                    page=page,
+                    site=site,
+                    protocol=options['protocol']
+                )
+                self.write(
+                    os.path.join(output, name),
+                    iter_sitemap_xml(urls, sitemap.changefreq, sitemap.priority)
+                )
+                locations.append("{0}/{1}".format(base_url, name))
+
+        self.write(
+            os.path.join(output, 'sitemap.xml.gz'),
+            iter_index_xml(locations)
+        )
+        if options['verbosity'] > 0:
+            self.stdout.write("Wrote {0} sitemaps to {1}".format(
+                len(locations), output
+            ))
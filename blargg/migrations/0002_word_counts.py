@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blargg', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveWordCount',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField(default=0)),
+                ('day', models.PositiveSmallIntegerField(default=0)),
+                ('word', models.CharField(max_length=64)),
+                ('count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='EntryWordCount',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('word', models.CharField(max_length=64)),
+                ('count', models.IntegerField(default=0)),
+                ('entry', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='word_counts', to='blargg.Entry')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='entry',
+            name='archive_date',
+            field=models.DateField(blank=True, editable=False, help_text="The (local) date under which this entry's words are counted in the archive stats.", null=True),
+        ),
+        migrations.AlterUniqueTogether(
+            name='archivewordcount',
+            unique_together=set([('year', 'month', 'day', 'word')]),
+        ),
+        migrations.AlterUniqueTogether(
+            name='entrywordcount',
+            unique_together=set([('entry', 'word')]),
+        ),
+    ]
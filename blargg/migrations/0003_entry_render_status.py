@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blargg', '0002_word_counts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='entry',
+            name='render_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('running', 'Rendering'), ('done', 'Done'), ('failed', 'Failed')], default='done', editable=False, help_text='Entries are only shown once their content is rendered.', max_length=8),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+def count_entries(apps, schema_editor):
+    Tag = apps.get_model('blargg', 'Tag')
+    for tag in Tag.objects.all():
+        tag.entry_count = tag.entry_set.filter(published=True).count()
+        tag.save(update_fields=['entry_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blargg', '0003_entry_render_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tag',
+            name='entry_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='The number of published entries with this tag.'),
+        ),
+        migrations.RunPython(count_entries, migrations.RunPython.noop),
+    ]
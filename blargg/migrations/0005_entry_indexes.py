@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+# An index on the (automatically created) Entry.tags through table, for
+# finding a tag's entries without visiting the table itself.
+TAG_ENTRY_INDEX = 'blargg_entry_tags_tag_entry_idx'
+
+
+def _through_table(apps):
+    Entry = apps.get_model('blargg', 'Entry')
+    return Entry._meta.get_field('tags').remote_field.through._meta.db_table
+
+
+def create_tag_entry_index(apps, schema_editor):
+    qn = schema_editor.quote_name
+    schema_editor.execute("CREATE INDEX {0} ON {1} ({2}, {3})".format(
+        qn(TAG_ENTRY_INDEX), qn(_through_table(apps)),
+        qn('tag_id'), qn('entry_id')
+    ))
+
+
+def drop_tag_entry_index(apps, schema_editor):
+    qn = schema_editor.quote_name
+    sql = "DROP INDEX {0}".format(qn(TAG_ENTRY_INDEX))
+    if schema_editor.connection.vendor == 'mysql':
+        sql += " ON {0}".format(qn(_through_table(apps)))
+    schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blargg', '0004_tag_entry_count'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='entry',
+            index_together=set([('published', 'render_status', 'published_on')]),
+        ),
+        migrations.RunPython(create_tag_entry_index, drop_tag_entry_index),
+    ]
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from collections import Counter
+
+from django.db import migrations, models
+
+
+def fill_calendar(apps, schema_editor):
+    Entry = apps.get_model('blargg', 'Entry')
+    ArchiveDate = apps.get_model('blargg', 'ArchiveDate')
+    counts = Counter()
+    dates = Entry.objects.filter(archive_date__isnull=False).values_list(
+        'archive_date', flat=True
+    )
+    for d in dates.iterator():
+        counts[(d.year, 0, 0)] += 1
+        counts[(d.year, d.month, 0)] += 1
+        counts[(d.year, d.month, d.day)] += 1
+    ArchiveDate.objects.bulk_create([
+        ArchiveDate(year=year, month=month, day=day, entry_count=count)
+        for (year, month, day), count in counts.items()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blargg', '0005_entry_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveDate',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField(default=0)),
+                ('day', models.PositiveSmallIntegerField(default=0)),
+                ('entry_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='archivedate',
+            unique_together=set([('year', 'month', 'day')]),
+        ),
+        migrations.RunPython(fill_calendar, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blargg', '0006_archive_date'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='entry',
+            name='archive_date',
+            field=models.DateField(blank=True, db_index=True, editable=False, help_text="The (local) date under which this entry's words are counted in the archive stats.", null=True),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blargg', '0007_entry_archive_date_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueuedMail',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=256)),
+                ('body', models.TextField(blank=True)),
+                ('html', models.TextField(blank=True)),
+                ('from_email', models.CharField(max_length=256)),
+                ('recipients', models.TextField(help_text='One address per line.')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('sending', 'Sending'), ('sent', 'Sent'), ('failed', 'Failed')], default='queued', max_length=8)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('next_attempt_on', models.DateTimeField()),
+                ('last_error', models.TextField(blank=True)),
+                ('created_on', models.DateTimeField(auto_now_add=True)),
+                ('sent_on', models.DateTimeField(blank=True, null=True)),
+                ('entry', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='queued_mail', to='blargg.Entry')),
+            ],
+            options={
+                'verbose_name': 'Queued Mail',
+                'verbose_name_plural': 'Queued Mail',
+            },
+        ),
+        migrations.AlterIndexTogether(
+            name='queuedmail',
+            index_together=set([('status', 'next_attempt_on')]),
+        ),
+    ]
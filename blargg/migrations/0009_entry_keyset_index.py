@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blargg', '0008_queued_mail'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='entry',
+            index_together=set([
+                ('published', 'render_status', 'published_on', 'id'),
+            ]),
+        ),
+    ]
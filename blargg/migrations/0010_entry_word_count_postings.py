@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blargg', '0009_entry_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='entrywordcount',
+            index_together=set([('word', 'entry', 'count')]),
+        ),
+    ]
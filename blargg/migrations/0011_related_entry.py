@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# The table is left empty: filling it means scoring every pair of Entries
+# that share a tag, so run ``manage.py rebuild_related_entries`` (which does
+# it a chunk at a time, in SQL) after migrating.
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blargg', '0010_entry_word_count_postings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(help_text='The sum, over the shared tags, of 1 / (1 + the number of published entries with the tag).')),
+                ('created_on', models.DateTimeField(auto_now_add=True)),
+                ('entry', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_entries', to='blargg.Entry')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='blargg.Entry')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='relatedentry',
+            unique_together=set([('entry', 'related')]),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+
+from blargg.stats import summarize
+
+
+def fill_summaries(apps, schema_editor):
+    Entry = apps.get_model('blargg', 'Entry')
+    blargg_settings = getattr(settings, 'BLARGG', {})
+    excerpt_words = blargg_settings.get('excerpt_words', 20)
+    words_per_minute = blargg_settings.get('words_per_minute', 200)
+    rows = Entry.objects.values_list('pk', 'rendered_content')
+    for pk, content in rows.iterator():
+        excerpt, word_count, reading_time = summarize(
+            content, excerpt_words, words_per_minute
+        )
+        Entry.objects.filter(pk=pk).update(
+            excerpt=excerpt,
+            word_count=word_count,
+            reading_time=reading_time
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blargg', '0011_related_entry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='entry',
+            name='excerpt',
+            field=models.TextField(blank=True, editable=False, help_text='The start of the rendered content, as plain text.'),
+        ),
+        migrations.AddField(
+            model_name='entry',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='entry',
+            name='reading_time',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Minutes it takes to read this entry.'),
+        ),
+        migrations.RunPython(fill_summaries, migrations.RunPython.noop),
+    ]
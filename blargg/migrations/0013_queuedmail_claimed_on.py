@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blargg', '0012_entry_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='queuedmail',
+            name='claimed_on',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blargg', '0013_queuedmail_claimed_on'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='entry',
+            name='render_claimed_on',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+    ]
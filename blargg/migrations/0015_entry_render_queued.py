@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+def clear_render_claims(apps, schema_editor):
+    # Rendered Entries' claims are now cleared, so ``requeue_entries`` can
+    # tell the ones whose re-render was abandoned.
+    Entry = apps.get_model('blargg', 'Entry')
+    Entry.objects.filter(render_status='done').update(render_claimed_on=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blargg', '0014_entry_render_claimed_on'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='entry',
+            name='render_queued',
+            field=models.BooleanField(db_index=True, default=False, editable=False, help_text='The content changed, and is waiting to be re-rendered; the previously rendered content is shown until then.'),
+        ),
+        migrations.RunPython(clear_render_claims, migrations.RunPython.noop),
+    ]
@@ -1,48 +1,142 @@
+import calendar
+import logging
 import pytz
-import re
-
-from collections import Counter
-try:
-    from docutils.core import publish_parts as docutils_publish
-    assert docutils_publish  # placate flake8
-except ImportError:  # pragma: no cover
-    docutils_publish = None  # pragma: no cover
-
-try:
-    from markdown import markdown
-    assert markdown  # placate flake8
-except ImportError:  # pragma: no cover
-    markdown = None  # pragma: no cover
 
+from datetime import date, timedelta
+from collections import Counter, OrderedDict, defaultdict
 from django.conf import settings
 from django.contrib.sites.models import Site
+from django.core.exceptions import ValidationError
+from django.core.mail import EmailMultiAlternatives, get_connection
 from django.core.urlresolvers import reverse
-from django.db import models
-from django.db.models.signals import post_save
+from django.db import IntegrityError, connections, models, transaction
+from django.db.models import ExpressionWrapper, F, FloatField, Sum, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Concat
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import receiver
 from django.template.defaultfilters import slugify
-from django.utils.html import strip_tags
+from django.utils.encoding import force_text
 from django.utils.safestring import mark_safe
 from django.utils.timezone import now as utc_now
-from django.utils.timezone import make_naive
+from django.utils.timezone import get_default_timezone, localtime, make_naive
 
-from .signals import entry_published
+from .cache import bump_generation_on_commit, render_cache
+from .instrumentation import timed
+from .renderers import MAX_FORMAT_LENGTH, content_format_choices
+from .renderers import get_renderer, render
+from .signals import blargg_settings, entries_published, entry_published
+from .stats import count_rows, count_words, iter_chunks, map_chunks
+from .stats import summarize
+
+logger = logging.getLogger(__name__)
 
 
 class TagManager(models.Manager):
+
+    def get_or_create_slugs(self, names):
+        """Given a dict of ``{slug: name}``, returns a dict of ``{slug: id}``,
+        bulk-creating any ``Tag``s that don't exist yet."""
+        slugs = list(names)
+        tags = dict(self.filter(slug__in=slugs).values_list('slug', 'pk'))
+        missing = [
+            self.model(name=name, slug=slug)
+            for slug, name in names.items() if slug not in tags
+        ]
+        if missing:
+            try:
+                with transaction.atomic():
+                    self.bulk_create(missing)
+            except IntegrityError:
+                # A concurrent save created some of these first; fall back to
+                # creating the rest one at a time.
+                for tag in missing:
+                    self.get_or_create(
+                        slug=tag.slug,
+                        defaults={'name': tag.name}
+                    )
+            tags = dict(self.filter(slug__in=slugs).values_list('slug', 'pk'))
+        return tags
+
+    @timed('tags')
     def create_tags(self, entry):
-        """Inspects an ``Entry`` instance, and builds associates ``Tag``
-        objects based on the values in the ``Entry``'s ``tag_string``."""
-        tag_list = [t.lower().strip() for t in entry.tag_string.split(',')]
-        for t in tag_list:
-            tag, created = self.get_or_create(name=t)
-            entry.tags.add(tag)
+        """Inspects an ``Entry`` instance, and syncs its ``Tag``s with the
+        values in the ``Entry``'s ``tag_string``: missing ``Tag``s are
+        created, and only the changes to the entry's tags are written, in
+        (at most) one INSERT and one DELETE. Returns a tuple of the sets of
+        added and removed ``Tag`` ids.
+
+        NOTE: this writes to the through table directly, so ``m2m_changed``
+        isn't sent.
+
+        """
+        names = OrderedDict()
+        for t in entry.tag_string.split(','):
+            name = t.lower().strip()
+            if slugify(name):
+                names.setdefault(slugify(name), name)
+
+        through = Entry.tags.through
+        with transaction.atomic():
+            # Serialize concurrent syncs for the same Entry.
+            list(Entry.objects.select_for_update().filter(pk=entry.pk)
+                 .values_list('pk', flat=True))
+
+            wanted = set(self.get_or_create_slugs(names).values())
+            current = set(through.objects.filter(
+                entry_id=entry.pk
+            ).values_list('tag_id', flat=True))
+
+            added, removed = wanted - current, current - wanted
+            if removed:
+                through.objects.filter(
+                    entry_id=entry.pk,
+                    tag_id__in=removed
+                ).delete()
+            if added:
+                through.objects.bulk_create([
+                    through(entry_id=entry.pk, tag_id=tag_id)
+                    for tag_id in added
+                ])
+        return added, removed
+
+    def update_counts(self, tags):
+        """Recounts the published ``Entry``s for a ``QuerySet`` of ``Tag``s
+        in a single UPDATE, and invalidates the cached tag list."""
+        through = Entry.tags.through
+        qn = connections[self.db].ops.quote_name
+        count = (
+            "SELECT COUNT(*) FROM {through} "
+            "INNER JOIN {entry} ON {through}.{entry_id} = {entry}.{entry_pk} "
+            "WHERE {through}.{tag_id} = {tag}.{tag_pk} "
+            "AND {entry}.{published} = %s"
+        ).format(
+            through=qn(through._meta.db_table),
+            entry=qn(Entry._meta.db_table),
+            tag=qn(self.model._meta.db_table),
+            entry_id=qn(through._meta.get_field('entry').column),
+            tag_id=qn(through._meta.get_field('tag').column),
+            entry_pk=qn(Entry._meta.pk.column),
+            tag_pk=qn(self.model._meta.pk.column),
+            published=qn(Entry._meta.get_field('published').column),
+        )
+        tags.update(entry_count=RawSQL(count, (True, )))
+        bump_generation_on_commit('tags')
+
+    def cloud(self):
+        """``Tag``s used by published ``Entry``s, most used first."""
+        return self.filter(entry_count__gt=0).order_by('-entry_count', 'name')
 
 
 class Tag(models.Model):
     """A *really* light-weight tagging class."""
     name = models.CharField(max_length=256)
     slug = models.SlugField(max_length=256, editable=False, unique=True)
+    entry_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="The number of published entries with this tag."
+    )
 
     def __str__(self):
         return self.name
@@ -64,23 +158,192 @@ class Tag(models.Model):
     objects = TagManager()
 
 
+class EntryQuerySet(models.QuerySet):
+
+    def rendered(self):
+        """``Entry``s whose content has finished rendering."""
+        return self.filter(render_status=Entry.RENDER_DONE)
+
+    def published(self):
+        """``Entry``s that should be visible to the public."""
+        return self.rendered().filter(published=True)
+
+    def with_related(self):
+        """Fetches each ``Entry``'s author and site along with it, so listing
+        Entries costs the same number of queries however many there are. (Add
+        ``prefetch_related('tags')`` if your templates list their tags.)"""
+        return self.select_related('author', 'site')
+
+    def without_content(self):
+        """Defers the (large) raw and rendered content, for lists of
+        ``Entry``s; show their stored ``excerpt`` instead."""
+        return self.defer('raw_content', 'rendered_content')
+
+    def tagged(self, slugs, match_all=True):
+        """``Entry``s tagged with all (or, unless ``match_all``, any) of the
+        given ``Tag`` slugs. Matches are found with a single (grouped) query
+        on the tags' through table, rather than a DISTINCT over a join."""
+        slugs = set(slugs)
+        matches = Entry.tags.through.objects.filter(tag__slug__in=slugs)
+        if match_all:
+            matches = matches.values('entry_id').annotate(
+                num_tags=models.Count('tag')
+            ).filter(num_tags=len(slugs))
+        return self.filter(pk__in=matches.values('entry_id'))
+
+    def archived(self, year, month=0, day=0):
+        """``Entry``s counted in an archive year, month, or day (a ``month``
+        or ``day`` of 0 means the whole year or month)."""
+        if day:
+            start = end = date(year, month, day)
+        elif month:
+            start = date(year, month, 1)
+            end = date(year, month, calendar.monthrange(year, month)[1])
+        else:
+            start, end = date(year, 1, 1), date(year, 12, 31)
+        return self.filter(archive_date__range=(start, end))
+
+    def publish(self):
+        """Publishes these ``Entry``s with a few set-based queries, rather than
+        saving each one, and returns the number published.
+
+        Everything happens in one transaction. The unpublished rows are
+        claimed (locked) first, and only those are updated, so concurrent
+        calls never publish an ``Entry`` twice. Those published for the first
+        time share a ``published_on`` time, and are sent in a single
+        ``entries_published`` signal.
+
+        """
+        now = utc_now()
+        with transaction.atomic():
+            claimed = list(self.select_for_update().filter(
+                published=False
+            ).values_list('pk', 'published_on'))
+            if not claimed:
+                return 0
+            first = [pk for pk, on in claimed if on is None]
+            again = [pk for pk, on in claimed if on is not None]
+            for chunk in _chunks(first, 500):
+                Entry.objects.filter(pk__in=chunk).update(
+                    published=True,
+                    published_on=now,
+                    date_slug=Concat(
+                        Value(now.strftime("%Y/%m/%d/")), F('slug')
+                    ),
+                    updated_on=now
+                )
+            for chunk in _chunks(again, 500):
+                Entry.objects.filter(pk__in=chunk).update(
+                    published=True,
+                    updated_on=now
+                )
+
+            pks = first + again
+            _entries_changed(pks)
+
+            # Entries still waiting for a worker are rendered now, since
+            # ``entries_published`` receivers need their content.
+            for chunk in _chunks(pks, 500):
+                pending = Entry.objects.filter(
+                    models.Q(render_status=Entry.RENDER_PENDING) |
+                    models.Q(render_queued=True),
+                    pk__in=chunk
+                )
+                for pk in pending.values_list('pk', flat=True):
+                    render_queued_entry(pk)
+
+            if first:
+                entries = []
+                for chunk in _chunks(first, 500):
+                    entries.extend(Entry.objects.filter(
+                        pk__in=chunk
+                    ).select_related('site', 'author'))
+                entries_published.send(sender=Entry, entries=entries)
+        return len(pks)
+
+    def unpublish(self):
+        """Unpublishes these ``Entry``s with a few set-based queries (in one
+        transaction), and returns the number unpublished."""
+        now = utc_now()
+        with transaction.atomic():
+            pks = list(self.select_for_update().filter(
+                published=True
+            ).values_list('pk', flat=True))
+            for chunk in _chunks(pks, 500):
+                Entry.objects.filter(pk__in=chunk).update(
+                    published=False,
+                    published_on=None,
+                    date_slug=Concat(
+                        Value(now.strftime("%Y/%m/%d/")), F('slug')
+                    ),
+                    updated_on=now
+                )
+            if pks:
+                _entries_changed(pks)
+        return len(pks)
+
+
 class Entry(models.Model):
+    # The formats that can actually be used come from the ``renderers``
+    # setting (see ``blargg.renderers`` and ``clean``).
     CONTENT_FORMAT_CHOICES = (
         ('html', 'HTML'),
         ('rst', 'reStructured Text'),
         ('md', 'Markdown (not yet supported)'),
     )
 
+    RENDER_PENDING = 'pending'
+    RENDER_RENDERING = 'running'
+    RENDER_DONE = 'done'
+    RENDER_FAILED = 'failed'
+    RENDER_STATUS_CHOICES = (
+        (RENDER_PENDING, 'Pending'),
+        (RENDER_RENDERING, 'Rendering'),
+        (RENDER_DONE, 'Done'),
+        (RENDER_FAILED, 'Failed'),
+    )
+
     site = models.ForeignKey(Site)
     author = models.ForeignKey(settings.AUTH_USER_MODEL)
     title = models.CharField(max_length=256)
 
     raw_content = models.TextField(help_text="Content entered by the author.")
     content_format = models.CharField(
-        max_length=4,
+        max_length=MAX_FORMAT_LENGTH,
         choices=CONTENT_FORMAT_CHOICES
     )
     rendered_content = models.TextField(editable=False)
+    render_status = models.CharField(
+        max_length=8,
+        choices=RENDER_STATUS_CHOICES,
+        default=RENDER_DONE,
+        editable=False,
+        help_text="Entries are only shown once their content is rendered."
+    )
+    render_queued = models.BooleanField(
+        default=False,
+        editable=False,
+        db_index=True,
+        help_text="The content changed, and is waiting to be re-rendered; the "
+                  "previously rendered content is shown until then."
+    )
+    # When a ``render_entries`` worker claimed this Entry to render it.
+    render_claimed_on = models.DateTimeField(
+        blank=True,
+        null=True,
+        editable=False
+    )
+    excerpt = models.TextField(
+        blank=True,
+        editable=False,
+        help_text="The start of the rendered content, as plain text."
+    )
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+    reading_time = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Minutes it takes to read this entry."
+    )
     published = models.BooleanField(
         default=False,
         blank=True,
@@ -105,16 +368,50 @@ class Entry(models.Model):
     )
     tags = models.ManyToManyField(Tag, editable=False)
 
+    archive_date = models.DateField(
+        blank=True,
+        null=True,
+        editable=False,
+        db_index=True,
+        help_text="The (local) date under which this entry's words are "
+                  "counted in the archive stats."
+    )
     published_on = models.DateTimeField(blank=True, null=True, editable=False)
     updated_on = models.DateTimeField(auto_now=True)
     created_on = models.DateTimeField(auto_now_add=True)
 
+    # Whether this was published when it was loaded (or last saved); None if
+    # that's not known.
+    _was_published = None
+    # Set by ``_set_published``, so ``save`` sends ``entry_published``.
+    _publishing = False
+    # The ``(raw_content, content_format)`` when this was loaded (or last
+    # saved); None if that's not known.
+    _loaded_content = None
+
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super(Entry, cls).from_db(db, field_names, values)
+        loaded = dict(zip(field_names, values))
+        instance._was_published = loaded.get('published')
+        if 'raw_content' in loaded and 'content_format' in loaded:
+            instance._loaded_content = (
+                loaded['raw_content'], loaded['content_format']
+            )
+        return instance
+
     class Meta:
         ordering = ['-published_on', 'title']
         get_latest_by = 'published_on'
+        # Matches ``Entry.objects.published()`` ordered (or filtered) by
+        # ``published_on``; i.e. almost every public query. The ``id`` breaks
+        # ties for keyset pagination (see ``blargg.pagination``).
+        index_together = [
+            ('published', 'render_status', 'published_on', 'id'),
+        ]
         verbose_name = 'Entry'
         verbose_name_plural = 'Entries'
 
@@ -137,45 +434,140 @@ class Entry(models.Model):
             d = self.updated_on
         self.date_slug = u"{0}/{1}".format(d.strftime("%Y/%m/%d"), self.slug)
 
-    def _render_content(self):
+    def _renderer_version(self):
+        """Identifies the renderer (and its version) for the entry's
+        ``content_format``; this is part of the render cache key."""
+        renderer = get_renderer(self.content_format)
+        return renderer and renderer.version
+
+    @timed('render')
+    def _render_content(self, cached_only=False):
+        """Renders the content according to the ``content_format``. Rendered
+        rST and Markdown are cached, so re-saving an entry whose content
+        hasn't changed doesn't render it again.
+
+        If ``cached_only`` is True, content that isn't in the cache is left
+        alone. Returns True if ``rendered_content`` is up to date.
+
+        """
+        version = self._renderer_version()
+        if version is None:
+            self._render()
+            return True
+
+        key = render_cache.key(self.content_format, self.raw_content, version)
+        rendered = render_cache.get(key)
+        if rendered is not None:
+            self.rendered_content = rendered
+        elif cached_only:
+            return False
+        else:
+            self._render()
+            render_cache.set(key, self.rendered_content)
+        return True
+
+    def _render(self):
         """Renders the content according to the ``content_format``."""
-        if self.content_format == "rst" and docutils_publish is not None:
-            doc_parts = docutils_publish(
-                source=self.raw_content,
-                writer_name="html4css1"
-            )
-            self.rendered_content = doc_parts['fragment']
-        elif self.content_format == "rs" and docutils_publish is None:
-            raise RuntimeError("Install docutils to pubilsh reStructuredText")
-        elif self.content_format == "md" and markdown is not None:
-            self.rendered_content = markdown(self.raw_content)
-        elif self.content_format == "md" and markdown is None:
-            raise RuntimeError("Install Markdown to pubilsh markdown")
-        else:  # Assume we've got html
-            self.rendered_content = self.raw_content
+        self.rendered_content = render(self.content_format, self.raw_content)
+
+    def _summarize(self):
+        """Sets the ``excerpt``, ``word_count`` and ``reading_time`` from the
+        rendered content."""
+        self.excerpt, self.word_count, self.reading_time = summarize(
+            self.rendered_content,
+            blargg_settings.get('excerpt_words', 20),
+            blargg_settings.get('words_per_minute', 200)
+        )
+
+    def _get_archive_date(self):
+        """The local date of the archive day in which this entry appears, or
+        ``None`` if it's not published."""
+        return _archive_date(self.published, self.published_on)
 
     def _set_published(self):
         """Set the fields that need to be set in order for this thing to
-        appear "Published", and send the ``entry_published`` signal."""
+        appear "Published", and have ``save`` send the ``entry_published``
+        signal."""
         self.published = True
         self.published_on = utc_now()
+        self._publishing = True
         return True
 
+    def clean_fields(self, exclude=None):
+        # ``content_format`` is checked against the ``renderers`` setting (in
+        # ``clean``), rather than the field's fixed choices; its other
+        # validators (e.g. its ``max_length``) still run here.
+        exclude = list(exclude or [])
+        errors = {}
+        try:
+            super(Entry, self).clean_fields(
+                exclude=exclude + ['content_format']
+            )
+        except ValidationError as e:
+            errors = e.update_error_dict(errors)
+        if 'content_format' not in exclude:
+            field = self._meta.get_field('content_format')
+            try:
+                field.run_validators(self.content_format)
+            except ValidationError as e:
+                errors['content_format'] = e.error_list
+        if errors:
+            raise ValidationError(errors)
+
+    def clean(self):
+        """Only allow the content formats in the ``renderers`` setting."""
+        formats = [fmt for fmt, label in content_format_choices()]
+        if self.content_format not in formats:
+            raise ValidationError({
+                'content_format': "Unknown content format: {0}".format(
+                    self.content_format
+                )
+            })
+
     def save(self, *args, **kwargs):
         """Auto-generate a slug from the name."""
         self._create_slug()
         self._create_date_slug()
-        self._render_content()
 
         # Call ``_set_published`` the *first* time this Entry is published.
         # NOTE: if this is unpublished, and then republished, this method won't
         # get called; e.g. the date won't get changed and the
         # ``entry_published`` signal won't get re-sent.
-        send_published_signal = False
         if self.published and self.published_on is None:
-            send_published_signal = self._set_published()
+            self._set_published()
+        send_published_signal = self.published and self._publishing
+        self._publishing = False
+
+        # With ``async_render``, content that's not already in the render
+        # cache is left for a worker (see ``render_queued_entry``); an Entry
+        # that was already rendered keeps showing its old content until then.
+        # Entries being published are always rendered now, since they're
+        # about to be shown (and ``entry_published`` receivers need their
+        # content).
+        content = (self.raw_content, self.content_format)
+        publishing = self.published and not self._was_published
+        render_later = blargg_settings.get('async_render', False)
+        if render_later and not publishing:
+            if content == self._loaded_content:
+                pass  # Nothing to re-render
+            elif self._render_content(cached_only=True):
+                self.render_status = self.RENDER_DONE
+                self.render_queued = False
+                self._summarize()
+            elif (not self._state.adding and
+                    self.render_status == self.RENDER_DONE):
+                self.render_queued = True
+            else:
+                self.render_status = self.RENDER_PENDING
+        else:
+            self._render_content()
+            self.render_status = self.RENDER_DONE
+            self.render_queued = False
+            self._summarize()
 
         super(Entry, self).save(*args, **kwargs)
+        self._was_published = self.published
+        self._loaded_content = content
 
         # We need an ID before we can send this signal.
         if send_published_signal:
@@ -207,6 +599,8 @@ class Entry(models.Model):
             args = [self.slug]
         return reverse('blargg:entry_detail', args=args)
 
+    objects = EntryQuerySet.as_manager()
+
     def publish(self):
         """Puplish & Save."""
         self._set_published()
@@ -238,25 +632,973 @@ class Entry(models.Model):
         return mark_safe(u"{0}{1}".format(self.content, origin))
 
 
+class EntryWordCount(models.Model):
+    """The number of times a word is used in an ``Entry``'s content."""
+    entry = models.ForeignKey(
+        Entry,
+        related_name='word_counts',
+        on_delete=models.CASCADE
+    )
+    word = models.CharField(max_length=64)
+    count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return self.word
+
+    class Meta:
+        unique_together = ('entry', 'word')
+        # The postings for a word, for search (see ``blargg.search``).
+        index_together = [('word', 'entry', 'count')]
+
+
+class RelatedEntryManager(models.Manager):
+
+    def for_entry(self, entry):
+        """The published (and rendered) ``Entry``s related to an ``Entry``,
+        most related first; this reads the stored rows (in one indexed query)
+        rather than comparing tags."""
+        rows = self.filter(
+            entry=entry,
+            related__published=True,
+            related__render_status=Entry.RENDER_DONE
+        ).select_related('related').order_by('-score', '-related__pk')
+        return [row.related for row in rows]
+
+    def refresh(self, pks, chunk_size=500):
+        """Recomputes the related ``Entry``s of the ``Entry``s with the given
+        ids, a chunk at a time. Each chunk's scores are summed in a single
+        (grouped) query on the tags' through table, and only the Entries
+        whose related Entries have changed are rewritten. Each chunk's
+        Entries are locked while they're refreshed, so concurrent refreshes
+        of the same Entry don't both insert its rows."""
+        through = Entry.tags.through
+        limit = blargg_settings.get('related_entries_count', 5)
+        weight = _tag_weight()
+        pks = sorted(set(pks))
+        for chunk in _chunks(pks, chunk_size):
+            with transaction.atomic():
+                # Locked in id order, so concurrent refreshes can't deadlock.
+                list(Entry.objects.select_for_update().filter(
+                    pk__in=chunk
+                ).order_by('pk').values_list('pk', flat=True))
+                scores = through.objects.filter(
+                    entry_id__in=chunk,
+                    tag__entry__published=True
+                ).values('entry_id', 'tag__entry').annotate(
+                    score=Sum(weight, output_field=FloatField())
+                )
+                ranked = defaultdict(list)
+                for row in scores:
+                    if row['entry_id'] != row['tag__entry']:
+                        ranked[row['entry_id']].append(
+                            (round(row['score'], 6), row['tag__entry'])
+                        )
+                current = defaultdict(list)
+                for row in self.filter(entry__in=chunk).values_list(
+                    'entry', 'score', 'related'
+                ):
+                    current[row[0]].append((round(row[1], 6), row[2]))
+
+                changed, rows = [], []
+                for pk in chunk:
+                    related = sorted(ranked[pk], reverse=True)[:limit]
+                    if related != sorted(current[pk], reverse=True):
+                        changed.append(pk)
+                        rows.extend(
+                            self.model(entry_id=pk, related_id=other, score=n)
+                            for n, other in related
+                        )
+                self._replace(changed, rows)
+
+    def entry_changed(self, pk):
+        """Updates the related ``Entry``s after an ``Entry``'s tags or its
+        published state change, without re-scoring every Entry that shares
+        its tags: the Entry's own related Entries are recomputed, and it's
+        added to (moved within, or dropped from) the other Entries' lists.
+
+        The other Entries' remaining scores aren't recomputed (the weights
+        of the tags it's on change a little), and an Entry it's dropped from
+        is left with a shorter list; ``manage.py rebuild_related_entries``
+        recomputes everything.
+
+        """
+        self.refresh([pk])
+        if not Entry.objects.filter(pk=pk, published=True).exists():
+            listed = self.filter(related_id=pk)
+            changed = list(listed.values_list('entry', flat=True))
+            listed.delete()
+            _related_changed(changed)
+            return
+
+        through = Entry.tags.through
+        limit = blargg_settings.get('related_entries_count', 5)
+        tag_ids = through.objects.filter(entry_id=pk).values_list('tag_id')
+        scores = dict(
+            through.objects.filter(
+                tag_id__in=tag_ids
+            ).exclude(entry_id=pk).values_list('entry_id').annotate(
+                score=Sum(_tag_weight(), output_field=FloatField())
+            )
+        )
+        # Entries that share its tags, or that listed it before.
+        pks = set(scores)
+        pks.update(self.filter(related_id=pk).values_list('entry', flat=True))
+        for chunk in _chunks(sorted(pks), 500):
+            current = defaultdict(list)
+            for row in self.filter(entry__in=chunk).values_list(
+                'entry', 'score', 'related'
+            ):
+                current[row[0]].append((round(row[1], 6), row[2]))
+
+            changed, rows = [], []
+            for other in chunk:
+                before = sorted(current[other], reverse=True)
+                related = [r for r in before if r[1] != pk]
+                if other in scores:
+                    related.append((round(scores[other], 6), pk))
+                related = sorted(related, reverse=True)[:limit]
+                if related != before:
+                    changed.append(other)
+                    rows.extend(
+                        self.model(entry_id=other, related_id=r, score=n)
+                        for n, r in related
+                    )
+            try:
+                with transaction.atomic():
+                    self._replace(changed, rows)
+            except IntegrityError:
+                # Refreshed concurrently; start these over (with locks).
+                self.refresh(changed)
+
+    def _replace(self, pks, rows):
+        """Replaces the related ``Entry``s of the ``Entry``s with the given
+        ids with new rows, and bumps the Entries' ``updated_on`` (their pages
+        show them)."""
+        self.filter(entry__in=pks).delete()
+        self.bulk_create(rows, batch_size=500)
+        _related_changed(pks)
+
+    def refresh_tagged(self, pks, tag_ids):
+        """Recomputes the related ``Entry``s of the ``Entry``s with the given
+        ids and of every ``Entry`` tagged with any of the given ``Tag``s;
+        i.e. of those whose related Entries may change when the tags (or the
+        published state) of the former change."""
+        through = Entry.tags.through
+        tagged = through.objects.filter(tag_id__in=list(tag_ids))
+        pks = set(pks)
+        pks.update(tagged.values_list('entry_id', flat=True))
+        self.refresh(pks)
+
+    def rebuild(self):
+        """Recomputes the related ``Entry``s of every ``Entry``."""
+        self.refresh(Entry.objects.values_list('pk', flat=True))
+
+
+def _tag_weight():
+    """The weight of a tag in a related ``Entry``'s score: tags used by fewer
+    published Entries count for more. Used on the tags' through table."""
+    return ExpressionWrapper(
+        Value(1.0) / (F('tag__entry_count') + Value(1)),
+        output_field=FloatField()
+    )
+
+
+def _related_changed(pks):
+    """Bumps the ``updated_on`` of ``Entry``s whose related Entries changed,
+    so their pages' ETags change and they're re-exported."""
+    if pks:
+        Entry.objects.filter(pk__in=pks).update(updated_on=utc_now())
+
+
+class RelatedEntry(models.Model):
+    """A published ``Entry`` that's related to an ``Entry`` by the tags they
+    share. Each ``Entry`` keeps its (at most ``related_entries_count``) most
+    related Entries; see ``RelatedEntryManager.refresh``."""
+    entry = models.ForeignKey(
+        Entry,
+        related_name='related_entries',
+        on_delete=models.CASCADE
+    )
+    related = models.ForeignKey(
+        Entry,
+        related_name='+',
+        on_delete=models.CASCADE
+    )
+    score = models.FloatField(
+        help_text="The sum, over the shared tags, of 1 / (1 + the number of "
+                  "published entries with the tag)."
+    )
+    created_on = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return u"{0} -> {1}".format(self.entry_id, self.related_id)
+
+    class Meta:
+        unique_together = ('entry', 'related')
+
+    objects = RelatedEntryManager()
+
+
+class ArchiveWordCountManager(models.Manager):
+
+    def add_counts(self, archive_date, counts):
+        """Adds a ``Counter`` of words (which may include negative counts) to
+        the year, month, and day rollups that include ``archive_date``."""
+        if archive_date is None:
+            return
+        for year, month, day in _archive_periods(archive_date):
+            self.add_period_counts(year, month, day, counts)
+
+    def add_period_counts(self, year, month, day, counts):
+        """Adds a ``Counter`` of words (which may include negative counts) to
+        a single period's rollup."""
+        counts = dict((w, c) for w, c in counts.items() if c)
+        if not counts:
+            return
+
+        # Group the words by their change, so each group is a single UPDATE.
+        by_delta = {}
+        for word, delta in counts.items():
+            by_delta.setdefault(delta, []).append(word)
+
+        period = self.filter(year=year, month=month, day=day)
+        existing = set()
+        for words in _chunks(list(counts), 500):
+            words = period.filter(word__in=words)
+            existing.update(words.values_list('word', flat=True))
+        for delta, words in by_delta.items():
+            words = [w for w in words if w in existing]
+            for chunk in _chunks(words, 500):
+                period.filter(word__in=chunk).update(count=F('count') + delta)
+        new = dict(
+            (w, c) for w, c in counts.items() if w not in existing and c > 0
+        )
+        try:
+            with transaction.atomic():
+                self.bulk_create([
+                    self.model(
+                        year=year, month=month, day=day, word=w, count=c
+                    )
+                    for w, c in new.items()
+                ], batch_size=500)
+        except IntegrityError:
+            # Someone else just added some of these words; add to theirs.
+            for word, count in new.items():
+                self._add_word(period, year, month, day, word, count)
+        period.filter(count__lte=0).delete()
+
+    def _add_word(self, period, year, month, day, word, count):
+        """Adds ``count`` to a single word in a period's rollup, creating it
+        if it's missing."""
+        updated = period.filter(word=word).update(count=F('count') + count)
+        if not updated:
+            try:
+                with transaction.atomic():
+                    self.create(
+                        year=year, month=month, day=day, word=word, count=count
+                    )
+            except IntegrityError:
+                period.filter(word=word).update(count=F('count') + count)
+
+    def stats(self, year, month=0, day=0, top_n=10):
+        """Returns stats for the given archive period. A ``month`` or ``day``
+        of zero rolls up the whole year (or month)."""
+        counts = self.filter(year=year, month=month, day=day)
+        return {
+            "total_words": counts.count(),
+            "most_common": list(
+                counts.order_by('-count', 'word').values_list('word', 'count')
+                [:top_n]
+            ),
+        }
+
+
+class ArchiveWordCount(models.Model):
+    """Word counts for all published ``Entry``s in a year, month, or day.
+    Rollups for a whole year (or month) have a ``month`` (or ``day``) of 0."""
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField(default=0)
+    day = models.PositiveSmallIntegerField(default=0)
+    word = models.CharField(max_length=64)
+    count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return self.word
+
+    class Meta:
+        unique_together = ('year', 'month', 'day', 'word')
+
+    objects = ArchiveWordCountManager()
+
+
+class ArchiveDateManager(models.Manager):
+
+    def add_entries(self, archive_date, count):
+        """Adds ``count`` (which may be negative) to the number of entries in
+        the year, month, and day that include ``archive_date``."""
+        if archive_date is None or not count:
+            return
+
+        for year, month, day in _archive_periods(archive_date):
+            period = self.filter(year=year, month=month, day=day)
+            updated = period.update(entry_count=F('entry_count') + count)
+            if not updated and count > 0:
+                try:
+                    with transaction.atomic():
+                        self.create(
+                            year=year, month=month, day=day, entry_count=count
+                        )
+                except IntegrityError:
+                    # Someone else just added the period.
+                    period.update(entry_count=F('entry_count') + count)
+            period.filter(entry_count__lte=0).delete()
+        bump_generation_on_commit('calendar')
+
+    def rebuild(self, archive_dates):
+        """Replaces the calendar with the counts in a dict that maps archive
+        dates to their number of entries."""
+        counts = Counter()
+        for archive_date, count in archive_dates.items():
+            if archive_date is not None:
+                for period in _archive_periods(archive_date):
+                    counts[period] += count
+
+        self.all().delete()
+        self.bulk_create([
+            self.model(year=year, month=month, day=day, entry_count=count)
+            for (year, month, day), count in counts.items() if count > 0
+        ], batch_size=500)
+        bump_generation_on_commit('calendar')
+
+    def years(self):
+        """Returns ``(year, entry_count)`` tuples for the years that have
+        entries, latest first."""
+        years = self.filter(month=0, day=0, entry_count__gt=0)
+        return list(
+            years.order_by('-year').values_list('year', 'entry_count')
+        )
+
+    def entry_count(self, year, month=0, day=0):
+        """Returns the number of entries in a year, month or day."""
+        counts = self.filter(year=year, month=month, day=day)
+        return counts.values_list('entry_count', flat=True).first() or 0
+
+    def date_list(self, year, month=0):
+        """Returns the months of a year (or the days of a month) that have
+        entries, as dates."""
+        if month:
+            periods = self.filter(year=year, month=month, day__gt=0)
+        else:
+            periods = self.filter(year=year, month__gt=0, day=0)
+        periods = periods.filter(entry_count__gt=0).order_by('month', 'day')
+        return [
+            date(y, m, d or 1)
+            for y, m, d in periods.values_list('year', 'month', 'day')
+        ]
+
+    def adjacent(self, year, month=0, day=0, previous=False):
+        """Returns the first day of the next (or ``previous``) year, month, or
+        day (whichever the given period is) that has entries, or ``None``."""
+        lookup = '__lt' if previous else '__gt'
+        after = models.Q(**{'year' + lookup: year})
+        if month:
+            after |= models.Q(year=year, **{'month' + lookup: month})
+        if day:
+            after |= models.Q(year=year, month=month, **{'day' + lookup: day})
+
+        periods = self.filter(after, entry_count__gt=0)
+        if day:
+            periods = periods.filter(day__gt=0)
+        elif month:
+            periods = periods.filter(month__gt=0, day=0)
+        else:
+            periods = periods.filter(month=0, day=0)
+
+        ordering = ['year', 'month', 'day']
+        if previous:
+            ordering = ['-' + field for field in ordering]
+        period = periods.order_by(*ordering).values_list(
+            'year', 'month', 'day'
+        ).first()
+        if period is None:
+            return None
+        y, m, d = period
+        return date(y, m or 1, d or 1)
+
+
+class ArchiveDate(models.Model):
+    """A calendar of the number of published ``Entry``s in each year, month,
+    and day; the archive views read their date lists and navigation from this.
+    Rows for a whole year (or month) have a ``month`` (or ``day``) of 0."""
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField(default=0)
+    day = models.PositiveSmallIntegerField(default=0)
+    entry_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return u"{0}-{1:02d}-{2:02d}".format(self.year, self.month, self.day)
+
+    class Meta:
+        unique_together = ('year', 'month', 'day')
+
+    objects = ArchiveDateManager()
+
+
+class QueuedMailManager(models.Manager):
+
+    def _queued(self, message, entry=None):
+        """An unsaved ``QueuedMail`` for an ``EmailMessage``."""
+        html = [
+            content for content, mimetype in
+            getattr(message, 'alternatives', [])
+            if mimetype == 'text/html'
+        ]
+        return self.model(
+            entry=entry,
+            subject=message.subject,
+            body=message.body,
+            html=html[0] if html else '',
+            from_email=message.from_email,
+            recipients=u"\n".join(message.recipients()),
+            next_attempt_on=utc_now(),
+        )
+
+    def queue(self, message, entry=None):
+        """Queues an ``EmailMessage`` (with an optional HTML alternative) to
+        be sent by ``send_queued_mail``."""
+        mail = self._queued(message, entry=entry)
+        mail.save(force_insert=True)
+        return mail
+
+    def queue_many(self, messages):
+        """Queues ``(message, entry)`` pairs (see ``queue``) with a single
+        insert per 500 messages."""
+        return self.bulk_create(
+            [self._queued(message, entry) for message, entry in messages],
+            batch_size=500
+        )
+
+
+class QueuedMail(models.Model):
+    """An email waiting to be sent (or retried) by ``send_queued_mail``; e.g.
+    an ``Entry`` cross-posted by Mail2Blogger."""
+    STATUS_QUEUED = 'queued'
+    STATUS_SENDING = 'sending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = (
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_SENDING, 'Sending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    )
+
+    entry = models.ForeignKey(
+        Entry,
+        related_name='queued_mail',
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL
+    )
+    subject = models.CharField(max_length=256)
+    body = models.TextField(blank=True)
+    html = models.TextField(blank=True)
+    from_email = models.CharField(max_length=256)
+    recipients = models.TextField(help_text="One address per line.")
+    status = models.CharField(
+        max_length=8,
+        choices=STATUS_CHOICES,
+        default=STATUS_QUEUED
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_on = models.DateTimeField()
+    last_error = models.TextField(blank=True)
+    created_on = models.DateTimeField(auto_now_add=True)
+    # When a ``send_mail_queue`` worker claimed this message to send it.
+    claimed_on = models.DateTimeField(blank=True, null=True)
+    sent_on = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return self.subject
+
+    class Meta:
+        # Matches the queries for mail that's due.
+        index_together = [('status', 'next_attempt_on')]
+        verbose_name = 'Queued Mail'
+        verbose_name_plural = 'Queued Mail'
+
+    objects = QueuedMailManager()
+
+    def message(self, connection=None):
+        """Builds the ``EmailMultiAlternatives`` for this mail."""
+        msg = EmailMultiAlternatives(
+            self.subject,
+            self.body,
+            self.from_email,
+            self.recipients.split(u"\n"),
+            connection=connection
+        )
+        if self.html:
+            msg.attach_alternative(self.html, "text/html")
+        return msg
+
+
+def _archive_periods(archive_date):
+    """The ``(year, month, day)`` keys of the year, month, and day rollups
+    that include an archive date."""
+    y, m, d = archive_date.year, archive_date.month, archive_date.day
+    return [(y, 0, 0), (y, m, 0), (y, m, d)]
+
+
+def _archive_date(published, published_on):
+    """The local date of the archive day for a published datetime."""
+    if not (published and published_on):
+        return None
+    if settings.USE_TZ:
+        published_on = localtime(published_on, get_default_timezone())
+    return published_on.date()
+
+
+def _chunks(items, size):
+    """Split a list into lists of (at most) ``size`` items; handy for keeping
+    ``__in`` lookups under the database's parameter limit."""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def update_word_counts(entry):
+    """Stores the word counts for an ``Entry``, and moves its contribution to
+    the archive rollups (and calendar) if its words or its archive date have
+    changed. This waits until the ``Entry``'s content has been rendered."""
+    if entry.render_status != Entry.RENDER_DONE:
+        return
+
+    new_counts = count_words(entry.rendered_content)
+    new_date = entry._get_archive_date()
+    old_date = entry.archive_date
+
+    with transaction.atomic():
+        old_counts = Counter(dict(
+            entry.word_counts.values_list('word', 'count')
+        ))
+        if new_counts != old_counts:
+            entry.word_counts.all().delete()
+            EntryWordCount.objects.bulk_create([
+                EntryWordCount(entry=entry, word=w, count=c)
+                for w, c in new_counts.items()
+            ], batch_size=500)
+
+        if new_date == old_date:
+            delta = Counter(new_counts)
+            delta.subtract(old_counts)
+            ArchiveWordCount.objects.add_counts(new_date, delta)
+        else:
+            retracted = Counter(dict((w, -c) for w, c in old_counts.items()))
+            ArchiveWordCount.objects.add_counts(old_date, retracted)
+            ArchiveWordCount.objects.add_counts(new_date, new_counts)
+            ArchiveDate.objects.add_entries(old_date, -1)
+            ArchiveDate.objects.add_entries(new_date, 1)
+            Entry.objects.filter(pk=entry.pk).update(archive_date=new_date)
+            entry.archive_date = new_date
+
+
+def move_archives(entries):
+    """Moves the words (and calendar counts) of a ``QuerySet`` of ``Entry``s
+    to the archive dates their published state now calls for. This is the
+    set-based equivalent of ``update_word_counts`` for Entries whose content
+    hasn't changed; Entries are moved a date at a time."""
+    rows = entries.rendered().values_list(
+        'pk', 'published', 'published_on', 'archive_date'
+    )
+    moves = defaultdict(list)
+    for pk, published, published_on, old_date in rows:
+        new_date = _archive_date(published, published_on)
+        if new_date != old_date:
+            moves[(old_date, new_date)].append(pk)
+
+    with transaction.atomic():
+        for (old_date, new_date), pks in moves.items():
+            counts = Counter()
+            for chunk in _chunks(pks, 500):
+                totals = EntryWordCount.objects.filter(entry__in=chunk).values(
+                    'word'
+                ).annotate(total=Sum('count')).values_list('word', 'total')
+                counts.update(dict(totals))
+            retracted = Counter(dict((w, -c) for w, c in counts.items()))
+            ArchiveWordCount.objects.add_counts(old_date, retracted)
+            ArchiveWordCount.objects.add_counts(new_date, counts)
+            ArchiveDate.objects.add_entries(old_date, -len(pks))
+            ArchiveDate.objects.add_entries(new_date, len(pks))
+            for chunk in _chunks(pks, 500):
+                moved = Entry.objects.filter(pk__in=chunk)
+                moved.update(archive_date=new_date)
+
+
+def _entries_changed(pks):
+    """Updates what's derived from the published state of some ``Entry``s
+    (given by their ids) after a bulk (un)publish: the archives, their tags'
+    counts, related Entries, and anything cached from published Entries."""
+    for chunk in _chunks(pks, 500):
+        chunk_entries = Entry.objects.filter(pk__in=chunk)
+        move_archives(chunk_entries)
+        tags = Tag.objects.filter(entry__in=chunk)
+        Tag.objects.update_counts(tags)
+        RelatedEntry.objects.refresh_tagged(
+            chunk, tags.values_list('pk', flat=True)
+        )
+    bump_generation_on_commit('entries')
+
+
+def rebuild_word_counts(chunk_size=500, processes=None):
+    """Throws away and then re-calculates all of the stored word counts (and
+    the archive calendar).
+
+    Entries are read in chunks of ``chunk_size`` and their words are counted
+    in a pool of ``processes`` worker processes (see ``stats.map_chunks``);
+    each chunk's per-period rollups are added to the stored ones as it
+    arrives, so only a chunk's counts are held in memory at a time.
+
+    """
+    rows = Entry.objects.rendered().values_list(
+        'pk', 'rendered_content', 'published', 'published_on'
+    )
+    entry_counts = Counter()
+
+    with transaction.atomic():
+        ArchiveWordCount.objects.all().delete()
+        EntryWordCount.objects.all().delete()
+
+        chunks = iter_chunks(rows, chunk_size)
+        for chunk, counted in map_chunks(count_rows, chunks, processes):
+            word_counts = []
+            rollups = defaultdict(Counter)
+            archive_dates = defaultdict(list)
+            for row, counts in zip(chunk, counted):
+                pk, content, published, published_on = row
+                word_counts.extend(
+                    EntryWordCount(entry_id=pk, word=w, count=c)
+                    for w, c in counts.items()
+                )
+                d = _archive_date(published, published_on)
+                archive_dates[d].append(pk)
+                if d is not None:
+                    for period in _archive_periods(d):
+                        rollups[period].update(counts)
+            EntryWordCount.objects.bulk_create(word_counts, batch_size=500)
+
+            for (year, month, day), counts in rollups.items():
+                ArchiveWordCount.objects.add_period_counts(
+                    year, month, day, counts
+                )
+            for d, pks in archive_dates.items():
+                Entry.objects.filter(pk__in=pks).update(archive_date=d)
+                entry_counts[d] += len(pks)
+        ArchiveDate.objects.rebuild(dict(entry_counts))
+    # Invalidate any cached stats.
+    bump_generation_on_commit('stats')
+
+
+def rebuild_summaries(chunk_size=500):
+    """Re-calculates the stored ``excerpt``, ``word_count`` and
+    ``reading_time`` of every rendered ``Entry`` (e.g. after changing the
+    ``excerpt_words`` or ``words_per_minute`` settings)."""
+    excerpt_words = blargg_settings.get('excerpt_words', 20)
+    words_per_minute = blargg_settings.get('words_per_minute', 200)
+    rows = Entry.objects.rendered().values_list('pk', 'rendered_content')
+    for chunk in iter_chunks(rows, chunk_size):
+        with transaction.atomic():
+            for pk, content in chunk:
+                excerpt, word_count, reading_time = summarize(
+                    content, excerpt_words, words_per_minute
+                )
+                Entry.objects.filter(pk=pk).update(
+                    excerpt=excerpt,
+                    word_count=word_count,
+                    reading_time=reading_time
+                )
+
+
+def render_queued_entry(pk):
+    """Renders an ``Entry`` whose rendering was queued by ``Entry.save``; this
+    is what the ``render_entries`` command's workers run. Returns True if the
+    ``Entry`` was rendered.
+
+    The entry is claimed by moving it from pending to rendering (or, for an
+    entry that's shown while it's re-rendered, by clearing ``render_queued``),
+    so no two workers render the same entry. If it's saved again while it's
+    being rendered, it's queued once more and this render is thrown away.
+
+    """
+    now = utc_now()
+    claimed = Entry.objects.filter(
+        pk=pk,
+        render_status=Entry.RENDER_PENDING
+    ).update(render_status=Entry.RENDER_RENDERING, render_claimed_on=now)
+    if claimed:
+        mine = models.Q(render_status=Entry.RENDER_RENDERING)
+    else:
+        claimed = Entry.objects.filter(
+            pk=pk,
+            render_status=Entry.RENDER_DONE,
+            render_queued=True
+        ).update(render_queued=False, render_claimed_on=now)
+        mine = models.Q(
+            render_status=Entry.RENDER_DONE,
+            render_queued=False,
+            render_claimed_on=now
+        )
+    if not claimed:
+        return False
+
+    entry = Entry.objects.get(pk=pk)
+    try:
+        entry._render_content()
+        entry._summarize()
+    except Exception:
+        # Entries that are already shown keep their old content; their claim
+        # is left for ``requeue_entries`` to find.
+        logger.exception("Failed to render Entry %s", pk)
+        Entry.objects.filter(
+            pk=pk,
+            render_status=Entry.RENDER_RENDERING
+        ).update(render_status=Entry.RENDER_FAILED)
+        return False
+
+    rendered = Entry.objects.filter(mine, pk=pk).update(
+        rendered_content=entry.rendered_content,
+        excerpt=entry.excerpt,
+        word_count=entry.word_count,
+        reading_time=entry.reading_time,
+        render_status=Entry.RENDER_DONE,
+        render_claimed_on=None,
+        updated_on=utc_now()
+    )
+    if rendered:
+        entry.render_status = Entry.RENDER_DONE
+        update_word_counts(entry)
+        if entry.published:
+            bump_generation_on_commit('entries')
+    return bool(rendered)
+
+
+def _stale_claims(field):
+    """Matches claims (in the given ``DateTimeField``) made more than
+    ``claim_timeout`` seconds ago, or that weren't recorded."""
+    timeout = blargg_settings.get('claim_timeout', 3600)
+    cutoff = utc_now() - timedelta(seconds=timeout)
+    return (
+        models.Q(**{field + '__lt': cutoff}) |
+        models.Q(**{field + '__isnull': True})
+    )
+
+
+def requeue_entries():
+    """Puts ``Entry``s that failed to render, or whose worker claimed them
+    more than ``claim_timeout`` seconds ago (and presumably died or failed),
+    back in the render queue; Entries that a live worker is rendering are
+    left alone. Returns the number of Entries re-queued."""
+    stale = models.Q(render_status=Entry.RENDER_FAILED) | (
+        models.Q(render_status=Entry.RENDER_RENDERING) &
+        _stale_claims('render_claimed_on')
+    )
+    count = Entry.objects.filter(stale).update(
+        render_status=Entry.RENDER_PENDING
+    )
+    # Entries that are shown while they're re-rendered.
+    stale = _stale_claims('render_claimed_on') & models.Q(
+        render_claimed_on__isnull=False
+    )
+    count += Entry.objects.filter(
+        stale,
+        render_status=Entry.RENDER_DONE,
+        render_queued=False
+    ).update(render_queued=True)
+    return count
+
+
+def send_queued_mail(batch_size=100):
+    """Sends the ``QueuedMail`` that's due, over a single connection; this is
+    what the ``send_mail_queue`` command runs. Returns the number of messages
+    sent and the number that failed.
+
+    Each message is claimed by moving it from queued to sending, so no two
+    workers send the same message. A message that fails is retried later,
+    waiting twice as long after each attempt (from the ``mail_retry_delay``
+    setting), until it has failed ``mail_max_attempts`` times.
+
+    """
+    due = QueuedMail.objects.filter(
+        status=QueuedMail.STATUS_QUEUED,
+        next_attempt_on__lte=utc_now()
+    ).order_by('next_attempt_on', 'pk')
+    claimed = []
+    for pk in due.values_list('pk', flat=True)[:batch_size]:
+        if QueuedMail.objects.filter(
+            pk=pk,
+            status=QueuedMail.STATUS_QUEUED
+        ).update(status=QueuedMail.STATUS_SENDING, claimed_on=utc_now()):
+            claimed.append(pk)
+    if not claimed:
+        return 0, 0
+
+    sent = failed = 0
+    connection = get_connection()
+    try:
+        connection.open()
+        for mail in QueuedMail.objects.filter(pk__in=claimed):
+            try:
+                mail.message(connection=connection).send()
+            except Exception as e:
+                _retry_mail(mail, e)
+                failed += 1
+            else:
+                QueuedMail.objects.filter(pk=mail.pk).update(
+                    status=QueuedMail.STATUS_SENT,
+                    attempts=F('attempts') + 1,
+                    sent_on=utc_now()
+                )
+                sent += 1
+    except Exception as e:
+        # Couldn't connect: retry everything that wasn't sent.
+        unsent = QueuedMail.objects.filter(
+            pk__in=claimed,
+            status=QueuedMail.STATUS_SENDING
+        )
+        for mail in unsent:
+            _retry_mail(mail, e)
+            failed += 1
+    finally:
+        connection.close()
+    return sent, failed
+
+
+def _retry_mail(mail, error):
+    """Puts a message that couldn't be sent back in the queue (with a longer
+    wait), or gives up on it once it's been tried too many times."""
+    attempts = mail.attempts + 1
+    max_attempts = blargg_settings.get('mail_max_attempts', 5)
+    delay = blargg_settings.get('mail_retry_delay', 60) * 2 ** (attempts - 1)
+    if attempts >= max_attempts:
+        logger.error("Giving up sending %r: %s", mail.subject, error)
+        status = QueuedMail.STATUS_FAILED
+    else:
+        logger.warning("Failed to send %r: %s", mail.subject, error)
+        status = QueuedMail.STATUS_QUEUED
+    QueuedMail.objects.filter(pk=mail.pk).update(
+        status=status,
+        attempts=attempts,
+        next_attempt_on=utc_now() + timedelta(seconds=delay),
+        last_error=force_text(error)
+    )
+
+
+def requeue_mail():
+    """Puts ``QueuedMail`` that failed, or whose worker claimed it more than
+    ``claim_timeout`` seconds ago (and presumably died), back in the queue to
+    be sent right away; messages that a live worker is sending are left
+    alone. Returns the number of messages re-queued."""
+    stale = models.Q(status=QueuedMail.STATUS_FAILED) | (
+        models.Q(status=QueuedMail.STATUS_SENDING) &
+        _stale_claims('claimed_on')
+    )
+    return QueuedMail.objects.filter(stale).update(
+        status=QueuedMail.STATUS_QUEUED,
+        attempts=0,
+        next_attempt_on=utc_now()
+    )
+
+
 @receiver(post_save, sender=Entry, dispatch_uid='generate-entry-tags')
+@timed('signal.generate_entry_tags')
 def generate_entry_tags(sender, instance, created, raw, using, **kwargs):
     """Generate the M2M ``Tag``s for an ``Entry`` right after it has
-    been saved."""
-    Tag.objects.create_tags(instance)
+    been saved. If its tags or its published state changed (and it is, or
+    was, published), update the counts for its (new and old) ``Tag``s and
+    its related ``Entry``s (see ``RelatedEntryManager.entry_changed``)."""
+    added, removed = Tag.objects.create_tags(instance)
+
+    was_published = False if created else instance._was_published
+    if instance.published or was_published is not False:
+        if added or removed or instance.published != was_published:
+            tags = Tag.objects.filter(
+                models.Q(entry__pk=instance.pk) | models.Q(pk__in=removed)
+            )
+            Tag.objects.update_counts(tags)
+            RelatedEntry.objects.entry_changed(instance.pk)
+    elif added or removed:
+        # Only this draft's own related Entries change.
+        RelatedEntry.objects.refresh([instance.pk])
 
 
-def entry_stats(entries, top_n=10):
-    """Calculates stats for the given ``QuerySet`` of ``Entry``s."""
+@receiver(post_save, sender=Entry, dispatch_uid='update-entry-word-counts')
+@timed('signal.update_entry_word_counts')
+def update_entry_word_counts(sender, instance, created, raw, using, **kwargs):
+    """Keep the stored word counts in sync whenever an ``Entry`` is saved."""
+    update_word_counts(instance)
+
+
+@receiver(pre_delete, sender=Entry, dispatch_uid='retract-entry-word-counts')
+@timed('signal.retract_entry_word_counts')
+def retract_entry_word_counts(sender, instance, using, **kwargs):
+    """Remove a deleted ``Entry``'s words from the archive rollups, and the
+    ``Entry`` from the archive calendar."""
+    counts = instance.word_counts.values_list('word', 'count')
+    retracted = Counter(dict((w, -c) for w, c in counts))
+    ArchiveWordCount.objects.add_counts(instance.archive_date, retracted)
+    ArchiveDate.objects.add_entries(instance.archive_date, -1)
+
+
+@receiver(post_save, sender=Entry, dispatch_uid='invalidate-public-entries')
+@timed('signal.invalidate_public_entries')
+def invalidate_public_entries(sender, instance, created, raw, using, **kwargs):
+    """Saving an ``Entry`` that is (or was, until now) published changes the
+    public site; bump the ``'entries'`` generation to invalidate anything
+    cached from published ``Entry``s, like the feeds."""
+    was_published = False if created else instance._was_published
+    if instance.published or was_published is not False:
+        bump_generation_on_commit('entries')
 
-    wc = Counter()  # A Word counter
-    for content in entries.values_list("rendered_content", flat=True):
-        # Do a little cleanup
-        content = strip_tags(content)  # remove all html tags
-        content = re.sub('\s+', ' ', content)  # condense all whitespace
-        content = re.sub('[^A-Za-z ]+', '', content)  # remove non-alpha chars
-        wc.update(content.split())
 
+@receiver(post_delete, sender=Entry, dispatch_uid='invalidate-deleted-entry')
+@timed('signal.invalidate_deleted_entry')
+def invalidate_deleted_entry(sender, instance, using, **kwargs):
+    if instance.published:
+        bump_generation_on_commit('entries')
+
+
+@receiver(pre_delete, sender=Entry, dispatch_uid='remember-entry-tags')
+@timed('signal.remember_entry_tags')
+def remember_entry_tags(sender, instance, using, **kwargs):
+    """Note a deleted ``Entry``'s ``Tag``s, to recount them once it's gone,
+    and the Entries that list it as related."""
+    tag_ids = instance.tags.values_list('pk', flat=True)
+    instance._deleted_tag_ids = list(tag_ids)
+    listed = RelatedEntry.objects.filter(related=instance)
+    instance._listed_by = list(listed.values_list('entry', flat=True))
+
+
+@receiver(post_delete, sender=Entry, dispatch_uid='recount-entry-tags')
+@timed('signal.recount_entry_tags')
+def recount_entry_tags(sender, instance, using, **kwargs):
+    """Update the counts for a deleted ``Entry``'s ``Tag``s. Its rows in
+    other Entries' related Entries are deleted with it, so those Entries are
+    just marked as changed."""
+    tag_ids = getattr(instance, '_deleted_tag_ids', None)
+    if tag_ids:
+        Tag.objects.update_counts(Tag.objects.filter(pk__in=tag_ids))
+    _related_changed(getattr(instance, '_listed_by', None))
+
+
+@timed('stats')
+def entry_stats(entries, top_n=10):
+    """Calculates stats for the given ``QuerySet`` of ``Entry``s from their
+    stored word counts."""
+    counts = EntryWordCount.objects.filter(entry__in=entries).values('word')
+    counts = counts.annotate(total=Sum('count'))
     return {
-        "total_words": len(wc.values()),
-        "most_common": wc.most_common(top_n),
+        "total_words": counts.count(),
+        "most_common": [
+            (c['word'], c['total'])
+            for c in counts.order_by('-total', 'word')[:top_n]
+        ],
     }
@@ -0,0 +1,132 @@
+"""
+Keyset (or "seek") pagination for lists of ``Entry``'s, newest first. Rather
+than skipping ``OFFSET`` rows and counting the whole list, each page starts
+from a cursor -- the ``(published_on, id)`` of the last ``Entry`` on the page
+before -- so every page costs the same as the first (one indexed query), and
+a page's contents don't shift when new Entries are published.
+
+Cursors are opaque strings for use in URLs (e.g. ``?cursor=...``); they also
+record which way the page goes, so there are cursors for the previous page
+too.
+
+"""
+import base64
+
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.encoding import force_bytes, force_text
+
+CURSOR_TIME_FORMAT = "%Y%m%d%H%M%S%f"
+
+
+def encode_cursor(value, pk, forward=True):
+    """Returns the cursor for the page after (or, unless ``forward``, before)
+    an object with the given date/time ``value`` and primary key."""
+    if settings.USE_TZ and timezone.is_aware(value):
+        value = value.astimezone(timezone.utc)
+    raw = "{0}{1}.{2}".format(
+        'n' if forward else 'p', value.strftime(CURSOR_TIME_FORMAT), pk
+    )
+    return force_text(base64.urlsafe_b64encode(force_bytes(raw)).rstrip(b'='))
+
+
+def decode_cursor(cursor):
+    """Returns the ``(forward, value, pk)`` in a cursor. Raises ``ValueError``
+    if it isn't a valid cursor."""
+    try:
+        cursor = force_bytes(cursor)
+        raw = force_text(
+            base64.urlsafe_b64decode(cursor + b'=' * (-len(cursor) % 4))
+        )
+        direction, raw = raw[:1], raw[1:]
+        value, pk = raw.split('.')
+        value = datetime.strptime(value, CURSOR_TIME_FORMAT)
+        pk = int(pk)
+    except (TypeError, ValueError, UnicodeError):
+        raise ValueError("Invalid cursor: {0!r}".format(cursor))
+    if direction not in ('n', 'p'):
+        raise ValueError("Invalid cursor: {0!r}".format(cursor))
+    if settings.USE_TZ:
+        value = timezone.make_aware(value, timezone.utc)
+    return direction == 'n', value, pk
+
+
+class KeysetPage(object):
+    """A page of objects, with cursors for the pages either side. Like
+    Django's ``Page``, but without page numbers (or a count)."""
+
+    def __init__(self, object_list, has_next, has_previous, field):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.field = field
+
+    def __repr__(self):
+        return '<KeysetPage of {0} objects>'.format(len(self.object_list))
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    def _cursor(self, obj, forward):
+        return encode_cursor(getattr(obj, self.field), obj.pk, forward)
+
+    @property
+    def next_cursor(self):
+        if self._has_next and self.object_list:
+            return self._cursor(self.object_list[-1], forward=True)
+
+    @property
+    def previous_cursor(self):
+        if self._has_previous and self.object_list:
+            return self._cursor(self.object_list[0], forward=False)
+
+
+def keyset_page(queryset, cursor, per_page, field='published_on'):
+    """Returns the ``KeysetPage`` of (at most) ``per_page`` objects from a
+    queryset, newest (by ``field``, then primary key) first, that starts at a
+    cursor (or at the start, if ``cursor`` is empty). ``field`` should not be
+    null. Raises ``ValueError`` for an invalid cursor."""
+    original = queryset
+    forward, value, pk = True, None, None
+    if cursor:
+        forward, value, pk = decode_cursor(cursor)
+
+    if forward:
+        queryset = queryset.order_by('-' + field, '-pk')
+        if cursor:
+            queryset = queryset.filter(
+                Q(**{field + '__lt': value}) |
+                Q(**{field: value, 'pk__lt': pk})
+            )
+    else:
+        queryset = queryset.order_by(field, 'pk').filter(
+            Q(**{field + '__gt': value}) |
+            Q(**{field: value, 'pk__gt': pk})
+        )
+
+    # One more than fits on the page tells us whether there's another page.
+    objects = list(queryset[:per_page + 1])
+    more = len(objects) > per_page
+    objects = objects[:per_page]
+    if forward:
+        return KeysetPage(objects, more, bool(cursor), field)
+    if len(objects) < per_page:
+        # Back past the start: show the (full) first page instead.
+        return keyset_page(original, None, per_page, field)
+    objects.reverse()
+    return KeysetPage(objects, True, more, field)
@@ -0,0 +1,175 @@
+"""
+Renderers for an ``Entry``'s content formats. The formats are listed in the
+``renderers`` setting, as ``(content_format, label, renderer)`` tuples, where
+``renderer`` is a ``Renderer`` class (or its dotted path):
+
+    BLARGG = {
+        'renderers': [
+            ('html', 'HTML', 'blargg.renderers.HTMLRenderer'),
+            ('rst', 'reStructured Text',
+             'blargg.renderers.RestructuredTextRenderer'),
+            ('md', 'Markdown (not yet supported)',
+             'blargg.renderers.MarkdownRenderer'),
+            ('tx', 'Textile', 'myproject.renderers.TextileRenderer'),
+        ],
+    }
+
+Nothing is imported until it's needed: a renderer (and the library behind
+it, like docutils) is imported the first time content in its format is
+rendered, so processes that never render reStructuredText never import
+docutils. Each process then keeps (and reuses) a single instance of each
+renderer. Renders are timed as ``'render.<content_format>'`` (see
+``blargg.instrumentation``).
+
+``Entry.content_format``'s choices (and so its migrations) don't change
+with this setting: ``Entry.clean`` and the admin accept the configured
+formats instead. Formats are at most 4 characters long (``MAX_FORMAT_LENGTH``);
+longer ones raise ``ImproperlyConfigured``.
+
+"""
+import importlib
+import threading
+
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+from .instrumentation import timed
+from .signals import blargg_settings
+
+DEFAULT_RENDERERS = [
+    ('html', 'HTML', 'blargg.renderers.HTMLRenderer'),
+    ('rst', 'reStructured Text',
+     'blargg.renderers.RestructuredTextRenderer'),
+    ('md', 'Markdown (not yet supported)',
+     'blargg.renderers.MarkdownRenderer'),
+]
+
+# The longest content format ``Entry.content_format`` can store.
+MAX_FORMAT_LENGTH = 4
+
+# This process's renderers, keyed on their class (or dotted path).
+_renderers = {}
+_lock = threading.Lock()
+
+
+def _import(module, name):
+    """Imports a renderer's library, or raises a ``RuntimeError`` saying
+    it needs to be installed."""
+    try:
+        return importlib.import_module(module)
+    except ImportError:
+        raise RuntimeError("Install {0} to publish {1}".format(
+            module.split('.')[0], name
+        ))
+
+
+class Renderer(object):
+    """Renders raw content to HTML. ``version`` identifies the renderer (and
+    the version of its library), and is part of the render cache key; if it's
+    ``None``, rendered content isn't cached. Renderers are shared by every
+    thread in a process."""
+    version = None
+
+    def render(self, raw_content):
+        raise NotImplementedError
+
+
+class HTMLRenderer(Renderer):
+    """HTML is used as-is."""
+
+    def render(self, raw_content):
+        return raw_content
+
+
+class RestructuredTextRenderer(Renderer):
+    """Renders reStructuredText with docutils' ``html4css1`` writer."""
+
+    def __init__(self):
+        self._publish_parts = None
+
+    @property
+    def version(self):
+        # Only the (small) top-level package is needed for its version.
+        docutils = _import('docutils', 'reStructuredText')
+        return "docutils-{0}".format(docutils.__version__)
+
+    def render(self, raw_content):
+        if self._publish_parts is None:
+            core = _import('docutils.core', 'reStructuredText')
+            self._publish_parts = core.publish_parts
+        doc_parts = self._publish_parts(
+            source=raw_content,
+            writer_name="html4css1"
+        )
+        return doc_parts['fragment']
+
+
+class MarkdownRenderer(Renderer):
+    """Renders Markdown. Each thread reuses a ``Markdown`` instance, rather
+    than building a new one for every render."""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    @property
+    def version(self):
+        markdown = _import('markdown', 'Markdown')
+        return "markdown-{0}".format(
+            getattr(markdown, '__version__', None) or
+            getattr(markdown, 'version', '')
+        )
+
+    def render(self, raw_content):
+        md = getattr(self._local, 'md', None)
+        if md is None:
+            md = self._local.md = _import('markdown', 'Markdown').Markdown()
+        md.reset()
+        return md.convert(raw_content)
+
+
+def get_renderers():
+    """The ``(content_format, label, renderer)`` tuples in the ``renderers``
+    setting."""
+    renderers = blargg_settings.get('renderers', DEFAULT_RENDERERS)
+    for fmt, label, path in renderers:
+        if len(fmt) > MAX_FORMAT_LENGTH:
+            raise ImproperlyConfigured(
+                "The {0!r} content format in the 'renderers' setting is "
+                "longer than {1} characters.".format(fmt, MAX_FORMAT_LENGTH)
+            )
+    return renderers
+
+
+def content_format_choices():
+    """Choices for ``Entry.content_format``; this doesn't import any of the
+    renderers."""
+    return tuple((fmt, label) for fmt, label, path in get_renderers())
+
+
+def get_renderer(content_format):
+    """Returns this process's instance of the renderer for a content format,
+    importing it the first time it's used; or ``None`` for an unknown
+    format."""
+    for fmt, label, path in get_renderers():
+        if fmt == content_format:
+            break
+    else:
+        return None
+    renderer = _renderers.get(path)
+    if renderer is None:
+        with _lock:
+            renderer = _renderers.get(path)
+            if renderer is None:
+                cls = path if callable(path) else import_string(path)
+                renderer = _renderers[path] = cls()
+    return renderer
+
+
+def render(content_format, raw_content):
+    """Renders content in a content format; content in an unknown format is
+    assumed to be HTML."""
+    renderer = get_renderer(content_format)
+    if renderer is None:
+        return raw_content
+    with timed('render.{0}'.format(content_format)):
+        return renderer.render(raw_content)
@@ -0,0 +1,118 @@
+"""
+Full-text search over published ``Entry``'s, without an external search
+service. The stored word counts (``EntryWordCount``) are already an inverted
+index -- the words of each Entry's tag-stripped content, as tokenized for
+``entry_stats``, kept up to date whenever an Entry is saved -- so a search
+only reads the postings for its words (through an index on ``word``), and
+publishing or unpublishing Entries changes the results straight away.
+
+Results contain every word in the query, and are ranked by tf-idf: the sum,
+over the words, of the times an Entry uses the word times how rare the word
+is (``log(1 + entries / entries using it)``).
+
+"""
+import math
+
+from django.db.models import Case, Count, F, FloatField, Sum, Value, When
+from django.db.models import ExpressionWrapper
+
+from .models import ArchiveDate, Entry, EntryWordCount
+from .stats import tokenize
+
+# Only the first few words of a query are searched for.
+SEARCH_MAX_TERMS = 10
+
+
+def search_terms(query):
+    """Returns the (distinct) words in a search query, as they're stored."""
+    terms = []
+    for word in tokenize(query):
+        if word not in terms:
+            terms.append(word)
+    return terms[:SEARCH_MAX_TERMS]
+
+
+def postings(terms, published=True):
+    """The ``EntryWordCount``s for some words; only those of published
+    Entries, unless ``published`` is false."""
+    words = EntryWordCount.objects.filter(word__in=terms)
+    if published:
+        words = words.filter(
+            entry__published=True,
+            entry__render_status=Entry.RENDER_DONE
+        )
+    return words
+
+
+def matching_entries(terms, published=True):
+    """A ``values`` queryset of the ids (as ``entry``) of the Entries that use
+    all of the words in ``terms``."""
+    return postings(terms, published).values('entry').annotate(
+        matches=Count('word')
+    ).filter(matches=len(terms)).values('entry')
+
+
+def rank_entries(terms):
+    """Returns a ``values`` queryset of the published Entries that use all of
+    the words in ``terms``, as ``{'entry': id, 'rank': tf-idf}`` dicts, best
+    first."""
+    if not terms:
+        return EntryWordCount.objects.none().values('entry')
+    words = postings(terms)
+    frequencies = dict(
+        words.values_list('word').annotate(Count('entry')).order_by()
+    )
+    if len(frequencies) < len(terms):
+        # Some words aren't used at all.
+        return EntryWordCount.objects.none().values('entry')
+
+    total = sum(count for year, count in ArchiveDate.objects.years())
+    rank = Case(*[
+        When(word=word, then=ExpressionWrapper(
+            F('count') * Value(math.log(1.0 + float(total) / frequency)),
+            output_field=FloatField()
+        ))
+        for word, frequency in frequencies.items()
+    ], default=Value(0.0), output_field=FloatField())
+    return words.values('entry').annotate(
+        matches=Count('word'),
+        rank=Sum(rank, output_field=FloatField()),
+    ).filter(matches=len(terms)).order_by('-rank', '-entry')
+
+
+class SearchResults(object):
+    """The published Entries that use all of the words in ``terms``, best
+    first. This reads (a page of) the ranked postings, then just the Entries
+    on that page, each with its ``search_rank``; use it as a ``Paginator``'s
+    object list."""
+
+    def __init__(self, terms):
+        self.terms = terms
+        self._ranked = None
+
+    @property
+    def ranked(self):
+        if self._ranked is None:
+            self._ranked = rank_entries(self.terms)
+        return self._ranked
+
+    def count(self):
+        return self.ranked.count()
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        rows = list(self.ranked[index])
+        entries = Entry.objects.with_related().without_content().in_bulk(
+            [row['entry'] for row in rows]
+        )
+        results = []
+        for row in rows:
+            entry = entries.get(row['entry'])
+            if entry is not None:
+                entry.search_rank = row['rank']
+                results.append(entry)
+        return results
@@ -5,6 +5,54 @@ Custom settings for django-blargg.
   cross-posted to Blogger.
 * ``mail2blogger_email`` -- the email address to which published entries are
   mailed.
+* ``mail_retry_delay`` -- seconds to wait before retrying a queued email that
+  couldn't be sent; this doubles after each attempt.
+* ``mail_max_attempts`` -- give up on a queued email after this many attempts.
+* ``claim_timeout`` -- seconds after which a worker's claim on an email it's
+  sending (or an entry it's rendering) is taken to be abandoned; ``--requeue``
+  only re-queues claims older than this.
+* ``cache`` -- the name of the Django cache (in ``CACHES``) used by blargg.
+* ``render_cache`` -- cache rendered reStructuredText & Markdown, so entries
+  are only re-rendered when their content changes.
+* ``render_cache_size`` -- the number of rendered entries each process keeps
+  in memory (in front of the Django cache).
+* ``render_cache_timeout`` -- how long rendered content stays in the Django
+  cache; ``None`` leaves it until the cache evicts it.
+* ``renderers`` -- the content formats, as ``(content_format, label,
+  renderer)`` tuples; renderers are imported when they're first used (see
+  ``blargg.renderers``). Content formats are at most 4 characters long.
+* ``async_render`` -- render content in the background rather than when an
+  entry is saved. New entries aren't shown until they've been rendered (edited
+  ones show their previous content until then), so you'll need to run
+  ``manage.py render_entries``.
+* ``excerpt_words`` -- the number of words in each entry's (plain text)
+  excerpt, which is shown in entry lists.
+* ``words_per_minute`` -- the reading speed for each entry's
+  ``reading_time``. Excerpts and reading times are stored when an entry is
+  saved; run ``manage.py rebuild_entry_stats`` after changing either.
+* ``entries_paginate_by`` -- the number of entries per page in entry lists.
+* ``tag_list_paginate_by`` -- the number of tags per page in the tag list.
+* ``tag_list_cache_timeout`` -- cache the tag list pages for this many
+  seconds (they're invalidated whenever tag counts change); 0 disables this.
+* ``entry_detail_cache_timeout`` -- cache entry pages for this many seconds
+  (they're invalidated whenever the entry is saved); 0 disables this.
+* ``feed_items`` -- the number of entries in the RSS & Atom feeds.
+* ``feed_cache_timeout`` -- cache the generated feeds for this many seconds
+  (they're invalidated whenever an entry is published, edited or
+  unpublished); 0 disables this.
+* ``stats_cache_timeout`` -- cache the archive stats for this many seconds
+  (they're recomputed whenever an entry in the archive period changes); 0
+  disables this.
+* ``related_entries_count`` -- the number of related entries kept for (and
+  shown with) each entry; run ``manage.py rebuild_related_entries`` after
+  changing this.
+* ``sitemap_limit`` -- the number of entries in each section of the sitemap.
+* ``export_paths`` -- paths of other pages (e.g. feeds) that
+  ``manage.py export_site`` exports every time it runs.
+* ``instrumentation`` -- time rendering, tag syncing, stats, signal handlers
+  and views' querysets (see ``blargg.instrumentation``).
+* ``instrumentation_hooks`` -- callables (or their dotted paths) that are
+  given each timing as ``hook(name, duration)``.
 
 """
 
@@ -12,4 +60,33 @@ Custom settings for django-blargg.
 BLARGG = {
     'mail2blogger': False,
     'mail2blogger_email': '',
+    'mail_retry_delay': 60,
+    'mail_max_attempts': 5,
+    'claim_timeout': 3600,
+    'cache': 'default',
+    'render_cache': True,
+    'render_cache_size': 128,
+    'render_cache_timeout': None,
+    'renderers': [
+        ('html', 'HTML', 'blargg.renderers.HTMLRenderer'),
+        ('rst', 'reStructured Text',
+         'blargg.renderers.RestructuredTextRenderer'),
+        ('md', 'Markdown (not yet supported)',
+         'blargg.renderers.MarkdownRenderer'),
+    ],
+    'async_render': False,
+    'excerpt_words': 20,
+    'words_per_minute': 200,
+    'entries_paginate_by': 10,
+    'tag_list_paginate_by': 100,
+    'tag_list_cache_timeout': 0,
+    'entry_detail_cache_timeout': 0,
+    'feed_items': 10,
+    'feed_cache_timeout': 3600,
+    'stats_cache_timeout': 86400,
+    'related_entries_count': 5,
+    'sitemap_limit': 1000,
+    'export_paths': [],
+    'instrumentation': False,
+    'instrumentation_hooks': ['blargg.instrumentation.log_timing'],
 }
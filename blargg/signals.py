@@ -3,6 +3,8 @@ from django.core.mail import EmailMultiAlternatives
 from django.dispatch import Signal, receiver
 from django.template.defaultfilters import striptags
 
+from .instrumentation import timed
+
 try:
     blargg_settings = settings.BLARGG
 except AttributeError:  # pragma: no cover
@@ -16,12 +18,29 @@ except AttributeError:  # pragma: no cover
 
 entry_published = Signal(providing_args=["entry"])
 
+# Sent (once) when a batch of ``Entry``s is published; e.g. by the bulk
+# publish action in the admin. ``entry_published`` isn't sent for these.
+entries_published = Signal(providing_args=["entries"])
+
 
 # -------------------
 # Signal Handlers
 # -------------------
 
+def _mail2blogger_message(entry, recipient):
+    """An HTML (and text-only) email cross-posting an ``Entry``."""
+    msg = EmailMultiAlternatives(
+        entry.title,  # Subject
+        striptags(entry.crossposted_content),  # Text-only
+        settings.DEFAULT_FROM_EMAIL,  # From
+        [recipient]  # List of Recipients
+    )
+    msg.attach_alternative(entry.crossposted_content, "text/html")
+    return msg
+
+
 @receiver(entry_published, dispatch_uid='blargg-mail2blogger')
+@timed('signal.mail2blogger')
 def mail2blogger(entry, **kwargs):
     """This signal handler cross-posts published ``Entry``'s to Blogger. For
     this to work, the following settings must be non-False; e.g.:
@@ -31,17 +50,23 @@ def mail2blogger(entry, **kwargs):
             'mail2blogger_email': 'user@example.com',
         }
 
+    The emails are queued, and sent by ``manage.py send_mail_queue``.
+
     """
+    mail2blogger_entries([entry])
+
+
+@receiver(entries_published, dispatch_uid='blargg-mail2blogger-entries')
+@timed('signal.mail2blogger_entries')
+def mail2blogger_entries(entries, **kwargs):
+    """Cross-posts a batch of published ``Entry``'s to Blogger (see
+    ``mail2blogger``)."""
+    from .models import QueuedMail
+
     enabled = blargg_settings.get('mail2blogger', False)
     recipient = blargg_settings.get('mail2blogger_email', None)
     if enabled and recipient:
-
-        # Send HTML (and text-only) email
-        msg = EmailMultiAlternatives(
-            entry.title,  # Subject
-            striptags(entry.crossposted_content),  # Text-only
-            settings.DEFAULT_FROM_EMAIL,  # From
-            [recipient]  # List of Recipients
+        QueuedMail.objects.queue_many(
+            (_mail2blogger_message(entry, recipient), entry)
+            for entry in entries
         )
-        msg.attach_alternative(entry.crossposted_content, "text/html")
-        msg.send(fail_silently=True)
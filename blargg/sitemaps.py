@@ -15,17 +15,145 @@ you'll need to configure your project's URL patters with something like:
         )
     )
 
+Sitemaps are split into sections of ``sitemap_limit`` entries; use
+``django.contrib.sitemaps.views.index`` to list them. The ``sitemap`` view in
+this module is a drop-in replacement for Django's that streams the XML, and
+the ``write_sitemaps`` command writes gzipped sitemap files to disk.
+
 """
+from xml.sax.saxutils import escape
+
 from django.contrib.sitemaps import Sitemap
+from django.contrib.sites.shortcuts import get_current_site
+from django.core.urlresolvers import reverse
+from django.core.paginator import InvalidPage, Paginator
+from django.http import Http404, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.functional import cached_property
+
 from .models import Entry
+from .signals import blargg_settings
+
+SITEMAP_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+)
+SITEMAP_FOOTER = '</urlset>\n'
+INDEX_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+)
+INDEX_FOOTER = '</sitemapindex>\n'
 
 
 class EntrySitemap(Sitemap):
     changefreq = "never"
     priority = 0.5
 
+    @property
+    def limit(self):
+        return blargg_settings.get('sitemap_limit', 1000)
+
+    @cached_property
+    def paginator(self):
+        # Django builds a new paginator (and counts the entries again) each
+        # time this is used.
+        return Paginator(self.items(), self.limit)
+
     def items(self):
-        return Entry.objects.filter(published=True)
+        # Only the columns needed for the sitemap, in a stable order so that
+        # each section always lists the same entries.
+        entries = Entry.objects.published().order_by('pk')
+        return entries.values('slug', 'updated_on')
+
+    def location(self, item):
+        # Build URLs from a single ``reverse``, rather than one per Entry.
+        if not hasattr(self, '_location_parts'):
+            placeholder = 'blargg-sitemap-slug'
+            url = reverse('blargg:entry_detail', args=[placeholder])
+            self._location_parts = url.split(placeholder)
+        return item['slug'].join(self._location_parts)
 
     def lastmod(self, obj):
-        return obj.updated_on
+        return obj['updated_on']
+
+    def iter_urls(self, page=1, site=None, protocol='http'):
+        """Like ``get_urls``, but yields ``(location, lastmod)`` tuples one at
+        a time, reading Entries from the database as it goes."""
+        domain = "{0}://{1}".format(protocol, site.domain)
+        for item in self.paginator.page(page).object_list.iterator():
+            yield domain + self.location(item), self.lastmod(item)
+
+
+def iter_sitemap_urls(sitemap, page=1, site=None, protocol='http'):
+    """Yields ``(location, lastmod)`` for a page of any ``Sitemap``."""
+    if hasattr(sitemap, 'iter_urls'):
+        return sitemap.iter_urls(page=page, site=site, protocol=protocol)
+    urls = sitemap.get_urls(page=page, site=site, protocol=protocol)
+    return ((url['location'], url['lastmod']) for url in urls)
+
+
+def iter_sitemap_xml(urls, changefreq=None, priority=None):
+    """Yields a sitemap's XML, a line at a time, for ``(location, lastmod)``
+    tuples."""
+    yield SITEMAP_HEADER
+    for location, lastmod in urls:
+        yield '<url><loc>{0}</loc>'.format(escape(location))
+        if lastmod is not None:
+            if timezone.is_aware(lastmod):
+                lastmod = timezone.localtime(lastmod)
+            yield '<lastmod>{0:%Y-%m-%d}</lastmod>'.format(lastmod)
+        if changefreq is not None:
+            yield '<changefreq>{0}</changefreq>'.format(changefreq)
+        if priority is not None:
+            yield '<priority>{0}</priority>'.format(priority)
+        yield '</url>\n'
+    yield SITEMAP_FOOTER
+
+
+def iter_index_xml(locations):
+    """Yields a sitemap index's XML for the given sitemap locations."""
+    yield INDEX_HEADER
+    for location in locations:
+        yield '<sitemap><loc>{0}</loc></sitemap>\n'.format(escape(location))
+    yield INDEX_FOOTER
+
+
+def sitemap(request, sitemaps, section=None):
+    """Streams a section of ``EntrySitemap``s (or a page of one; e.g.
+    ``?p=2``). Use it in place of ``django.contrib.sitemaps.views.sitemap``:
+
+        url(
+            r'^sitemap-(?P<section>.+)\\.xml$',
+            'blargg.sitemaps.sitemap',
+            {'sitemaps': sitemaps},
+            name='sitemaps'
+        )
+
+    """
+    if section not in sitemaps:
+        raise Http404("No sitemap available for section: %r" % section)
+    section_sitemap = sitemaps[section]
+    if callable(section_sitemap):
+        section_sitemap = section_sitemap()
+
+    try:
+        page = int(request.GET.get('p', 1))
+        section_sitemap.paginator.validate_number(page)
+    except (ValueError, InvalidPage):
+        raise Http404("Page %s empty" % request.GET.get('p'))
+
+    urls = iter_sitemap_urls(
+        section_sitemap,
+        page=page,
+        site=get_current_site(request),
+        protocol=request.scheme
+    )
+    xml = iter_sitemap_xml(
+        urls,
+        section_sitemap.changefreq,
+        section_sitemap.priority
+    )
+    response = StreamingHttpResponse(xml, content_type='application/xml')
+    response['X-Robots-Tag'] = 'noindex, noodp, noarchive'
+    return response
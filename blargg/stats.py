@@ -0,0 +1,134 @@
+"""
+Word counting for ``Entry`` stats. The tokenizer and the parallel helpers in
+this module don't touch the ORM, so they're safe to run in worker processes
+that haven't set up Django's app registry.
+
+"""
+import math
+import multiprocessing
+import re
+
+from collections import Counter, deque
+
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+
+try:
+    from html import unescape
+except ImportError:  # pragma: no cover
+    from HTMLParser import HTMLParser  # pragma: no cover
+    unescape = HTMLParser().unescape  # pragma: no cover
+
+# Same as the ``max_length`` of the ``word`` columns that store counts.
+WORD_MAX_LENGTH = 64
+
+# A word is a run of (unicode) letters, optionally joined by apostrophes, as
+# in "don't" or "l'été". Digits and underscores don't count as letters.
+WORD_RE = re.compile(u"[^\\W\\d_]+(?:['\u2019][^\\W\\d_]+)*", re.UNICODE)
+
+
+def tokenize(content):
+    """Returns the lower-cased words in some (html) content."""
+    text = unescape(strip_tags(content))
+    return [
+        w.lower() for w in WORD_RE.findall(text)
+        if len(w) <= WORD_MAX_LENGTH
+    ]
+
+
+def count_words(content):
+    """Returns a ``Counter`` of the words in some (html) content."""
+    return Counter(tokenize(content))
+
+
+def summarize(content, excerpt_words=20, words_per_minute=200):
+    """Returns a plain-text excerpt of (at most ``excerpt_words`` words from)
+    some (html) content, the number of words in it, and the minutes it takes
+    to read at ``words_per_minute``."""
+    text = ' '.join(unescape(strip_tags(content)).split())
+    word_count = len(tokenize(content))
+    reading_time = int(math.ceil(word_count / float(words_per_minute)))
+    return Truncator(text).words(excerpt_words), word_count, reading_time
+
+
+def count_rows(rows):
+    """Counts the words for a chunk of rows whose second item is content;
+    returns a list of ``Counter``s in the same order."""
+    return [count_words(row[1]) for row in rows]
+
+
+def iter_chunks(queryset, chunk_size=500):
+    """Yields lists of (at most ``chunk_size``) rows from a ``values_list``
+    queryset whose first item is the primary key. Rows are read in primary key
+    order, one chunk per query, so only a chunk is held in memory at a time."""
+    queryset = queryset.order_by('pk')
+    last_pk = None
+    while True:
+        chunk = queryset
+        if last_pk is not None:
+            chunk = chunk.filter(pk__gt=last_pk)
+        chunk = list(chunk[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last_pk = chunk[-1][0]
+
+
+def setup_django():
+    """Sets Django up in a worker process; pass it as ``worker_pool``'s
+    ``initializer`` when the workers use the ORM. Workers that are spawned
+    rather than forked (e.g. on Windows and macOS) start without it."""
+    import django
+    django.setup()
+
+
+def worker_pool(processes=None, initializer=None):
+    """Returns a pool of ``processes`` worker processes (defaults to the
+    number of CPUs) for ``map_chunks``, each of which calls ``initializer``
+    when it starts; or ``None`` if ``processes`` is 1, for ``map_chunks`` to
+    run everything in this process."""
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    if processes <= 1:
+        return None
+    return multiprocessing.Pool(processes, initializer=initializer)
+
+
+def map_chunks(func, chunks, processes=None, pool=None):
+    """Yields ``(chunk, func(chunk))`` for each of the ``chunks``, in order,
+    calling ``func`` in a pool of ``processes`` worker processes (defaults to
+    the number of CPUs; ``processes=1`` runs everything in this process).
+
+    Pass a ``pool`` from ``worker_pool`` to reuse it across calls (it's left
+    running); otherwise one is started, and stopped once all the chunks are
+    done.
+
+    At most two chunks per worker are in flight at once, so chunks are read
+    no faster than they can be processed.
+
+    """
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    own_pool = pool is None
+    if own_pool:
+        pool = worker_pool(processes)
+    if pool is None:
+        for chunk in chunks:
+            yield chunk, func(chunk)
+        return
+
+    try:
+        pending = deque()
+        for chunk in chunks:
+            pending.append((chunk, pool.apply_async(func, (chunk, ))))
+            if len(pending) >= processes * 2:
+                chunk, result = pending.popleft()
+                yield chunk, result.get()
+        while pending:
+            chunk, result = pending.popleft()
+            yield chunk, result.get()
+    finally:
+        if own_pool:
+            pool.terminate()
+            pool.join()
+
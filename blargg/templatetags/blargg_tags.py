@@ -1,13 +1,59 @@
 from django import template
 from django.core.urlresolvers import reverse
-from blargg.models import Entry
+
+from blargg.cache import get_cache, get_generation, make_key
+from blargg.models import ArchiveDate, RelatedEntry
 
 register = template.Library()
 
+# This process's copy of the archive years: a ``(generation, years)`` tuple.
+_archive_years = (None, None)
+
+
+def get_archive_years():
+    """Returns a list of ``{'year', 'entry_count', 'url'}`` dicts for the
+    years with published ``Entry``s, latest first. The list is cached in this
+    process and in the shared cache until the archive calendar changes, so
+    it usually costs a single cache lookup."""
+    global _archive_years
+    generation = get_generation('calendar')
+    local_generation, years = _archive_years
+    if local_generation == generation:
+        return years
+
+    cache = get_cache()
+    key = make_key('archive-years', generation)
+    years = cache.get(key)
+    if years is None:
+        years = [
+            {
+                'year': year,
+                'entry_count': entry_count,
+                'url': reverse('blargg:entry_archive_year', args=[str(year)]),
+            }
+            for year, entry_count in ArchiveDate.objects.years()
+        ]
+        cache.set(key, years, None)
+    _archive_years = (generation, years)
+    return years
+
 
 @register.simple_tag
 def entry_archive_year_url():
     """Renders the ``entry_archive_year`` URL for the latest ``Entry``."""
-    entry = Entry.objects.filter(published=True).latest()
-    arg_list = [entry.published_on.strftime("%Y")]
-    return reverse('blargg:entry_archive_year', args=arg_list)
+    years = get_archive_years()
+    return years[0]['url'] if years else ''
+
+
+@register.inclusion_tag('blargg/archive_years.html')
+def entry_archive_years():
+    """Renders a list of links to the year archives, with their number of
+    ``Entry``s."""
+    return {'years': get_archive_years()}
+
+
+@register.inclusion_tag('blargg/related_entries.html')
+def related_entries(entry):
+    """Renders a list of links to the published ``Entry``s related to an
+    ``Entry`` (by the tags they share), most related first."""
+    return {'related_entries': RelatedEntry.objects.for_entry(entry)}
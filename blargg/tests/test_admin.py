@@ -1,11 +1,18 @@
+try:
+    from unittest.mock import patch
+except ImportError:
+    from mock import patch
+
 from django.conf import settings
 from django.contrib.admin.sites import AdminSite
 from django.contrib.auth import get_user_model
 from django.contrib.sites.models import Site
+from django.core.exceptions import ValidationError
 from django.test import TestCase, override_settings
 
 from ..models import Entry
-from ..admin import TagAdmin, EntryAdmin
+from ..admin import TagAdmin, EntryAdmin, EntryAdminForm
+from ..signals import blargg_settings
 
 
 @override_settings(SITE_ID=1)
@@ -40,14 +47,16 @@ class TestEntryAdmin(TestCase):
         self.assertEqual(EntryAdmin.list_filter, ('published', 'content_format'))
 
     def test_search_fields(self):
-        expected = ('title', 'raw_content', 'tag_string')
+        expected = ('title', 'tag_string')
         self.assertEqual(EntryAdmin.search_fields, expected)
 
     def test_prepopulated_fields(self):
         self.assertEqual(EntryAdmin.prepopulated_fields, {"slug": ("title", )})
 
     def test_actions(self):
-        self.assertEqual(EntryAdmin.actions, ['publish_entries'])
+        self.assertEqual(
+            EntryAdmin.actions, ['publish_entries', 'unpublish_entries']
+        )
 
     def test_publish_entries(self):
         # Some setup (need a User and an Entry)
@@ -73,3 +82,87 @@ class TestEntryAdmin(TestCase):
         # Fetch the Entry, and see if it's published.
         entry = Entry.objects.get(pk=entry.id)
         self.assertTrue(entry.published)
+
+        # ...and unpublish it
+        admin.unpublish_entries(None, Entry.objects.all())
+        entry = Entry.objects.get(pk=entry.id)
+        self.assertFalse(entry.published)
+        self.assertIsNone(entry.published_on)
+
+    def test_search_content(self):
+        User = get_user_model()
+        username = 'entryadmin_search_content'
+        user = User.objects.create(
+            username=username,
+            password='{0}@example.com'.format(username)
+        )
+        site = Site.objects.get(pk=settings.SITE_ID)
+        draft = Entry.objects.create(
+            site=site,
+            author=user,
+            title="Draft Entry",
+            raw_content="Some unusual words",
+        )
+        titled = Entry.objects.create(
+            site=site,
+            author=user,
+            title="Unusual Title",
+            raw_content="Nothing to see",
+        )
+        admin = EntryAdmin(Entry, AdminSite())
+
+        def search(term):
+            results, use_distinct = admin.get_search_results(
+                None, Entry.objects.all(), term
+            )
+            return sorted(results, key=lambda e: e.pk)
+
+        # Drafts' content is found through the word counts...
+        self.assertEqual(search('unusual words'), [draft])
+        # ...and titles as before.
+        self.assertEqual(search('unusual'), [draft, titled])
+        self.assertEqual(search('missing'), [])
+
+    def test_content_formats(self):
+        User = get_user_model()
+        username = 'entryadmin_content_formats'
+        user = User.objects.create(
+            username=username,
+            password='{0}@example.com'.format(username)
+        )
+        entry = Entry(
+            site=Site.objects.get(pk=settings.SITE_ID),
+            author=user,
+            title="Test Entry",
+            slug="test-entry",
+            raw_content="Test Content",
+            content_format="tx",
+        )
+        renderers = [
+            ('html', 'HTML', 'blargg.renderers.HTMLRenderer'),
+            ('tx', 'Text', 'blargg.renderers.HTMLRenderer'),
+        ]
+        with patch.dict(blargg_settings, {'renderers': renderers}):
+            # The form offers the configured formats...
+            form = EntryAdminForm()
+            self.assertEqual(
+                list(form.fields['content_format'].choices),
+                [('html', 'HTML'), ('tx', 'Text')]
+            )
+            # ...which are what the Entry accepts. (``date_slug`` is only set
+            # when it's saved.)
+            entry.full_clean(exclude=['date_slug'])
+            entry.content_format = 'rst'
+            with self.assertRaises(ValidationError) as raised:
+                entry.full_clean(exclude=['date_slug'])
+            self.assertEqual(
+                list(raised.exception.message_dict), ['content_format']
+            )
+            # Formats are still limited to the field's length.
+            entry.content_format = 'x' * 5
+            with self.assertRaises(ValidationError) as raised:
+                entry.full_clean(exclude=['date_slug'])
+            self.assertIn(
+                "at most 4 characters",
+                raised.exception.message_dict['content_format'][0]
+            )
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import json
+import os
+import shutil
+import tempfile
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+
+from ..benchmarks import compare, run_benchmarks, seed_corpus
+from ..models import Entry, Tag
+
+
+@override_settings(SITE_ID=1)
+@override_settings(ROOT_URLCONF='blargg.tests.urls')
+class TestBenchmarks(TestCase):
+
+    def setUp(self):
+        self.output = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output)
+
+    def test_seed_corpus(self):
+        corpus = seed_corpus(entries=30, tags=10, seed=1)
+        entries = Entry.objects.published()
+        self.assertEqual(entries.count(), 30)
+        for content_format in ('html', 'rst', 'md'):
+            self.assertEqual(
+                entries.filter(content_format=content_format).count(), 10
+            )
+        # Tags are drawn from a Zipf distribution, so the first few are used
+        # far more than the rest.
+        counts = dict(Tag.objects.values_list('name', 'entry_count'))
+        self.assertTrue(counts['tag0'] > 3 * counts.get('tag9', 0))
+        self.assertEqual(counts[corpus['tag']], max(counts.values()))
+
+        # The same seed gives the same corpus.
+        titles = dict(entries.values_list('title', 'tag_string'))
+        Entry.objects.all().delete()
+        seed_corpus(entries=30, tags=10, seed=1)
+        self.assertEqual(
+            dict(Entry.objects.values_list('title', 'tag_string')), titles
+        )
+
+    def test_run_benchmarks(self):
+        corpus = seed_corpus(entries=6, tags=5)
+        results = run_benchmarks(corpus, repeat=1)
+        self.assertEqual(results['corpus']['entries'], 6)
+        for name in ('save_rst', 'entry_stats', 'tagged_entry_list',
+                     'entry_archive_day', 'search', 'rss_feed', 'sitemap'):
+            result = results['results'][name]
+            self.assertTrue(result['wall_time'] > 0)
+            self.assertTrue(result['queries'] > 0)
+
+    def test_compare(self):
+        baseline = {'results': {
+            'sitemap': {'wall_time': 0.1, 'queries': 2, 'peak_memory': None},
+            'rss_feed': {'wall_time': 0.1, 'queries': 2, 'peak_memory': 100},
+        }}
+        results = {'results': {
+            'sitemap': {'wall_time': 0.105, 'queries': 2, 'peak_memory': 10},
+            'rss_feed': {'wall_time': 0.2, 'queries': 3, 'peak_memory': 100},
+            'atom_feed': {'wall_time': 1, 'queries': 9, 'peak_memory': 100},
+        }}
+        self.assertEqual(sorted(compare(results, baseline)), [
+            ('rss_feed', 'queries', 2, 3),
+            ('rss_feed', 'wall_time', 0.1, 0.2),
+        ])
+        self.assertEqual(compare(results, baseline, threshold=1.5), [
+            ('rss_feed', 'queries', 2, 3),
+        ])
+
+    def test_command(self):
+        output = os.path.join(self.output, 'results.json')
+        call_command(
+            'benchmark_blargg', entries=6, tags=5, repeat=1,
+            benchmarks=['sitemap'], output=output, verbosity=0
+        )
+        # The corpus is rolled back.
+        self.assertFalse(Entry.objects.exists())
+
+        with open(output) as f:
+            results = json.load(f)
+        self.assertEqual(list(results['results']), ['sitemap'])
+
+        # Compared against itself, nothing regressed; against a baseline
+        # that ran fewer queries, the sitemap did.
+        results['results']['sitemap']['wall_time'] = 60
+        results['results']['sitemap']['peak_memory'] = None
+        with open(output, 'w') as f:
+            json.dump(results, f)
+        call_command(
+            'benchmark_blargg', entries=6, tags=5, repeat=1,
+            benchmarks=['sitemap'], baseline=output, verbosity=0
+        )
+        results['results']['sitemap']['queries'] = 0
+        with open(output, 'w') as f:
+            json.dump(results, f)
+        with self.assertRaises(CommandError):
+            call_command(
+                'benchmark_blargg', entries=6, tags=5, repeat=1,
+                benchmarks=['sitemap'], baseline=output, verbosity=0
+            )
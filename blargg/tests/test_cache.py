@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+try:
+    from unittest.mock import Mock, patch
+except ImportError:
+    from mock import Mock, patch
+
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+
+from ..cache import (
+    LRUCache, bump_generation_on_commit, get_cache, get_generation,
+    get_or_set_locked, make_key
+)
+
+
+class TestLRUCache(TestCase):
+
+    def test_get_and_set(self):
+        cache = LRUCache(maxsize=2)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get('a', 'default'), 'default')
+        cache.set('a', 1)
+        self.assertEqual(cache.get('a'), 1)
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')  # 'b' is now the least recently used
+        cache.set('c', 3)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+
+    def test_clear(self):
+        cache = LRUCache()
+        cache.set('a', 1)
+        cache.clear()
+        self.assertIsNone(cache.get('a'))
+
+
+class TestMakeKey(TestCase):
+
+    def test_make_key(self):
+        key = make_key('render', 'rst', u'Some ☃ content')
+        self.assertTrue(key.startswith('blargg:render:'))
+        self.assertEqual(key, make_key('render', 'rst', u'Some ☃ content'))
+        self.assertNotEqual(key, make_key('render', 'md', u'Some ☃ content'))
+
+
+class TestGetOrSetLocked(TestCase):
+
+    def setUp(self):
+        self.key = make_key('test', 'locked')
+        self.addCleanup(get_cache().delete_many,
+                        [self.key, self.key + ':lock'])
+
+    def test_computes_once(self):
+        func = Mock(return_value={'spam': 1})
+        self.assertEqual(get_or_set_locked(self.key, func), {'spam': 1})
+        self.assertEqual(get_or_set_locked(self.key, func), {'spam': 1})
+        self.assertEqual(func.call_count, 1)
+        self.assertIsNone(get_cache().get(self.key + ':lock'))
+
+    def test_waits_for_lock(self):
+        # Someone else is computing the value; once they've cached it, that's
+        # returned rather than computing it again.
+        cache = get_cache()
+        cache.add(self.key + ':lock', 1)
+        func = Mock(return_value='mine')
+
+        def set_theirs(seconds):
+            cache.set(self.key, 'theirs')
+        with patch('blargg.cache.time.sleep', side_effect=set_theirs):
+            self.assertEqual(get_or_set_locked(self.key, func), 'theirs')
+        self.assertFalse(func.called)
+
+    def test_gives_up_waiting(self):
+        get_cache().add(self.key + ':lock', 1)
+        func = Mock(return_value='mine')
+        self.assertEqual(get_or_set_locked(self.key, func, wait=0), 'mine')
+        # ...but leaves caching it to whoever holds the lock
+        self.assertIsNone(get_cache().get(self.key))
+
+
+class TestBumpGenerationOnCommit(TransactionTestCase):
+
+    def test_bumped_on_commit(self):
+        generation = get_generation('test')
+        with transaction.atomic():
+            bump_generation_on_commit('test')
+            self.assertEqual(get_generation('test'), generation)
+        self.assertNotEqual(get_generation('test'), generation)
+
+    def test_not_bumped_on_rollback(self):
+        generation = get_generation('test')
+        try:
+            with transaction.atomic():
+                bump_generation_on_commit('test')
+                raise ValueError
+        except ValueError:
+            pass
+        self.assertEqual(get_generation('test'), generation)
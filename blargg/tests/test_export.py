@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
+
+from string import ascii_letters
+from random import choice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sites.models import Site
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from ..export import page_filename, plan_export, site_paths
+from ..models import Entry
+
+
+@override_settings(SITE_ID=1)
+@override_settings(ROOT_URLCONF='blargg.tests.urls')
+class TestExportSite(TestCase):
+
+    def setUp(self):
+        username = ''.join([choice(ascii_letters) for i in range(10)])
+        User = get_user_model()
+        self.user = User.objects.create(
+            username=username,
+            password='{0}@example.com'.format(username)
+        )
+        self.entry = Entry(
+            site=Site.objects.get(pk=settings.SITE_ID),
+            author=self.user,
+            title="Test Entry",
+            raw_content="Test Content",
+            content_format="html",
+            tag_string="foo, bar",
+        )
+        self.entry.publish()  # Calls save
+
+        self.output = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output)
+
+    def export(self, **options):
+        call_command(
+            'export_site', self.output,
+            host='testserver', processes=1, verbosity=0, **options
+        )
+
+    def exists(self, path):
+        return os.path.isfile(os.path.join(self.output, path))
+
+    def test_page_filename(self):
+        self.assertEqual(
+            page_filename('/blog/foo/', 'text/html; charset=utf-8'),
+            'blog/foo/index.html'
+        )
+        self.assertEqual(
+            page_filename('/feeds/rss/', 'application/rss+xml'),
+            'feeds/rss/index.xml'
+        )
+        self.assertEqual(page_filename('/blog/feed.xml', 'text/xml'),
+                         'blog/feed.xml')
+        self.assertEqual(page_filename('/', 'text/html'), 'index.html')
+
+    def test_export(self):
+        self.export()
+
+        d = self.entry.archive_date
+        self.assertTrue(self.exists('blog/index.html'))
+        self.assertTrue(self.exists('blog/tags/index.html'))
+        self.assertTrue(self.exists('blog/tags/foo/index.html'))
+        self.assertTrue(self.exists('blog/tags/bar/index.html'))
+        self.assertTrue(self.exists('blog/test-entry/index.html'))
+        self.assertTrue(self.exists(
+            d.strftime('blog/%Y/%m/%d/test-entry/index.html')
+        ))
+        self.assertTrue(self.exists(d.strftime('blog/%Y/index.html')))
+        self.assertTrue(self.exists(d.strftime('blog/%Y/%m/index.html')))
+        self.assertTrue(self.exists(d.strftime('blog/%Y/%m/%d/index.html')))
+        self.assertTrue(self.exists('sitemap.xml.gz'))
+        self.assertTrue(self.exists('sitemap-blog.xml.gz'))
+
+        with open(os.path.join(self.output, 'blog/test-entry/index.html')) as f:
+            self.assertIn("Test Content", f.read())
+
+    def test_incremental(self):
+        self.export()
+
+        # Nothing has changed
+        paths, old_paths, manifest = plan_export(self.output)
+        self.assertEqual(paths, sorted(site_paths()))
+        self.assertEqual(old_paths, [])
+        self.assertEqual(list(manifest), [self.entry.pk])
+
+        # ...unless asked for everything
+        paths, old_paths, manifest = plan_export(self.output, full=True)
+        self.assertIn('/blog/test-entry/', paths)
+
+        # A new entry
+        other = Entry.objects.create(
+            site=self.entry.site,
+            author=self.user,
+            title="Other Entry",
+            raw_content="Other Content",
+            content_format="html",
+            tag_string="baz",
+            published=True,
+        )
+        paths, old_paths, manifest = plan_export(self.output)
+        self.assertIn('/blog/other-entry/', paths)
+        self.assertIn('/blog/tags/baz/', paths)
+        self.assertNotIn('/blog/test-entry/', paths)
+        self.assertNotIn('/blog/tags/foo/', paths)
+        self.export()
+        self.assertTrue(self.exists('blog/other-entry/index.html'))
+
+        # An unpublished entry's pages are removed, and those that listed it
+        # are exported again.
+        other.published = False
+        other.save()
+        paths, old_paths, manifest = plan_export(self.output)
+        self.assertIn('/blog/tags/baz/', paths)
+        self.assertNotIn('/blog/other-entry/', paths)
+        self.assertIn('/blog/other-entry/', old_paths)
+        self.assertNotIn(other.pk, manifest)
+        self.export()
+        self.assertFalse(self.exists('blog/other-entry/index.html'))
+        self.assertTrue(self.exists('blog/test-entry/index.html'))
+
+    def test_incremental_related_entries(self):
+        self.export()
+
+        # A new entry sharing a tag changes the first entry's related
+        # entries, so its page is exported again...
+        other = Entry.objects.create(
+            site=self.entry.site,
+            author=self.user,
+            title="Other Entry",
+            raw_content="Other Content",
+            content_format="html",
+            tag_string="foo",
+            published=True,
+        )
+        paths, old_paths, manifest = plan_export(self.output)
+        self.assertIn('/blog/test-entry/', paths)
+        self.export()
+        with open(os.path.join(self.output, 'blog/test-entry/index.html')) as f:
+            self.assertIn("Other Entry", f.read())
+
+        # ...as it is when a related entry is edited.
+        paths, old_paths, manifest = plan_export(self.output)
+        self.assertNotIn('/blog/test-entry/', paths)
+        other.title = "Renamed Entry"
+        other.save()
+        paths, old_paths, manifest = plan_export(self.output)
+        self.assertIn('/blog/test-entry/', paths)
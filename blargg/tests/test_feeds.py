@@ -1,10 +1,17 @@
+try:
+    from unittest.mock import patch
+except ImportError:
+    from mock import patch
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.sites.models import Site
-from django.test import TestCase, override_settings
+from django.test import RequestFactory, TestCase, TransactionTestCase
+from django.test import override_settings
 
 from ..feeds import RSSEntriesFeed, AtomEntriesFeed
 from ..models import Entry
+from ..signals import blargg_settings
 
 
 @override_settings(SITE_ID=1)
@@ -55,6 +62,82 @@ class TestRSSEntriesFeed(TestCase):
             self.entry.content
         )
 
+    def test_items_limit(self):
+        with patch.dict(blargg_settings, {'feed_items': 0}):
+            self.assertEqual(list(self.feed.items()), [])
+
+
+@override_settings(SITE_ID=1)
+@override_settings(ROOT_URLCONF='blargg.tests.urls')
+class TestCachedFeed(TransactionTestCase):
+    # Cached feeds are invalidated when a save commits, so these tests need
+    # real commits.
+
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create(
+            username='blargg',
+            password='blargg@example.com'
+        )
+        self.publish_entry("First Entry")
+        self.feed = RSSEntriesFeed()
+        self.factory = RequestFactory()
+
+    def publish_entry(self, title):
+        entry = Entry(
+            site=Site.objects.get(pk=settings.SITE_ID),
+            author=self.user,
+            title=title,
+            raw_content="Test Content",
+            content_format="html"
+        )
+        entry.publish()
+        return entry
+
+    def test_cached(self):
+        resp = self.feed(self.factory.get('/feed/rss/'))
+        self.assertContains(resp, "First Entry")
+        self.assertTrue(resp.has_header('ETag'))
+        self.assertTrue(resp.has_header('Last-Modified'))
+
+        with self.assertNumQueries(0):
+            cached = self.feed(self.factory.get('/feed/rss/'))
+        self.assertEqual(cached.content, resp.content)
+
+        # Publishing an Entry rebuilds the feed
+        self.publish_entry("Second Entry")
+        resp = self.feed(self.factory.get('/feed/rss/'))
+        self.assertContains(resp, "Second Entry")
+
+    def test_cached_per_scheme(self):
+        resp = self.feed(self.factory.get('/feed/rss/'))
+        self.assertContains(resp, "http://example.com/")
+        resp = self.feed(self.factory.get('/feed/rss/', secure=True))
+        self.assertContains(resp, "https://example.com/")
+        self.assertNotContains(resp, "http://example.com/")
+
+    def test_conditional_get(self):
+        etag = self.feed(self.factory.get('/feed/rss/'))['ETag']
+        request = self.factory.get('/feed/rss/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(self.feed(request).status_code, 304)
+
+    def test_unpublish_rebuilds(self):
+        entry = self.publish_entry("Second Entry")
+        self.assertContains(self.feed(self.factory.get('/feed/rss/')), "Second")
+        entry.unpublish()
+        resp = self.feed(self.factory.get('/feed/rss/'))
+        self.assertNotContains(resp, "Second")
+
+    def test_draft_does_not_rebuild(self):
+        self.feed(self.factory.get('/feed/rss/'))
+        entry = self.publish_entry("Draft Entry")
+        entry.unpublish()
+        self.feed(self.factory.get('/feed/rss/'))
+        entry = Entry.objects.get(pk=entry.pk)
+        entry.save()
+        with self.assertNumQueries(0):
+            self.feed(self.factory.get('/feed/rss/'))
+
 
 @override_settings(SITE_ID=1)
 class TestAtomEntriesFeed(TestCase):
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from string import ascii_letters
+from random import choice
+
+try:
+    from unittest.mock import Mock, patch
+except ImportError:
+    from mock import Mock, patch
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sites.models import Site
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from ..instrumentation import ServerTimingMiddleware, server_timing, timed
+from ..models import Entry
+from ..signals import blargg_settings
+from ..views import TaggedEntryListView
+
+
+@override_settings(SITE_ID=1)
+@override_settings(ROOT_URLCONF='blargg.tests.urls')
+class TestInstrumentation(TestCase):
+
+    def setUp(self):
+        username = ''.join([choice(ascii_letters) for i in range(10)])
+        User = get_user_model()
+        self.user = User.objects.create(
+            username=username,
+            password='{0}@example.com'.format(username)
+        )
+        self.hook = Mock()
+        self.enabled = {
+            'instrumentation': True,
+            'instrumentation_hooks': [self.hook],
+        }
+
+    def create_entry(self):
+        return Entry.objects.create(
+            site=Site.objects.get(pk=settings.SITE_ID),
+            author=self.user,
+            title="Test Entry",
+            raw_content="Test *Content*",
+            content_format="md",
+            tag_string="foo, bar",
+            published=True,
+        )
+
+    def timed_names(self):
+        return [c[0][0] for c in self.hook.call_args_list]
+
+    def test_disabled(self):
+        self.enabled['instrumentation'] = False
+        with patch.dict(blargg_settings, self.enabled):
+            self.create_entry()
+            with timed('block'):
+                pass
+        self.assertFalse(self.hook.called)
+
+    def test_timed(self):
+        @timed('double')
+        def double(x):
+            return x * 2
+
+        with patch.dict(blargg_settings, self.enabled):
+            self.assertEqual(double(2), 4)
+            with timed('block'):
+                pass
+        self.assertEqual(self.timed_names(), ['double', 'block'])
+        name, duration = self.hook.call_args[0]
+        self.assertTrue(duration >= 0)
+
+    def test_hot_paths(self):
+        with patch.dict(blargg_settings, self.enabled):
+            self.create_entry()
+        names = self.timed_names()
+        self.assertIn('render', names)
+        self.assertIn('tags', names)
+        self.assertIn('signal.generate_entry_tags', names)
+        self.assertIn('signal.update_entry_word_counts', names)
+        self.assertIn('signal.mail2blogger', names)
+
+    def test_server_timing(self):
+        self.assertEqual(
+            server_timing([('render', 0.001), ('tags', 0.5),
+                           ('render', 0.0025)]),
+            'render;dur=3.50, tags;dur=500.00'
+        )
+
+    def test_middleware(self):
+        self.create_entry()
+        view = TaggedEntryListView.as_view()
+
+        def get_response(request):
+            response = view(request, tag_slug='foo')
+            response.render()
+            return response
+
+        request = RequestFactory().get('/blog/tags/foo/')
+        middleware = ServerTimingMiddleware(get_response)
+        with patch.dict(blargg_settings, self.enabled):
+            response = middleware(request)
+        header = response['Server-Timing']
+        self.assertIn('queryset;dur=', header)
+        self.assertTrue(header.split(', ')[-1].startswith('total;dur='))
+
+        # Without instrumentation, there's no header.
+        middleware = ServerTimingMiddleware(lambda request: HttpResponse())
+        response = middleware(RequestFactory().get('/'))
+        self.assertFalse(response.has_header('Server-Timing'))
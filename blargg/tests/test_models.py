@@ -1,20 +1,33 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
+from datetime import date, timedelta
 from string import ascii_letters
 from random import choice
 
 try:
-    from unittest.mock import Mock, patch
+    from unittest.mock import Mock, call, patch
 except ImportError:
-    from mock import Mock, patch
+    from mock import Mock, call, patch
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.db import IntegrityError, connection
 from django.contrib.sites.models import Site
 from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.text import Truncator
 from django.utils.timezone import now as utc_now
 
-from ..models import Tag, Entry
+from ..models import (
+    ArchiveDate, ArchiveWordCount, QueuedMail, RelatedEntry, Tag, Entry,
+    count_words, entry_stats, rebuild_summaries, rebuild_word_counts,
+    render_queued_entry, requeue_entries, requeue_mail, send_queued_mail
+)
+from ..renderers import RestructuredTextRenderer
+from ..signals import blargg_settings, entries_published, entry_published
+from ..stats import iter_chunks, summarize, tokenize
 
 
 @override_settings(SITE_ID=1)
@@ -52,6 +65,76 @@ class TestTagManager(TestCase):
         # We should have tags!
         self.assertEqual(Tag.objects.all().count(), 3)
 
+    def test_create_tags_removes_tags(self):
+        self.entry.save()
+        self.entry.tag_string = "foo, qux"
+        self.entry.save()
+        tags = sorted(self.entry.tags.values_list('name', flat=True))
+        self.assertEqual(tags, ['foo', 'qux'])
+
+    def test_create_tags_duplicates(self):
+        self.entry.tag_string = "Foo Bar, foo-bar,, foo bar ,"
+        self.entry.save()
+        self.assertEqual(
+            list(self.entry.tags.values_list('slug', flat=True)),
+            ['foo-bar']
+        )
+
+    def test_create_tags_unchanged(self):
+        self.entry.save()
+        with CaptureQueriesContext(connection) as queries:
+            added, removed = Tag.objects.create_tags(self.entry)
+        self.assertEqual((added, removed), (set(), set()))
+        # Nothing is written when nothing changed.
+        writes = [
+            q for q in queries.captured_queries
+            if q['sql'].split()[0].upper() in ('INSERT', 'UPDATE', 'DELETE')
+        ]
+        self.assertEqual(writes, [])
+
+    def test_entry_counts(self):
+        self.entry.save()
+        self.assertEqual(Tag.objects.cloud().count(), 0)
+
+        self.entry.publish()
+        counts = dict(Tag.objects.values_list('name', 'entry_count'))
+        self.assertEqual(counts, {'foo': 1, 'bar': 1, 'baz': 1})
+
+        self.entry.tag_string = "foo, qux"
+        self.entry.save()
+        counts = dict(Tag.objects.values_list('name', 'entry_count'))
+        self.assertEqual(counts, {'foo': 1, 'bar': 0, 'baz': 0, 'qux': 1})
+        self.assertEqual(
+            list(Tag.objects.cloud().values_list('name', flat=True)),
+            ['foo', 'qux']
+        )
+
+        self.entry.unpublish()
+        self.assertEqual(Tag.objects.cloud().count(), 0)
+
+        self.entry.publish()
+        self.entry.delete()
+        self.assertEqual(Tag.objects.cloud().count(), 0)
+
+    def test_entry_counts_unchanged(self):
+        self.entry.save()
+        self.entry.publish()
+        # Saving without changing the tags (or whether the Entry is
+        # published) doesn't recount them.
+        with patch.object(Tag.objects, 'update_counts') as update_counts:
+            self.entry.raw_content = "Edited Content"
+            self.entry.save()
+            self.entry.unpublish()
+            self.entry.title = "Edited Draft"
+            self.entry.save()
+        self.assertEqual(update_counts.call_count, 1)  # unpublish
+
+    def test_create_tags_existing_slug(self):
+        Tag.objects.create(name="foo")
+        self.entry.save()
+        self.assertEqual(Tag.objects.filter(slug="foo").count(), 1)
+        self.assertEqual(self.entry.tags.count(), 3)
+
 
 @override_settings(ROOT_URLCONF='blargg.tests.urls')
 class TestTag(TestCase):
@@ -105,6 +188,20 @@ class TestEntry(TestCase):
     def tearDown(self):
         self.utc_now_patcher.stop()
 
+    def _queued_entry(self, content_format, raw_content):
+        """Saves a new Entry with ``async_render``, so its rendering is
+        left for a worker."""
+        entry = Entry(
+            site=self.entry.site,
+            author=self.entry.author,
+            title="Queued Entry",
+            content_format=content_format,
+            raw_content=raw_content
+        )
+        with patch.dict(blargg_settings, {'async_render': True}):
+            entry.save()
+        return entry
+
     def test__str__(self):
         self.assertEqual(self.entry.__str__(), self.entry.title)
 
@@ -161,6 +258,211 @@ class TestEntry(TestCase):
         results = self.entry.rendered_content.strip()
         self.assertEqual(results, "<p>Test Content</p>")
 
+    def test__render_content_cached(self):
+        self.entry.content_format = "rst"
+        self.entry.raw_content = "Cached *Content*"
+        self.entry._render_content()
+        expected = self.entry.rendered_content
+
+        self.entry.rendered_content = ""
+        with patch.object(RestructuredTextRenderer, 'render') as mock_render:
+            self.entry._render_content()
+            self.assertFalse(mock_render.called)
+        self.assertEqual(self.entry.rendered_content, expected)
+
+    def test__render_content_cache_disabled(self):
+        self.entry.content_format = "rst"
+        self.entry.raw_content = "Uncached *Content*"
+        self.entry._render_content()
+
+        with patch.dict(blargg_settings, {'render_cache': False}):
+            with patch.object(RestructuredTextRenderer, 'render') as render:
+                render.return_value = 'RENDERED'
+                self.entry._render_content()
+        self.assertEqual(self.entry.rendered_content, 'RENDERED')
+
+    def test_save_async_render(self):
+        queued = self._queued_entry("rst", "Queued *Content*")
+        self.assertEqual(queued.render_status, Entry.RENDER_PENDING)
+        self.assertNotIn(queued, Entry.objects.rendered())
+
+        self.assertTrue(render_queued_entry(queued.pk))
+        entry = Entry.objects.get(pk=queued.pk)
+        self.assertEqual(entry.render_status, Entry.RENDER_DONE)
+        self.assertIn("<em>Content</em>", entry.rendered_content)
+        self.assertIsNone(entry.render_claimed_on)
+
+        # Nothing left to render
+        self.assertFalse(render_queued_entry(queued.pk))
+
+    def test_save_async_render_title(self):
+        # Only changes to the content are re-rendered
+        entry = Entry.objects.get(pk=self.entry.pk)
+        entry.title = "New Title"
+        with patch.dict(blargg_settings, {'async_render': True}):
+            with patch.object(Entry, '_render_content') as render_content:
+                entry.save()
+        self.assertFalse(render_content.called)
+        entry = Entry.objects.get(pk=self.entry.pk)
+        self.assertEqual(entry.render_status, Entry.RENDER_DONE)
+        self.assertFalse(entry.render_queued)
+        self.assertIn(entry, Entry.objects.rendered())
+
+    def test_save_async_render_rendered(self):
+        # Rendered Entries keep their content until they're re-rendered
+        entry = Entry.objects.get(pk=self.entry.pk)
+        entry.content_format = "rst"
+        entry.raw_content = "Edited *Content*"
+        with patch.dict(blargg_settings, {'async_render': True}):
+            entry.save()
+        entry = Entry.objects.get(pk=self.entry.pk)
+        self.assertEqual(entry.render_status, Entry.RENDER_DONE)
+        self.assertTrue(entry.render_queued)
+        self.assertEqual(entry.rendered_content, "Test Content")
+        self.assertIn(entry, Entry.objects.rendered())
+
+        self.assertTrue(render_queued_entry(entry.pk))
+        entry = Entry.objects.get(pk=self.entry.pk)
+        self.assertFalse(entry.render_queued)
+        self.assertIn("<em>Content</em>", entry.rendered_content)
+        self.assertFalse(render_queued_entry(entry.pk))
+
+    def test_save_async_render_rendered_failure(self):
+        entry = Entry.objects.get(pk=self.entry.pk)
+        entry.content_format = "rst"
+        entry.raw_content = "Broken *Content*"
+        with patch.dict(blargg_settings, {'async_render': True}):
+            entry.save()
+        with patch.object(Entry, '_render', side_effect=ValueError):
+            self.assertFalse(render_queued_entry(entry.pk))
+        entry = Entry.objects.get(pk=self.entry.pk)
+        self.assertEqual(entry.render_status, Entry.RENDER_DONE)
+        self.assertEqual(entry.rendered_content, "Test Content")
+
+        # The failed claim is re-queued once it's stale
+        self.assertEqual(requeue_entries(), 0)
+        Entry.objects.filter(pk=entry.pk).update(
+            render_claimed_on=self.now - timedelta(hours=2)
+        )
+        self.assertEqual(requeue_entries(), 1)
+        self.assertTrue(Entry.objects.get(pk=entry.pk).render_queued)
+
+    def test_save_async_render_cached(self):
+        self.entry.content_format = "rst"
+        self.entry.raw_content = "Cached *Content*"
+        self.entry._render_content()
+        with patch.dict(blargg_settings, {'async_render': True}):
+            self.entry.save()
+        self.assertEqual(self.entry.render_status, Entry.RENDER_DONE)
+
+    def test_save_async_render_publish(self):
+        # Entries are rendered when first published
+        self.entry.content_format = "rst"
+        self.entry.raw_content = "Published *Content*"
+        self.entry.published = True
+        with patch.dict(blargg_settings, {'async_render': True}):
+            self.entry.save()
+        self.assertEqual(self.entry.render_status, Entry.RENDER_DONE)
+        self.assertIn(self.entry, Entry.objects.published())
+
+    def test_publish_async_render(self):
+        # Entries are rendered (and announced) when published with publish()
+        received = Mock()
+        entry_published.connect(received, dispatch_uid='test-publish-async')
+        self.addCleanup(
+            entry_published.disconnect, dispatch_uid='test-publish-async'
+        )
+        queued = self._queued_entry("rst", "Published *Content*")
+        self.assertEqual(queued.render_status, Entry.RENDER_PENDING)
+        with patch.dict(blargg_settings, {'async_render': True}):
+            queued.publish()
+        self.assertEqual(queued.render_status, Entry.RENDER_DONE)
+        self.assertIn(queued, Entry.objects.published())
+        self.assertEqual(received.call_count, 1)
+        self.assertEqual(received.call_args[1]['entry'], queued)
+
+    def test_render_queued_entry_failure(self):
+        queued = self._queued_entry("rst", "Broken *Content*")
+        with patch.object(Entry, '_render', side_effect=ValueError):
+            self.assertFalse(render_queued_entry(queued.pk))
+        entry = Entry.objects.get(pk=queued.pk)
+        self.assertEqual(entry.render_status, Entry.RENDER_FAILED)
+
+    def test_requeue_entries(self):
+        Entry.objects.filter(pk=self.entry.pk).update(
+            render_status=Entry.RENDER_RENDERING,
+            render_claimed_on=self.now
+        )
+        # A live worker's claim is left alone...
+        self.assertEqual(requeue_entries(), 0)
+        # ...but an abandoned one is re-queued.
+        Entry.objects.filter(pk=self.entry.pk).update(
+            render_claimed_on=self.now - timedelta(hours=2)
+        )
+        self.assertEqual(requeue_entries(), 1)
+        entry = Entry.objects.get(pk=self.entry.pk)
+        self.assertEqual(entry.render_status, Entry.RENDER_PENDING)
+
+        Entry.objects.filter(pk=self.entry.pk).update(
+            render_status=Entry.RENDER_FAILED
+        )
+        self.assertEqual(requeue_entries(), 1)
+
+    def test_render_entries_command(self):
+        queued = self._queued_entry("md", "Command *Content*")
+        self.entry.content_format = "md"
+        self.entry.raw_content = "Edited *Content*"
+        with patch.dict(blargg_settings, {'async_render': True}):
+            self.entry.save()
+        self.assertTrue(self.entry.render_queued)
+        stdout = Mock()
+        call_command(
+            'render_entries', once=True, processes=1, verbosity=0,
+            stdout=stdout
+        )
+        self.assertFalse(stdout.write.called)
+        entry = Entry.objects.get(pk=queued.pk)
+        self.assertEqual(entry.render_status, Entry.RENDER_DONE)
+        entry = Entry.objects.get(pk=self.entry.pk)
+        self.assertFalse(entry.render_queued)
+        self.assertIn("<em>Content</em>", entry.rendered_content)
+
+    def test_save_summary(self):
+        self.assertEqual(self.entry.excerpt, "Test Content")
+        self.assertEqual(self.entry.word_count, 2)
+        self.assertEqual(self.entry.reading_time, 1)
+
+        self.entry.content_format = "rst"
+        self.entry.raw_content = "A *long* entry. " * 150
+        self.entry.save()
+        entry = Entry.objects.get(pk=self.entry.pk)
+        text = ("A long entry. " * 150).strip()
+        self.assertEqual(entry.excerpt, Truncator(text).words(20))
+        self.assertEqual(entry.word_count, 450)
+        self.assertEqual(entry.reading_time, 3)
+
+    def test_save_summary_async_render(self):
+        self.entry.content_format = "md"
+        self.entry.raw_content = "Queued *summary*"
+        with patch.dict(blargg_settings, {'async_render': True}):
+            self.entry.save()
+        self.assertEqual(
+            Entry.objects.get(pk=self.entry.pk).excerpt, "Test Content"
+        )
+        render_queued_entry(self.entry.pk)
+        self.assertEqual(
+            Entry.objects.get(pk=self.entry.pk).excerpt, "Queued summary"
+        )
+
+    def test_rebuild_summaries(self):
+        Entry.objects.update(excerpt="", word_count=0, reading_time=0)
+        with patch.dict(blargg_settings, {'excerpt_words': 1}):
+            rebuild_summaries()
+        entry = Entry.objects.get(pk=self.entry.pk)
+        self.assertEqual(entry.excerpt, Truncator("Test Content").words(1))
+        self.assertEqual(entry.word_count, 2)
+        self.assertEqual(entry.reading_time, 1)
+
     def test__set_published(self):
         self.assertFalse(self.entry.published)
         self.assertEqual(self.entry.published_on, None)
@@ -227,3 +529,606 @@ class TestEntry(TestCase):
             mock_mark_safe.assert_any_call
             self.assertEqual(result, "SAMPLE CONTENT")
         mock_mark_safe.reset_mock()
+
+
+@override_settings(SITE_ID=1)
+@override_settings(ROOT_URLCONF='blargg.tests.urls')
+class TestWordCounts(TestCase):
+
+    def setUp(self):
+        username = ''.join([choice(ascii_letters) for i in range(10)])
+        User = get_user_model()
+        user = User.objects.create(
+            username=username,
+            password='{0}@example.com'.format(username)
+        )
+        self.entry = Entry(
+            site=Site.objects.get(pk=settings.SITE_ID),
+            author=user,
+            title="Test Entry",
+            raw_content="<p>Spam, spam, eggs &amp; spam!</p>",
+            content_format="html",
+        )
+        self.entry.save()
+
+    def period_stats(self):
+        d = self.entry.published_on
+        return ArchiveWordCount.objects.stats(d.year, d.month, d.day)
+
+    def test_count_words(self):
+        counts = count_words("<p>Spam, spam, eggs &amp; Spam!</p>")
+        self.assertEqual(counts, {'spam': 3, 'eggs': 1})
+
+    def test_tokenize_unicode(self):
+        words = tokenize(u"<p>Crème brûlée, don't 42 naïve_café Ελληνικά</p>")
+        self.assertEqual(
+            words,
+            [u'crème', u'brûlée', u"don't", u'naïve', u'café', u'ελληνικά']
+        )
+
+    def test_summarize(self):
+        excerpt, word_count, reading_time = summarize(
+            "<h1>Spam &amp; eggs</h1>\n<p>Spam,\n spam.</p>", 3, 2
+        )
+        text = "Spam & eggs Spam, spam."
+        self.assertEqual(excerpt, Truncator(text).words(3))
+        self.assertEqual(word_count, 4)
+        self.assertEqual(reading_time, 2)
+        self.assertEqual(summarize("", 3, 2), ("", 0, 0))
+
+    def test_save_stores_word_counts(self):
+        counts = dict(self.entry.word_counts.values_list('word', 'count'))
+        self.assertEqual(counts, {'spam': 3, 'eggs': 1})
+        # Unpublished entries aren't in any archive
+        self.assertIsNone(self.entry.archive_date)
+        self.assertEqual(ArchiveWordCount.objects.count(), 0)
+
+    def test_publish_adds_to_rollups(self):
+        self.entry.publish()
+        self.assertEqual(self.entry.archive_date, self.entry._get_archive_date())
+        stats = self.period_stats()
+        self.assertEqual(stats['total_words'], 2)
+        self.assertEqual(stats['most_common'][0], ('spam', 3))
+
+        # Year, month, and day rollups all include the entry
+        y = self.entry.archive_date.year
+        self.assertEqual(ArchiveWordCount.objects.stats(y), stats)
+
+    def test_edit_updates_rollups(self):
+        self.entry.publish()
+        self.entry.raw_content = "eggs eggs eggs"
+        self.entry.save()
+        stats = self.period_stats()
+        self.assertEqual(stats['total_words'], 1)
+        self.assertEqual(stats['most_common'], [('eggs', 3)])
+
+    def test_unpublish_and_delete_retract_rollups(self):
+        self.entry.publish()
+        self.entry.unpublish()
+        self.assertEqual(ArchiveWordCount.objects.count(), 0)
+
+        self.entry.publish()
+        self.entry.delete()
+        self.assertEqual(ArchiveWordCount.objects.count(), 0)
+
+    def test_add_counts_concurrent_insert(self):
+        d = date(2015, 3, 14)
+        ArchiveWordCount.objects.create(
+            year=2015, month=3, day=14, word='spam', count=5
+        )
+        bulk_create = ArchiveWordCount.objects.bulk_create
+
+        def racing_bulk_create(objs, **kwargs):
+            # Another process inserts the same day's words first.
+            if objs and objs[0].day == 14:
+                raise IntegrityError("UNIQUE constraint failed")
+            return bulk_create(objs, **kwargs)
+
+        with patch.object(ArchiveWordCount.objects, 'bulk_create',
+                          side_effect=racing_bulk_create):
+            ArchiveWordCount.objects.add_counts(
+                d, {'spam': 2, 'eggs': 1, 'ham': 4}
+            )
+        day = ArchiveWordCount.objects.filter(year=2015, month=3, day=14)
+        self.assertEqual(
+            dict(day.values_list('word', 'count')),
+            {'spam': 7, 'eggs': 1, 'ham': 4}
+        )
+        month = ArchiveWordCount.objects.filter(year=2015, month=3, day=0)
+        self.assertEqual(
+            dict(month.values_list('word', 'count')),
+            {'spam': 2, 'eggs': 1, 'ham': 4}
+        )
+
+    def test_entry_stats(self):
+        stats = entry_stats(Entry.objects.all(), top_n=1)
+        self.assertEqual(stats, {'total_words': 2, 'most_common': [('spam', 3)]})
+
+    def test_iter_chunks(self):
+        for i in range(4):
+            Entry.objects.create(
+                site=self.entry.site,
+                author=self.entry.author,
+                title="Entry {0}".format(i),
+                raw_content="eggs",
+                content_format="html",
+            )
+        rows = Entry.objects.values_list('pk', 'title')
+        chunks = list(iter_chunks(rows, chunk_size=2))
+        self.assertEqual([len(c) for c in chunks], [2, 2, 1])
+        self.assertEqual(sum(chunks, []), list(rows.order_by('pk')))
+
+    def test_rebuild_word_counts(self):
+        self.entry.publish()
+        # Each chunk's rollups are added to the last one's.
+        Entry.objects.create(
+            site=self.entry.site,
+            author=self.entry.author,
+            title="Another Entry",
+            raw_content="spam eggs ham",
+            content_format="html",
+            published=True,
+            published_on=self.entry.published_on,
+        )
+        expected = self.period_stats()
+        self.assertEqual(expected['most_common'][0], ('spam', 4))
+        ArchiveWordCount.objects.all().delete()
+        Entry.objects.update(archive_date=None)
+        rebuild_word_counts(chunk_size=1, processes=2)
+        self.assertEqual(self.period_stats(), expected)
+        self.assertEqual(
+            Entry.objects.get(pk=self.entry.pk).archive_date,
+            self.entry.archive_date
+        )
+
+
+@override_settings(SITE_ID=1)
+@override_settings(ROOT_URLCONF='blargg.tests.urls')
+class TestArchiveDate(TestCase):
+
+    def setUp(self):
+        username = ''.join([choice(ascii_letters) for i in range(10)])
+        User = get_user_model()
+        user = User.objects.create(
+            username=username,
+            password='{0}@example.com'.format(username)
+        )
+        self.entry = Entry.objects.create(
+            site=Site.objects.get(pk=settings.SITE_ID),
+            author=user,
+            title="Test Entry",
+            raw_content="Test Content",
+            content_format="html",
+        )
+
+    def counts(self, d):
+        return [
+            ArchiveDate.objects.entry_count(d.year),
+            ArchiveDate.objects.entry_count(d.year, d.month),
+            ArchiveDate.objects.entry_count(d.year, d.month, d.day),
+        ]
+
+    def test_publish_and_unpublish(self):
+        self.assertEqual(ArchiveDate.objects.count(), 0)
+        self.entry.publish()
+        d = self.entry.archive_date
+        self.assertEqual(self.counts(d), [1, 1, 1])
+
+        Entry.objects.create(
+            site=self.entry.site,
+            author=self.entry.author,
+            title="Another Entry",
+            raw_content="Content",
+            content_format="html",
+            published=True,
+        )
+        self.assertEqual(self.counts(d), [2, 2, 2])
+
+        # Editing doesn't change the counts
+        self.entry.raw_content = "Edited"
+        self.entry.save()
+        self.assertEqual(self.counts(d), [2, 2, 2])
+
+        self.entry.unpublish()
+        self.assertEqual(self.counts(d), [1, 1, 1])
+
+        Entry.objects.exclude(pk=self.entry.pk).delete()
+        self.assertEqual(ArchiveDate.objects.count(), 0)
+
+    def test_date_list(self):
+        for d in [date(2013, 1, 5), date(2013, 1, 5), date(2013, 1, 20),
+                  date(2013, 3, 1), date(2015, 6, 2)]:
+            ArchiveDate.objects.add_entries(d, 1)
+
+        self.assertEqual(ArchiveDate.objects.entry_count(2013), 4)
+        self.assertEqual(ArchiveDate.objects.entry_count(2013, 1, 5), 2)
+        self.assertEqual(ArchiveDate.objects.entry_count(2014), 0)
+        self.assertEqual(
+            ArchiveDate.objects.date_list(2013),
+            [date(2013, 1, 1), date(2013, 3, 1)]
+        )
+        self.assertEqual(
+            ArchiveDate.objects.date_list(2013, 1),
+            [date(2013, 1, 5), date(2013, 1, 20)]
+        )
+
+    def test_adjacent(self):
+        for d in [date(2013, 1, 5), date(2013, 1, 20), date(2013, 3, 1),
+                  date(2015, 6, 2)]:
+            ArchiveDate.objects.add_entries(d, 1)
+        adjacent = ArchiveDate.objects.adjacent
+
+        self.assertEqual(adjacent(2013), date(2015, 1, 1))
+        self.assertEqual(adjacent(2015, previous=True), date(2013, 1, 1))
+        self.assertIsNone(adjacent(2015))
+
+        self.assertEqual(adjacent(2013, 1), date(2013, 3, 1))
+        self.assertEqual(adjacent(2013, 3), date(2015, 6, 1))
+        self.assertEqual(adjacent(2015, 6, previous=True), date(2013, 3, 1))
+
+        self.assertEqual(adjacent(2013, 1, 5), date(2013, 1, 20))
+        self.assertEqual(adjacent(2013, 1, 20), date(2013, 3, 1))
+        self.assertEqual(adjacent(2013, 1, 5, previous=True), None)
+
+        # Periods with no (remaining) entries are skipped
+        ArchiveDate.objects.add_entries(date(2013, 3, 1), -1)
+        self.assertEqual(adjacent(2013, 1), date(2015, 6, 1))
+
+    def test_rebuild(self):
+        self.entry.publish()
+        d = self.entry.archive_date
+        ArchiveDate.objects.all().delete()
+        rebuild_word_counts(processes=1)
+        self.assertEqual(self.counts(d), [1, 1, 1])
+
+
+@override_settings(SITE_ID=1)
+@override_settings(ROOT_URLCONF='blargg.tests.urls')
+class TestBulkPublish(TestCase):
+
+    def setUp(self):
+        username = ''.join([choice(ascii_letters) for i in range(10)])
+        User = get_user_model()
+        user = User.objects.create(
+            username=username,
+            password='{0}@example.com'.format(username)
+        )
+        for i in range(3):
+            Entry.objects.create(
+                site=Site.objects.get(pk=settings.SITE_ID),
+                author=user,
+                title="Entry {0}".format(i),
+                raw_content="Spam eggs",
+                content_format="html",
+                tag_string="foo",
+            )
+
+        self.published = Mock()
+        entries_published.connect(self.published, dispatch_uid='test-bulk')
+        self.addCleanup(entries_published.disconnect, dispatch_uid='test-bulk')
+
+    def test_publish(self):
+        single = Mock()
+        entry_published.connect(single, dispatch_uid='test-bulk-single')
+        self.addCleanup(
+            entry_published.disconnect, dispatch_uid='test-bulk-single'
+        )
+
+        self.assertEqual(Entry.objects.all().publish(), 3)
+        self.assertFalse(single.called)
+        self.assertEqual(self.published.call_count, 1)
+        entries = self.published.call_args[1]['entries']
+        self.assertEqual(len(entries), 3)
+
+        entry = Entry.objects.get(title="Entry 0")
+        self.assertTrue(entry.published)
+        self.assertEqual(
+            entry.date_slug,
+            "{0}/entry-0".format(entry.published_on.strftime("%Y/%m/%d"))
+        )
+        self.assertEqual(entry.archive_date, entry._get_archive_date())
+        self.assertEqual(Entry.objects.published().count(), 3)
+
+        # Derived counts are up to date
+        d = entry.archive_date
+        self.assertEqual(Tag.objects.get(slug='foo').entry_count, 3)
+        self.assertEqual(ArchiveDate.objects.entry_count(d.year), 3)
+        self.assertEqual(
+            ArchiveWordCount.objects.stats(d.year)['most_common'],
+            [('eggs', 3), ('spam', 3)]
+        )
+
+    def test_publish_mail2blogger(self):
+        enabled = {'mail2blogger': True, 'mail2blogger_email': 'a@b.com'}
+        with patch.dict(blargg_settings, enabled):
+            with CaptureQueriesContext(connection) as queries:
+                Entry.objects.all().publish()
+        # One insert for all the mail, and no lookups for each Entry
+        inserts = [
+            q for q in queries
+            if q['sql'].startswith('INSERT') and
+            QueuedMail._meta.db_table in q['sql']
+        ]
+        self.assertEqual(len(inserts), 1)
+        site_lookups = [
+            q for q in queries if 'FROM "django_site"' in q['sql']
+        ]
+        self.assertEqual(site_lookups, [])
+        self.assertEqual(QueuedMail.objects.count(), 3)
+        self.assertEqual(len(mail.outbox), 0)  # Queued...
+        self.assertEqual(send_queued_mail(), (3, 0))  # ...and sent
+        self.assertEqual(
+            sorted(m.subject for m in mail.outbox),
+            ["Entry 0", "Entry 1", "Entry 2"]
+        )
+
+    def test_publish_is_atomic(self):
+        add_counts = 'blargg.models.ArchiveWordCount.objects.add_counts'
+        with patch(add_counts, side_effect=IntegrityError):
+            with self.assertRaises(IntegrityError):
+                Entry.objects.all().publish()
+        # Nothing was published, so it can be retried.
+        self.assertEqual(Entry.objects.filter(published=True).count(), 0)
+        self.assertFalse(self.published.called)
+        self.assertEqual(Entry.objects.all().publish(), 3)
+        self.assertEqual(Tag.objects.get(slug='foo').entry_count, 3)
+
+    def test_publish_is_idempotent(self):
+        Entry.objects.filter(title="Entry 0").publish()
+        self.assertEqual(Entry.objects.all().publish(), 2)
+        self.assertEqual(Entry.objects.all().publish(), 0)
+
+        # Nobody is told about an Entry twice
+        published = [
+            e.title for call in self.published.call_args_list
+            for e in call[1]['entries']
+        ]
+        self.assertEqual(sorted(published), ["Entry 0", "Entry 1", "Entry 2"])
+
+    def test_publish_renders_pending(self):
+        Entry.objects.update(render_status=Entry.RENDER_PENDING)
+        Entry.objects.all().publish()
+        self.assertEqual(Entry.objects.published().count(), 3)
+        entries = self.published.call_args[1]['entries']
+        self.assertEqual(
+            [e.render_status for e in entries], [Entry.RENDER_DONE] * 3
+        )
+
+    def test_unpublish(self):
+        Entry.objects.all().publish()
+        d = Entry.objects.first().archive_date
+        self.assertEqual(Entry.objects.filter(title="Entry 0").unpublish(), 1)
+        self.assertEqual(Entry.objects.all().unpublish(), 2)
+        self.assertEqual(Entry.objects.all().unpublish(), 0)
+
+        entry = Entry.objects.get(title="Entry 0")
+        self.assertFalse(entry.published)
+        self.assertIsNone(entry.published_on)
+        self.assertIsNone(entry.archive_date)
+        self.assertEqual(Tag.objects.get(slug='foo').entry_count, 0)
+        self.assertEqual(ArchiveDate.objects.entry_count(d.year), 0)
+        self.assertEqual(ArchiveWordCount.objects.count(), 0)
+
+
+@override_settings(SITE_ID=1)
+@override_settings(ROOT_URLCONF='blargg.tests.urls')
+class TestRelatedEntries(TestCase):
+
+    def setUp(self):
+        username = ''.join([choice(ascii_letters) for i in range(10)])
+        User = get_user_model()
+        self.user = User.objects.create(
+            username=username,
+            password='{0}@example.com'.format(username)
+        )
+        self.python = self.create_entry("Python", "python, django, web")
+        self.django = self.create_entry("Django", "python, django")
+        self.flask = self.create_entry("Flask", "python, web")
+        self.web = self.create_entry("Web", "web")
+        self.cooking = self.create_entry("Cooking", "food")
+
+    def create_entry(self, title, tag_string, published=True):
+        return Entry.objects.create(
+            site=Site.objects.get(pk=settings.SITE_ID),
+            author=self.user,
+            title=title,
+            raw_content="Content",
+            content_format="html",
+            tag_string=tag_string,
+            published=published,
+        )
+
+    def related(self, entry):
+        return [e.title for e in RelatedEntry.objects.for_entry(entry)]
+
+    def test_related(self):
+        # Sharing "django" (used by 2 Entries) counts for more than sharing
+        # "web" (used by 3).
+        self.assertEqual(self.related(self.python), ["Django", "Flask", "Web"])
+        self.assertEqual(self.related(self.django), ["Python", "Flask"])
+        self.assertEqual(self.related(self.cooking), [])
+
+        # It's a single query.
+        with self.assertNumQueries(1):
+            self.related(self.python)
+
+    def test_tags_changed(self):
+        self.cooking.tag_string = "food, web, django"
+        self.cooking.save()
+        self.assertEqual(self.related(self.cooking)[:2], ["Python", "Django"])
+        self.assertIn("Cooking", self.related(self.django))
+        self.assertIn("Cooking", self.related(self.flask))
+
+        self.cooking.tag_string = "food"
+        self.cooking.save()
+        self.assertEqual(self.related(self.cooking), [])
+        self.assertNotIn("Cooking", self.related(self.flask))
+        self.assertNotIn("Cooking", self.related(self.django))
+
+    def test_published_only(self):
+        draft = self.create_entry("Draft", "python, django", published=False)
+        self.assertNotIn("Draft", self.related(self.python))
+        # Drafts still have their related Entries.
+        self.assertEqual(self.related(draft), ["Django", "Python", "Flask"])
+
+        draft.publish()
+        self.assertIn("Draft", self.related(self.python))
+        Entry.objects.filter(pk=draft.pk).unpublish()
+        self.assertNotIn("Draft", self.related(self.python))
+        Entry.objects.filter(pk=draft.pk).publish()
+        self.assertIn("Draft", self.related(self.python))
+
+        draft.delete()
+        self.assertNotIn("Draft", self.related(self.python))
+        # The other scores are only recomputed by a rebuild.
+        RelatedEntry.objects.rebuild()
+        self.assertEqual(self.related(self.python), ["Django", "Flask", "Web"])
+
+    def test_entry_changed(self):
+        refresh = RelatedEntry.objects.refresh
+        with patch.object(RelatedEntry.objects, 'refresh',
+                          side_effect=refresh) as mock_refresh:
+            self.cooking.tag_string = "food, django"
+            self.cooking.save()
+        # Only the saved Entry is re-scored...
+        self.assertEqual(
+            mock_refresh.call_args_list, [call([self.cooking.pk])]
+        )
+        # ...and it's added to the others' lists.
+        self.assertEqual(self.related(self.cooking), ["Django", "Python"])
+        self.assertIn("Cooking", self.related(self.django))
+        self.assertIn("Cooking", self.related(self.python))
+        # Their pages changed.
+        django = Entry.objects.get(pk=self.django.pk)
+        self.assertGreater(django.updated_on, self.django.updated_on)
+
+        # It's dropped from them when it's unpublished.
+        self.cooking.published = False
+        self.cooking.save()
+        self.assertNotIn("Cooking", self.related(self.django))
+        self.assertNotIn("Cooking", self.related(self.python))
+
+    def test_rendered_only(self):
+        Entry.objects.filter(pk=self.django.pk).update(
+            render_status=Entry.RENDER_PENDING
+        )
+        self.assertEqual(self.related(self.python), ["Flask", "Web"])
+
+    def test_limit(self):
+        with patch.dict(blargg_settings, {'related_entries_count': 1}):
+            call_command('rebuild_related_entries')
+        self.assertEqual(self.related(self.python), ["Django"])
+        rows = RelatedEntry.objects.filter(entry=self.python)
+        self.assertEqual(rows.count(), 1)
+
+    def test_refresh_unchanged(self):
+        # Rows are only rewritten when an Entry's related Entries change.
+        RelatedEntry.objects.rebuild()
+        created_on = RelatedEntry.objects.get(
+            entry=self.python, related=self.django
+        ).created_on
+        RelatedEntry.objects.rebuild()
+        self.assertEqual(
+            RelatedEntry.objects.get(
+                entry=self.python, related=self.django
+            ).created_on,
+            created_on
+        )
+
+
+@override_settings(SITE_ID=1)
+@override_settings(ROOT_URLCONF='blargg.tests.urls')
+class TestQueuedMail(TestCase):
+
+    def setUp(self):
+        username = ''.join([choice(ascii_letters) for i in range(10)])
+        User = get_user_model()
+        user = User.objects.create(
+            username=username,
+            password='{0}@example.com'.format(username)
+        )
+        self.entry = Entry(
+            site=Site.objects.get(pk=settings.SITE_ID),
+            author=user,
+            title="Test Entry",
+            raw_content="<p>Test Content</p>",
+            content_format="html",
+            published=True,
+        )
+        enabled = {'mail2blogger': True, 'mail2blogger_email': 'a@b.com'}
+        with patch.dict(blargg_settings, enabled):
+            self.entry.save()  # Sends entry_published
+
+    def test_publish_queues_mail(self):
+        self.assertEqual(len(mail.outbox), 0)
+        queued = QueuedMail.objects.get()
+        self.assertEqual(queued.entry, self.entry)
+        self.assertEqual(queued.status, QueuedMail.STATUS_QUEUED)
+        self.assertEqual(queued.recipients, 'a@b.com')
+        self.assertIn("<p>Test Content</p>", queued.html)
+
+        self.assertEqual(send_queued_mail(), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
+        msg = mail.outbox[0]
+        self.assertEqual(msg.subject, "Test Entry")
+        self.assertEqual(msg.to, ['a@b.com'])
+        self.assertEqual(msg.alternatives[0][1], 'text/html')
+
+        queued = QueuedMail.objects.get()
+        self.assertEqual(queued.status, QueuedMail.STATUS_SENT)
+        self.assertIsNotNone(queued.sent_on)
+
+        # Nothing left to send
+        self.assertEqual(send_queued_mail(), (0, 0))
+
+    def test_send_reuses_connection(self):
+        msg = mail.EmailMessage("Another", "", to=['a@b.com'])
+        QueuedMail.objects.queue(msg)
+        connection = mail.get_connection()
+        with patch('blargg.models.get_connection', return_value=connection):
+            with patch.object(connection, 'open') as mock_open:
+                self.assertEqual(send_queued_mail(), (2, 0))
+        self.assertEqual(mock_open.call_count, 1)
+
+    def test_retry_with_backoff(self):
+        connection = mail.get_connection()
+        error = patch.object(
+            connection, 'send_messages', side_effect=IOError("Nope")
+        )
+        with patch('blargg.models.get_connection', return_value=connection):
+            with error, patch.dict(blargg_settings, {'mail_max_attempts': 2}):
+                self.assertEqual(send_queued_mail(), (0, 1))
+                queued = QueuedMail.objects.get()
+                self.assertEqual(queued.status, QueuedMail.STATUS_QUEUED)
+                self.assertEqual(queued.attempts, 1)
+                self.assertEqual(queued.last_error, "Nope")
+                self.assertGreater(queued.next_attempt_on, utc_now())
+
+                # Not due yet
+                self.assertEqual(send_queued_mail(), (0, 0))
+
+                # Gives up after ``mail_max_attempts``
+                QueuedMail.objects.update(next_attempt_on=utc_now())
+                self.assertEqual(send_queued_mail(), (0, 1))
+                queued = QueuedMail.objects.get()
+                self.assertEqual(queued.status, QueuedMail.STATUS_FAILED)
+
+        call_command('send_mail_queue', requeue=True, once=True, verbosity=0)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_requeue_mail(self):
+        now = utc_now()
+        QueuedMail.objects.update(
+            status=QueuedMail.STATUS_SENDING,
+            claimed_on=now
+        )
+        # A live worker's claim is left alone...
+        self.assertEqual(requeue_mail(), 0)
+        with patch.dict(blargg_settings, {'claim_timeout': 60}):
+            self.assertEqual(requeue_mail(), 0)
+            # ...but an abandoned one is re-queued.
+            QueuedMail.objects.update(claimed_on=now - timedelta(seconds=61))
+            self.assertEqual(requeue_mail(), 1)
+        queued = QueuedMail.objects.get()
+        self.assertEqual(queued.status, QueuedMail.STATUS_QUEUED)
+        self.assertEqual(send_queued_mail(), (1, 0))
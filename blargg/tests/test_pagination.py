@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from datetime import datetime
+from string import ascii_letters
+from random import choice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sites.models import Site
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from ..models import Entry
+from ..pagination import decode_cursor, encode_cursor, keyset_page
+
+
+def utc_datetime(*args):
+    value = datetime(*args)
+    if settings.USE_TZ:
+        value = timezone.make_aware(value, timezone.utc)
+    return value
+
+
+@override_settings(SITE_ID=1)
+@override_settings(ROOT_URLCONF='blargg.tests.urls')
+class TestKeysetPagination(TestCase):
+
+    def setUp(self):
+        username = ''.join([choice(ascii_letters) for i in range(10)])
+        User = get_user_model()
+        user = User.objects.create(
+            username=username,
+            password='{0}@example.com'.format(username)
+        )
+        site = Site.objects.get(pk=settings.SITE_ID)
+        for i in range(7):
+            Entry.objects.create(
+                site=site,
+                author=user,
+                title="Entry {0}".format(i),
+                raw_content="Content",
+                content_format="html",
+                published=True,
+            )
+        # Some Entries share a published_on time; the id breaks the tie.
+        titles = ["Entry 2", "Entry 3", "Entry 4"]
+        Entry.objects.filter(title__in=titles).update(
+            published_on=utc_datetime(2016, 1, 1)
+        )
+        self.entries = list(
+            Entry.objects.published().order_by('-published_on', '-pk')
+        )
+
+    def test_cursor(self):
+        value = utc_datetime(2016, 1, 2, 3, 4, 5, 6)
+        cursor = encode_cursor(value, 42)
+        self.assertEqual(decode_cursor(cursor), (True, value, 42))
+        cursor = encode_cursor(value, 42, forward=False)
+        self.assertEqual(decode_cursor(cursor), (False, value, 42))
+        for cursor in ('', 'nonsense', encode_cursor(value, 42)[:-2]):
+            with self.assertRaises(ValueError):
+                decode_cursor(cursor)
+
+    def test_pages(self):
+        entries = Entry.objects.published()
+        pages = []
+        cursor = None
+        while True:
+            # Every page is a single query, however deep it is.
+            with self.assertNumQueries(1):
+                page = keyset_page(entries, cursor, 2)
+            pages.append(list(page))
+            if not page.has_next():
+                break
+            cursor = page.next_cursor
+        self.assertEqual(len(pages), 4)
+        self.assertEqual(sum(pages, []), self.entries)
+        self.assertTrue(page.has_previous())
+        self.assertIsNone(page.next_cursor)
+
+        # ...and back again.
+        page = keyset_page(entries, page.previous_cursor, 2)
+        self.assertEqual(list(page), pages[2])
+        self.assertTrue(page.has_next())
+        self.assertTrue(page.has_previous())
+
+    def test_first_page(self):
+        entries = Entry.objects.published()
+        page = keyset_page(entries, None, 3)
+        self.assertEqual(list(page), self.entries[:3])
+        self.assertFalse(page.has_previous())
+        self.assertIsNone(page.previous_cursor)
+
+        # Going back past the first page gives the (full) first page.
+        second = keyset_page(entries, page.next_cursor, 3)
+        cursor = encode_cursor(
+            self.entries[1].published_on, self.entries[1].pk, forward=False
+        )
+        page = keyset_page(entries, cursor, 3)
+        self.assertEqual(list(page), self.entries[:3])
+        self.assertFalse(page.has_previous())
+        self.assertTrue(page.has_next())
+        self.assertEqual(list(second), self.entries[3:6])
@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Query budgets for blargg's public pages. Each page declares the most queries
+it may run, and must run the same number however many Entries it lists; a page
+that goes over (e.g. because a template started following a relation for each
+Entry) fails here.
+
+"""
+from string import ascii_letters
+from random import choice
+
+from django.contrib.auth import get_user_model
+from django.contrib.sites.models import Site
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from ..cache import get_cache
+from ..feeds import AtomEntriesFeed, RSSEntriesFeed
+from ..models import Entry
+
+
+# The most queries each page may run.
+QUERY_BUDGETS = {
+    'list_entries': 3,
+    'list_tags': 2,
+    'tagged_entry_list': 1,
+    'entry_detail': 3,
+    'entry_detail_with_date': 3,
+    'entry_archive_year': 7,
+    'entry_archive_month': 8,
+    'entry_archive_day': 4,
+    'search': 5,
+    'rss_feed': 2,
+    'atom_feed': 2,
+    'sitemap_index': 2,
+    'sitemap': 2,
+}
+
+
+@override_settings(SITE_ID=1)
+@override_settings(ROOT_URLCONF='blargg.tests.urls')
+class TestQueryBudgets(TestCase):
+
+    def setUp(self):
+        username = ''.join([choice(ascii_letters) for i in range(10)])
+        User = get_user_model()
+        self.user = User.objects.create(
+            username=username,
+            password='{0}@example.com'.format(username)
+        )
+        # Like a running site, look the current Site up just once.
+        Site.objects.clear_cache()
+        self.site = Site.objects.get_current()
+        self.entry = self.create_entries(1)[0]
+
+    def create_entries(self, count):
+        start = Entry.objects.count()
+        entries = []
+        for i in range(start, start + count):
+            entry = Entry(
+                site=self.site,
+                author=self.user,
+                title="Test Entry {0}".format(i),
+                raw_content="Test Content {0}".format(i),
+                content_format="html",
+                tag_string="foo, bar, tag{0}".format(i),
+                published=True,
+            )
+            entry.save()
+            entries.append(entry)
+        return entries
+
+    def get_paths(self):
+        d = Entry.objects.get(pk=self.entry.pk).archive_date
+        year, month, day = d.strftime("%Y"), d.strftime("%m"), d.strftime("%d")
+        return {
+            'list_entries': reverse('blargg:list_entries'),
+            'list_tags': reverse('blargg:list_tags'),
+            'tagged_entry_list': reverse(
+                'blargg:tagged_entry_list', args=['foo']
+            ),
+            'entry_detail': self.entry.get_absolute_url(),
+            'entry_detail_with_date': reverse(
+                'blargg:entry_detail', args=[year, month, day, self.entry.slug]
+            ),
+            'entry_archive_year': reverse(
+                'blargg:entry_archive_year', args=[year]
+            ),
+            'entry_archive_month': reverse(
+                'blargg:entry_archive_month', args=[year, month]
+            ),
+            'entry_archive_day': reverse(
+                'blargg:entry_archive_day', args=[year, month, day]
+            ),
+            'search': '{0}?q=test+content'.format(reverse('blargg:search')),
+            'sitemap_index': '/sitemap.xml',
+            'sitemap': '/sitemap-blog.xml',
+        }
+
+    def count_queries(self):
+        """Requests each page once, and returns the number of queries each
+        ran. The cache is cleared before each request: ``TestCase`` never
+        commits, so saving Entries doesn't invalidate what's cached, and a
+        cached page would run no queries at all."""
+        counts = {}
+        for name, path in self.get_paths().items():
+            get_cache().clear()
+            with CaptureQueriesContext(connection) as queries:
+                resp = self.client.get(path)
+                if resp.streaming:
+                    b''.join(resp.streaming_content)
+            self.assertEqual(resp.status_code, 200, path)
+            counts[name] = len(queries)
+
+        feeds = {'rss_feed': RSSEntriesFeed, 'atom_feed': AtomEntriesFeed}
+        for name, feed in feeds.items():
+            request = RequestFactory().get('/feeds/{0}/'.format(name))
+            get_cache().clear()
+            with CaptureQueriesContext(connection) as queries:
+                resp = feed()(request)
+            self.assertEqual(resp.status_code, 200, name)
+            counts[name] = len(queries)
+        return counts
+
+    def test_budgets(self):
+        counts = self.count_queries()
+        self.assertEqual(set(counts), set(QUERY_BUDGETS))
+        for name, count in counts.items():
+            self.assertLessEqual(
+                count, QUERY_BUDGETS[name],
+                "{0} ran {1} queries (budget: {2})".format(
+                    name, count, QUERY_BUDGETS[name]
+                )
+            )
+
+    def test_constant_queries(self):
+        """Pages run as many queries for a dozen Entries as they do for
+        one."""
+        before = self.count_queries()
+        self.create_entries(11)
+        self.assertEqual(self.count_queries(), before)
@@ -0,0 +1,109 @@
+"""
+Checks that the hot queries use blargg's indexes, using SQLite's
+``EXPLAIN QUERY PLAN``.
+
+"""
+import re
+
+from datetime import datetime
+from unittest import skipUnless
+
+from django.db import connection
+from django.db.models import Q
+from django.test import TestCase, override_settings
+
+from ..models import Entry, EntryWordCount, Tag
+from ..search import postings
+
+
+@skipUnless(connection.vendor == 'sqlite', "Query plans are SQLite's")
+@override_settings(ROOT_URLCONF='blargg.tests.urls')
+class TestQueryPlans(TestCase):
+
+    def explain(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+            return "\n".join(row[-1] for row in cursor.fetchall())
+
+    def index_name(self, table, columns):
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(
+                cursor, table
+            )
+        for name, info in constraints.items():
+            if info['index'] and info['columns'] == columns:
+                return name
+        self.fail("No index on {0} {1}".format(table, columns))
+
+    def assertUsesIndex(self, queryset, table, columns):
+        plan = self.explain(queryset)
+        self.assertIn(self.index_name(table, columns), plan)
+        return plan
+
+    def assertUsesPublishedIndex(self, queryset, sorts_ties=False):
+        """Checks that the composite index on published Entries is the only
+        index used, and (unless ``sorts_ties``) that it orders the rows; i.e.
+        there's no sort at all."""
+        name = self.index_name(
+            Entry._meta.db_table,
+            ['published', 'render_status', 'published_on', 'id']
+        )
+        plan = self.explain(queryset)
+        used = re.findall(r'USING (?:COVERING )?INDEX (\w+)', plan)
+        self.assertEqual(used, [name])
+        if not sorts_ties:
+            self.assertNotIn("TEMP B-TREE", plan)
+        return plan
+
+    def test_published(self):
+        # Feeds, and everything else using ``Entry.Meta.ordering``. Its
+        # ``title`` tie-break isn't in the index (so it can't cover that
+        # ordering): only Entries published at the same moment get sorted,
+        # never the whole table.
+        plan = self.assertUsesPublishedIndex(
+            Entry.objects.published(), sorts_ties=True
+        )
+        sorts = [line for line in plan.splitlines() if "TEMP B-TREE" in line]
+        self.assertEqual(sorts, ["USE TEMP B-TREE FOR RIGHT PART OF ORDER BY"])
+
+    def test_published_by_date(self):
+        # Pages of the index (see ``blargg.pagination``)
+        entries = Entry.objects.published().order_by('-published_on', '-pk')
+        self.assertUsesPublishedIndex(entries)
+
+    def test_latest(self):
+        # The latest Entries
+        entries = Entry.objects.published().order_by('-published_on')[:1]
+        self.assertUsesPublishedIndex(entries)
+
+    def test_archive(self):
+        # Year, month, and day archives
+        entries = Entry.objects.published().filter(
+            published_on__gte=datetime(2016, 1, 1),
+            published_on__lt=datetime(2017, 1, 1),
+        )
+        self.assertUsesPublishedIndex(entries)
+
+    def test_keyset_page(self):
+        # A later page of the index (see ``blargg.pagination``)
+        entries = Entry.objects.published().filter(
+            Q(published_on__lt=datetime(2016, 1, 1)) |
+            Q(published_on=datetime(2016, 1, 1), pk__lt=10)
+        ).order_by('-published_on', '-pk')[:11]
+        self.assertUsesPublishedIndex(entries)
+
+    def test_tagged_entries(self):
+        through = Entry.tags.through
+        tags = Tag.objects.filter(slug__in=['foo', 'bar'])
+        entries = through.objects.filter(tag__in=tags).values('entry_id')
+        self.assertUsesIndex(
+            entries, through._meta.db_table, ['tag_id', 'entry_id']
+        )
+
+    def test_search_postings(self):
+        # Search reads only the postings for its words
+        self.assertUsesIndex(
+            postings(['foo', 'bar']), EntryWordCount._meta.db_table,
+            ['word', 'entry_id', 'count']
+        )
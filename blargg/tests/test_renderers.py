@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import os
+import subprocess
+import sys
+
+from unittest import skipUnless
+
+try:
+    from unittest.mock import Mock, patch
+except ImportError:
+    from mock import Mock, patch
+
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase
+
+from ..renderers import (
+    MarkdownRenderer, Renderer, content_format_choices, get_renderer, render
+)
+from ..signals import blargg_settings
+
+
+class UpperRenderer(Renderer):
+    version = 'upper-1'
+
+    def render(self, raw_content):
+        return raw_content.upper()
+
+
+class MissingRenderer(Renderer):
+
+    def render(self, raw_content):
+        from ..renderers import _import
+        return _import('no_such_renderer_library', 'Missing').render()
+
+
+RENDERERS = [
+    ('html', 'HTML', 'blargg.renderers.HTMLRenderer'),
+    ('up', 'Upper', 'blargg.tests.test_renderers.UpperRenderer'),
+    ('miss', 'Missing', MissingRenderer),
+]
+
+
+class TestRenderers(TestCase):
+
+    def test_render(self):
+        self.assertEqual(render('html', '<p>Hi</p>'), '<p>Hi</p>')
+        self.assertEqual(render('rst', 'Hi *there*').strip(),
+                         '<p>Hi <em>there</em></p>')
+        self.assertEqual(render('md', 'Hi *there*').strip(),
+                         '<p>Hi <em>there</em></p>')
+        # Unknown formats are assumed to be HTML.
+        self.assertEqual(render('nope', '<p>Hi</p>'), '<p>Hi</p>')
+        self.assertIsNone(get_renderer('nope'))
+
+    def test_reused(self):
+        self.assertIs(get_renderer('rst'), get_renderer('rst'))
+        renderer = get_renderer('md')
+        self.assertIsInstance(renderer, MarkdownRenderer)
+        render('md', 'One[^1]\n\n[^1]: A note')
+        md = renderer._local.md
+        # The same Markdown instance, with nothing left from the last render.
+        self.assertEqual(render('md', 'Two').strip(), '<p>Two</p>')
+        self.assertIs(renderer._local.md, md)
+
+    def test_versions(self):
+        self.assertIsNone(get_renderer('html').version)
+        self.assertTrue(get_renderer('rst').version.startswith('docutils-'))
+        self.assertTrue(get_renderer('md').version.startswith('markdown-'))
+
+    def test_setting(self):
+        with patch.dict(blargg_settings, {'renderers': RENDERERS}):
+            self.assertEqual(
+                content_format_choices(),
+                (('html', 'HTML'), ('up', 'Upper'), ('miss', 'Missing'))
+            )
+            self.assertEqual(render('up', 'hi'), 'HI')
+            self.assertEqual(get_renderer('up').version, 'upper-1')
+            # rst isn't configured, so it's treated as HTML.
+            self.assertEqual(render('rst', 'Hi *there*'), 'Hi *there*')
+            with self.assertRaises(RuntimeError) as raised:
+                render('miss', 'hi')
+            self.assertIn(
+                "Install no_such_renderer_library", str(raised.exception)
+            )
+
+    def test_setting_format_length(self):
+        renderers = [('html5', 'HTML5', 'blargg.renderers.HTMLRenderer')]
+        with patch.dict(blargg_settings, {'renderers': renderers}):
+            with self.assertRaises(ImproperlyConfigured):
+                content_format_choices()
+            with self.assertRaises(ImproperlyConfigured):
+                render('html5', 'hi')
+
+    def test_timed(self):
+        hook = Mock()
+        enabled = {'instrumentation': True, 'instrumentation_hooks': [hook]}
+        with patch.dict(blargg_settings, enabled):
+            render('rst', 'Timed')
+        self.assertEqual(hook.call_args[0][0], 'render.rst')
+
+    @skipUnless("DJANGO_SETTINGS_MODULE" in os.environ,
+                "Needs a settings module")
+    def test_lazy_import(self):
+        # Loading blargg's models doesn't import the renderers' libraries.
+        code = (
+            "import sys, django; django.setup(); import blargg.models; "
+            "sys.stdout.write(repr(sorted(m for m in sys.modules "
+            "if m.split('.')[0] in ('docutils', 'markdown'))))"
+        )
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+        output = subprocess.check_output([sys.executable, '-c', code], env=env)
+        self.assertEqual(output.decode('utf-8'), '[]')
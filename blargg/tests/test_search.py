@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from string import ascii_letters
+from random import choice
+
+try:
+    from unittest.mock import patch
+except ImportError:
+    from mock import patch
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sites.models import Site
+from django.core.urlresolvers import reverse
+from django.test import TestCase, override_settings
+
+from ..models import Entry
+from ..search import SearchResults, rank_entries, search_terms
+from ..signals import blargg_settings
+
+
+@override_settings(SITE_ID=1)
+@override_settings(ROOT_URLCONF='blargg.tests.urls')
+class TestSearch(TestCase):
+
+    def setUp(self):
+        username = ''.join([choice(ascii_letters) for i in range(10)])
+        User = get_user_model()
+        self.user = User.objects.create(
+            username=username,
+            password='{0}@example.com'.format(username)
+        )
+        self.cats = self.create_entry(
+            "Cats", "<p>Cats, cats and more cats.</p>"
+        )
+        self.pets = self.create_entry("Pets", "<p>Cats and dogs.</p>")
+        self.dogs = self.create_entry("Dogs", "<p>Dogs and more dogs.</p>")
+
+    def create_entry(self, title, content, published=True):
+        return Entry.objects.create(
+            site=Site.objects.get(pk=settings.SITE_ID),
+            author=self.user,
+            title=title,
+            raw_content=content,
+            content_format="html",
+            published=published,
+        )
+
+    def search(self, query):
+        return list(SearchResults(search_terms(query))[:10])
+
+    def test_search_terms(self):
+        self.assertEqual(search_terms("Cats & <b>DOGS</b>, cats!"),
+                         ["cats", "dogs"])
+        self.assertEqual(search_terms("  "), [])
+
+    def test_ranked(self):
+        # The Entry that uses "cats" most comes first.
+        self.assertEqual(self.search("cats"), [self.cats, self.pets])
+        results = self.search("cats")
+        self.assertTrue(results[0].search_rank > results[1].search_rank)
+
+        # Results use all the words.
+        self.assertEqual(self.search("cats dogs"), [self.pets])
+        self.assertEqual(self.search("cats missing"), [])
+        self.assertEqual(self.search(""), [])
+
+    def test_rarer_words_rank_higher(self):
+        def rank(word):
+            ranks = dict(
+                (row['entry'], row['rank']) for row in rank_entries([word])
+            )
+            return ranks[self.cats.pk]
+
+        # "Cats" uses "and" and "more" once each, but "and" is used by more
+        # Entries, so counts for less.
+        self.assertTrue(rank("more") > rank("and") > 0)
+
+    def test_published_only(self):
+        draft = self.create_entry("Draft", "<p>Cats.</p>", published=False)
+        self.assertNotIn(draft, self.search("cats"))
+
+        # Publishing (or unpublishing) changes the results straight away.
+        Entry.objects.filter(pk=draft.pk).publish()
+        self.assertIn(draft, self.search("cats"))
+        Entry.objects.filter(pk=self.cats.pk).unpublish()
+        self.assertNotIn(self.cats, self.search("cats"))
+
+        # As does editing an Entry.
+        self.pets.raw_content = "<p>Just dogs.</p>"
+        self.pets.save()
+        self.assertEqual(self.search("cats"), [draft])
+
+    def test_view(self):
+        url = reverse('blargg:search')
+        with patch.dict(blargg_settings, {'entries_paginate_by': 1}):
+            resp = self.client.get(url, {'q': 'Cats'})
+            self.assertEqual(resp.status_code, 200)
+            self.assertTemplateUsed(resp, "blargg/entry_search.html")
+            self.assertEqual(resp.context['terms'], ['cats'])
+            self.assertEqual(list(resp.context['entries']), [self.cats])
+            self.assertTrue(resp.context['is_paginated'])
+
+            resp = self.client.get(url, {'q': 'Cats', 'page': 2})
+            self.assertEqual(list(resp.context['entries']), [self.pets])
+
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(list(resp.context['entries']), [])
@@ -1,14 +1,26 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
+import gzip
+import os
+import shutil
+import tempfile
+
 from string import ascii_letters
 from random import choice
 
+try:
+    from unittest.mock import patch
+except ImportError:
+    from mock import patch
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.sites.models import Site
+from django.core.management import call_command
 from django.test import TestCase, override_settings
 
 from ..models import Entry
+from ..signals import blargg_settings
 
 
 @override_settings(SITE_ID=1)
@@ -42,3 +54,65 @@ class TestEntrySitemap(TestCase):
         resp = self.client.get('/sitemap-blog.xml')
         self.assertEqual(resp.status_code, 200)
         self.assertContains(resp, self.entry.get_absolute_url())
+
+    def test_sitemap_blog_streamed(self):
+        resp = self.client.get('/sitemap-blog.xml')
+        self.assertTrue(resp.streaming)
+        self.assertContains(resp, '<lastmod>')
+
+    def test_django_sitemap_view(self):
+        # EntrySitemap also works with Django's (non-streaming) view
+        resp = self.client.get('/django-sitemap-blog.xml')
+        self.assertEqual(resp.status_code, 200)
+        self.assertContains(resp, self.entry.get_absolute_url())
+
+    def test_sitemap_sections(self):
+        other = Entry.objects.create(
+            site=self.entry.site,
+            author=self.entry.author,
+            title="Other Entry",
+            raw_content="Other Content",
+            published=True,
+        )
+        with patch.dict(blargg_settings, {'sitemap_limit': 1}):
+            resp = self.client.get('/sitemap.xml')
+            self.assertContains(resp, 'sitemap-blog.xml?p=2')
+
+            resp = self.client.get('/sitemap-blog.xml?p=2')
+            self.assertEqual(resp.status_code, 200)
+            content = b''.join(resp.streaming_content).decode('utf-8')
+            self.assertEqual(content.count('<url>'), 1)
+            self.assertIn(other.get_absolute_url(), content)
+            self.assertNotIn(self.entry.get_absolute_url(), content)
+
+            resp = self.client.get('/sitemap-blog.xml?p=3')
+            self.assertEqual(resp.status_code, 404)
+
+    def test_write_sitemaps(self):
+        Entry.objects.create(
+            site=self.entry.site,
+            author=self.entry.author,
+            title="Other Entry",
+            raw_content="Other Content",
+            published=True,
+        )
+        output = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, output)
+        with patch.dict(blargg_settings, {'sitemap_limit': 1}):
+            call_command(
+                'write_sitemaps', output,
+                base_url='https://example.com/',
+                verbosity=0
+            )
+
+        self.assertEqual(
+            sorted(os.listdir(output)),
+            ['sitemap-blog-2.xml.gz', 'sitemap-blog.xml.gz', 'sitemap.xml.gz']
+        )
+        with gzip.open(os.path.join(output, 'sitemap.xml.gz')) as f:
+            index = f.read().decode('utf-8')
+        # The index lists the (gzipped) files that were written.
+        self.assertIn('https://example.com/sitemap-blog.xml.gz', index)
+        self.assertIn('https://example.com/sitemap-blog-2.xml.gz', index)
+        with gzip.open(os.path.join(output, 'sitemap-blog.xml.gz')) as f:
+            self.assertIn(self.entry.get_absolute_url(), f.read().decode('utf-8'))
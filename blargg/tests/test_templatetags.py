@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from datetime import date
+from string import ascii_letters
+from random import choice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sites.models import Site
+from django.template import Context, Template
+from django.test import TransactionTestCase, override_settings
+
+from ..models import ArchiveDate, Entry
+
+
+@override_settings(SITE_ID=1)
+@override_settings(ROOT_URLCONF='blargg.tests.urls')
+class TestArchiveTags(TransactionTestCase):
+    # The cached archive years are invalidated when a save commits, so these
+    # tests need real commits.
+
+    def setUp(self):
+        username = ''.join([choice(ascii_letters) for i in range(10)])
+        User = get_user_model()
+        user = User.objects.create(
+            username=username,
+            password='{0}@example.com'.format(username)
+        )
+        self.entry = Entry(
+            site=Site.objects.get(pk=settings.SITE_ID),
+            author=user,
+            title="Test Entry",
+            raw_content="Test Content",
+            content_format="html",
+        )
+        self.entry.publish()  # Calls save
+
+    def render(self, content):
+        template = Template("{% load blargg_tags %}" + content)
+        return template.render(Context())
+
+    def test_entry_archive_year_url(self):
+        year = self.entry.archive_date.year
+        self.assertEqual(
+            self.render("{% entry_archive_year_url %}"),
+            "/blog/{0}/".format(year)
+        )
+
+        # Cached until the calendar changes
+        with self.assertNumQueries(0):
+            self.render("{% entry_archive_year_url %}")
+        ArchiveDate.objects.add_entries(date(year + 1, 1, 1), 1)
+        self.assertEqual(
+            self.render("{% entry_archive_year_url %}"),
+            "/blog/{0}/".format(year + 1)
+        )
+
+    def test_entry_archive_year_url_unpublished(self):
+        self.entry.unpublish()
+        self.assertEqual(self.render("{% entry_archive_year_url %}"), "")
+
+    def test_entry_archive_years(self):
+        ArchiveDate.objects.add_entries(date(2001, 2, 3), 1)
+        content = self.render("{% entry_archive_years %}")
+        year = self.entry.archive_date.year
+        self.assertIn('<a href="/blog/{0}/">{0}</a> (1)'.format(year), content)
+        self.assertIn('<a href="/blog/2001/">2001</a> (1)', content)
+        self.assertLess(content.index(str(year)), content.index('2001'))
+
+    def test_related_entries(self):
+        other = Entry.objects.create(
+            site=self.entry.site,
+            author=self.entry.author,
+            title="Related Entry",
+            raw_content="Test Content",
+            content_format="html",
+            tag_string="foo",
+            published=True,
+        )
+        self.entry.tag_string = "foo"
+        self.entry.save()
+        template = Template(
+            "{% load blargg_tags %}{% related_entries entry %}"
+        )
+        content = template.render(Context({'entry': self.entry}))
+        self.assertIn(
+            '<a href="{0}">Related Entry</a>'.format(other.get_absolute_url()),
+            content
+        )
+        content = template.render(Context({'entry': other}))
+        self.assertIn("Test Entry", content)
@@ -1,15 +1,22 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
+from datetime import date
 from string import ascii_letters
 from random import choice
 
+try:
+    from unittest.mock import patch
+except ImportError:
+    from mock import patch
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.sites.models import Site
 from django.core.urlresolvers import reverse
-from django.test import TestCase, override_settings
+from django.test import TestCase, TransactionTestCase, override_settings
 
-from ..models import Tag, Entry
+from ..models import ArchiveDate, ArchiveWordCount, Tag, Entry
+from ..signals import blargg_settings
 
 
 @override_settings(SITE_ID=1)
@@ -30,6 +37,7 @@ class TestViews(TestCase):
             author=user,
             title="Test Entry",
             raw_content="Test Content",
+            content_format="html",
             tag_string="foo, bar"
         )
         self.entry.publish()  # Calls .save()
@@ -51,6 +59,71 @@ class TestViews(TestCase):
         self.assertIn('object_list', resp.context)
         self.assertEqual(len(resp.context['object_list']), 1)
 
+    def test_tagged_entry_list_all_or_any(self):
+        other = Entry(
+            site=self.entry.site,
+            author=self.entry.author,
+            title="Other Entry",
+            raw_content="Other Content",
+            content_format="html",
+            tag_string="foo, baz"
+        )
+        other.publish()
+
+        def tagged(tags):
+            url = reverse('blargg:tagged_entry_list', args=[tags])
+            resp = self.client.get(url)
+            return sorted(e.title for e in resp.context['object_list'])
+
+        self.assertEqual(tagged('foo'), ["Other Entry", "Test Entry"])
+        self.assertEqual(tagged('foo+bar'), ["Test Entry"])
+        self.assertEqual(tagged('bar+baz'), [])
+        self.assertEqual(tagged('foo+missing'), [])
+        self.assertEqual(tagged('bar,baz'), ["Other Entry", "Test Entry"])
+        self.assertEqual(tagged('bar,missing'), ["Test Entry"])
+
+    def test_tagged_entry_list_paginated(self):
+        other = Entry.objects.create(
+            site=self.entry.site,
+            author=self.entry.author,
+            title="Other Entry",
+            raw_content="Other Content",
+            content_format="html",
+            tag_string="foo",
+            published=True,
+        )
+        url = reverse('blargg:tagged_entry_list', args=[self.tag.slug])
+        with patch.dict(blargg_settings, {'entries_paginate_by': 1}):
+            resp = self.client.get(url)
+            page = resp.context['page_obj']
+            self.assertEqual(list(resp.context['object_list']), [other])
+            self.assertTrue(resp.context['is_paginated'])
+            self.assertFalse(page.has_previous())
+
+            resp = self.client.get(url, {'cursor': page.next_cursor})
+            page = resp.context['page_obj']
+            self.assertEqual(list(resp.context['object_list']), [self.entry])
+            self.assertFalse(page.has_next())
+
+            resp = self.client.get(url, {'cursor': page.previous_cursor})
+            self.assertEqual(list(resp.context['object_list']), [other])
+
+            resp = self.client.get(url, {'cursor': 'nonsense'})
+            self.assertEqual(resp.status_code, 404)
+
+    def test_tagged_entry_list_drafts(self):
+        Entry.objects.create(
+            site=self.entry.site,
+            author=self.entry.author,
+            title="Draft Entry",
+            raw_content="Draft Content",
+            content_format="html",
+            tag_string="foo",
+        )
+        url = reverse('blargg:tagged_entry_list', args=[self.tag.slug])
+        resp = self.client.get(url)
+        self.assertEqual(list(resp.context['object_list']), [self.entry])
+
     def test_entry_archive_day(self):
         # NOTE: Entries are stored in UTC and the EntryDayArchiveView converts
         # dates to the local timezone (if USE_TZ=True).
@@ -83,6 +156,56 @@ class TestViews(TestCase):
         self.assertEqual(len(resp.context['date_list']), 1)
         self.assertTemplateUsed("blargg/entry_archive_year.html")
 
+    def test_entry_archive_year_navigation(self):
+        # Dates & navigation come from the archive calendar
+        ArchiveDate.objects.add_entries(date(2001, 2, 3), 1)
+        d = self.entry.archive_date
+        url = reverse('blargg:entry_archive_year', args=[d.strftime("%Y")])
+        resp = self.client.get(url)
+        self.assertEqual(resp.context['date_list'], [date(d.year, d.month, 1)])
+        self.assertEqual(resp.context['previous_year'], date(2001, 1, 1))
+        self.assertIsNone(resp.context['next_year'])
+
+        url = reverse('blargg:entry_archive_year', args=['2001'])
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context['date_list'], [date(2001, 2, 1)])
+        self.assertEqual(resp.context['next_year'], date(d.year, 1, 1))
+
+        url = reverse('blargg:entry_archive_year', args=['2002'])
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 404)
+
+    def test_entry_archive_year_stats(self):
+        y = self.entry.published_on.strftime("%Y")
+        url = reverse('blargg:entry_archive_year', args=[y])
+        resp = self.client.get(url)
+        self.assertEqual(resp.context['total_words'], 2)
+        self.assertEqual(
+            sorted(resp.context['most_common']),
+            [('content', 1), ('test', 1)]
+        )
+
+    def test_entry_archive_year_stats_cached(self):
+        y = self.entry.published_on.strftime("%Y")
+        url = reverse('blargg:entry_archive_year', args=[y])
+        stats = ArchiveWordCount.objects.stats
+        with patch.object(ArchiveWordCount.objects, 'stats',
+                          wraps=stats) as mock_stats:
+            self.client.get(url)
+            self.client.get(url)
+            self.assertEqual(mock_stats.call_count, 1)
+
+            # Editing an Entry in the period invalidates them
+            self.entry.raw_content = "Edited Content"
+            self.entry.save()
+            resp = self.client.get(url)
+            self.assertEqual(mock_stats.call_count, 2)
+        self.assertEqual(
+            sorted(resp.context['most_common']),
+            [('content', 1), ('edited', 1)]
+        )
+
     def test_entry_detail_with_date(self):
         y, m, d = self.entry.published_on.strftime("%Y-%m-%d").split("-")
         url = reverse('blargg:entry_detail', args=[y, m, d, self.entry.slug])
@@ -100,6 +223,64 @@ class TestViews(TestCase):
         self.assertIsInstance(resp.context['object'], Entry)
         self.assertTemplateUsed("blargg/entry_detail.html")
 
+    def test_entry_detail_conditional_get(self):
+        url = reverse('blargg:entry_detail', args=[self.entry.slug])
+        resp = self.client.get(url)
+        self.assertTrue(resp.has_header('Last-Modified'))
+        etag = resp['ETag']
+
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+
+        # Saving the Entry changes its ETag
+        self.entry.save()
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp['ETag'], etag)
+
+    def test_entry_detail_related_entries(self):
+        other = Entry.objects.create(
+            site=self.entry.site,
+            author=self.entry.author,
+            title="Other Entry",
+            raw_content="Other Content",
+            content_format="html",
+            tag_string=self.entry.tag_string,
+        )
+        url = reverse('blargg:entry_detail', args=[self.entry.slug])
+        resp = self.client.get(url)
+        self.assertEqual(resp.context['related_entries'], [])
+        etag = resp['ETag']
+
+        # Publishing a related Entry changes the page (and its ETag).
+        other.publish()
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context['related_entries'], [other])
+        self.assertContains(resp, other.get_absolute_url())
+
+        # As does editing it, since its title is shown.
+        etag = resp['ETag']
+        other.title = "Renamed Entry"
+        other.save()
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertContains(resp, "Renamed Entry")
+
+    def test_entry_detail_cached(self):
+        url = reverse('blargg:entry_detail', args=[self.entry.slug])
+        with patch.dict(blargg_settings, {'entry_detail_cache_timeout': 60}):
+            self.assertContains(self.client.get(url), "Test Content")
+
+            # Only the ETag lookup is needed for a cached page...
+            with self.assertNumQueries(1):
+                self.assertContains(self.client.get(url), "Test Content")
+
+            # ...and saving the Entry invalidates it.
+            self.entry.raw_content = "New Content"
+            self.entry.save()
+            self.assertContains(self.client.get(url), "New Content")
+
     def test_list_entries(self):
         """Tests the ARchiveIndexView."""
         url = reverse('blargg:list_entries')
@@ -108,3 +289,82 @@ class TestViews(TestCase):
         self.assertIn('object_list', resp.context)
         self.assertEqual(len(resp.context['object_list']), 1)
         self.assertTemplateUsed("blargg/entry_list.html")
+        # The years come from the archive calendar.
+        d = self.entry.archive_date
+        self.assertEqual(resp.context['date_list'], [date(d.year, 1, 1)])
+
+    def test_list_entries_defer_content(self):
+        for url in [reverse('blargg:list_entries'),
+                    self.tag.get_absolute_url()]:
+            resp = self.client.get(url)
+            entry = resp.context['object_list'][0]
+            self.assertEqual(
+                entry.get_deferred_fields(),
+                set(['raw_content', 'rendered_content'])
+            )
+            # The stored excerpt is shown instead.
+            self.assertContains(resp, "<p>Test Content</p>")
+            self.assertContains(resp, "(1 minute read)")
+
+    def test_pending_entries_are_hidden(self):
+        entry = Entry(
+            site=self.entry.site,
+            author=self.entry.author,
+            title="Pending Entry",
+            raw_content="Pending *Content*",
+            content_format="rst",
+            tag_string="foo"
+        )
+        with patch.dict(blargg_settings, {'async_render': True}):
+            entry.save()
+        Entry.objects.filter(pk=entry.pk).update(
+            published=True,
+            published_on=self.entry.published_on
+        )
+
+        resp = self.client.get(reverse('blargg:entry_detail', args=[entry.slug]))
+        self.assertEqual(resp.status_code, 404)
+        resp = self.client.get(reverse('blargg:list_entries'))
+        self.assertEqual(list(resp.context['object_list']), [self.entry])
+        url = reverse('blargg:tagged_entry_list', args=[self.tag.slug])
+        resp = self.client.get(url)
+        self.assertEqual(list(resp.context['object_list']), [self.entry])
+
+
+@override_settings(SITE_ID=1)
+@override_settings(ROOT_URLCONF='blargg.tests.urls')
+class TestCachedTagList(TransactionTestCase):
+    # The cached tag list is invalidated when a save commits, so these tests
+    # need real commits.
+
+    def setUp(self):
+        User = get_user_model()
+        user = User.objects.create(
+            username='blargg',
+            password='blargg@example.com'
+        )
+        self.entry = Entry(
+            site=Site.objects.get(pk=settings.SITE_ID),
+            author=user,
+            title="Test Entry",
+            raw_content="Test Content",
+            content_format="html",
+            tag_string="foo, bar"
+        )
+        self.entry.publish()
+
+    def test_list_tags_cached(self):
+        url = reverse('blargg:list_tags')
+        with patch.dict(blargg_settings, {'tag_list_cache_timeout': 60}):
+            resp = self.client.get(url)
+            self.assertContains(resp, 'foo</a> (1)')
+
+            # Cached...
+            with self.assertNumQueries(0):
+                self.client.get(url)
+
+            # ...until the tag counts change.
+            self.entry.tag_string = "foo"
+            self.entry.save()
+            resp = self.client.get(url)
+            self.assertEqual(len(resp.context['object_list']), 1)
@@ -1,6 +1,6 @@
 from django.conf.urls import url, include
 from django.contrib.sitemaps import views as sitemaps_views
-from blargg.sitemaps import EntrySitemap
+from blargg.sitemaps import EntrySitemap, sitemap
 
 
 sitemaps = {
@@ -19,8 +19,13 @@ urlpatterns = [
     ),
     url(
         r'^sitemap-(?P<section>.+)\.xml$',
-        sitemaps_views.sitemap,
+        sitemap,
         {'sitemaps': sitemaps},
         name='sitemaps'
     ),
+    url(
+        r'^django-sitemap-(?P<section>.+)\.xml$',
+        sitemaps_views.sitemap,
+        {'sitemaps': sitemaps}
+    ),
 ]
@@ -1,18 +1,19 @@
 from django.conf.urls import url
-from django.views.generic import ArchiveIndexView
-from django.views.generic import ListView
 
-from .models import Entry, Tag
+from .views import EntryArchiveIndexView
 from .views import EntryDayArchiveView
 from .views import EntryDetailView
 from .views import EntryMonthArchiveView
+from .views import EntrySearchView
 from .views import EntryYearArchiveView
 from .views import TaggedEntryListView
+from .views import TagListView
 
 # URL examples
 # ------------
 # /blog/tags/                   -- tag list detail
 # /blog/tags/foo/               -- entries tagged with "foo"
+# /blog/search/?q=foo           -- entries that use the word "foo"
 # /blog/a-sample-entry/         -- entry detail
 # /blog/2013/01/05/             -- entry list (by year, month, day)
 # /blog/2013/01/                -- entry list (by year, month)
@@ -21,12 +22,13 @@ from .views import TaggedEntryListView
 # /blog/                        -- entry detail (latest published post)
 
 urlpatterns = [
-    url(r'^tags/$', ListView.as_view(model=Tag), name='list_tags'),
+    url(r'^tags/$', TagListView.as_view(), name='list_tags'),
     url(
         r'^tags/(?P<tag_slug>.*)/$',
         TaggedEntryListView.as_view(),
         name='tagged_entry_list'
     ),
+    url(r'^search/$', EntrySearchView.as_view(), name='search'),
 
     # Year, Month, Day Archives
     url(
@@ -56,13 +58,5 @@ urlpatterns = [
         EntryDetailView.as_view(),
         name='entry_detail'
     ),
-    url(
-        r'^$',
-        ArchiveIndexView.as_view(
-            model=Entry,
-            date_field='published_on',
-            paginate_by=10
-        ),
-        name='list_entries'
-    ),
+    url(r'^$', EntryArchiveIndexView.as_view(), name='list_entries'),
 ]
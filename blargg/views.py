@@ -1,84 +1,407 @@
+from datetime import date
+
+from django.db.models import Count, Max
+from django.db.models.query import QuerySet
+from django.http import Http404
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from django.views.generic import DetailView, ListView
+from django.views.generic import ArchiveIndexView
 from django.views.generic import DayArchiveView, MonthArchiveView
 from django.views.generic import YearArchiveView
+from django.views.generic.dates import timezone_today
 from django.views.generic.list import MultipleObjectMixin
 
-from .models import Entry, entry_stats
+from .cache import get_cache, get_generation, get_or_set_locked, make_key
+from .instrumentation import enabled as instrumentation_enabled, timed
+from .models import ArchiveDate, ArchiveWordCount, Entry, RelatedEntry, Tag
+from .models import entry_stats
+from .pagination import keyset_page
+from .search import SearchResults, search_terms
+from .signals import blargg_settings
+
+
+class CachedResponseMixin(object):
+    """Caches a View's rendered GET responses for the number of seconds in
+    the ``cache_timeout_setting`` setting (if that's non-zero). By default,
+    responses are keyed on the request's path and the current
+    ``cache_generation``, so bumping that generation invalidates all of them.
+
+    """
+    cache_generation = None
+    cache_timeout_setting = None
+
+    def get_cache_key(self, request, *args, **kwargs):
+        """Returns the key for the cached response; or ``None`` to skip the
+        cache for this request."""
+        return make_key(
+            'response',
+            get_generation(self.cache_generation),
+            request.get_full_path()
+        )
+
+    def get(self, request, *args, **kwargs):
+        timeout = blargg_settings.get(self.cache_timeout_setting, 0)
+        view = super(CachedResponseMixin, self)
+        key = timeout and self.get_cache_key(request, *args, **kwargs)
+        if not key:
+            return view.get(request, *args, **kwargs)
+
+        cache = get_cache()
+        response = cache.get(key)
+        if response is None:
+            response = view.get(request, *args, **kwargs)
+            response.add_post_render_callback(
+                lambda r: cache.set(key, r, timeout)
+            )
+        return response
+
+
+class QuerysetTimingMixin(object):
+    """Times how long a View takes to evaluate its queryset (as
+    ``'queryset'``), when instrumentation is on. A list's page of objects is
+    read before the template is rendered, rather than while it is."""
+
+    def get_object(self, queryset=None):
+        with timed('queryset'):
+            return super(QuerysetTimingMixin, self).get_object(queryset)
+
+    def get_context_data(self, **kwargs):
+        context = super(QuerysetTimingMixin, self).get_context_data(**kwargs)
+        object_list = context.get('object_list')
+        if instrumentation_enabled() and isinstance(object_list, QuerySet):
+            with timed('queryset'):
+                len(object_list)  # Fills its result cache
+        return context
+
+
+class KeysetPaginationMixin(object):
+    """Pages a View's ``Entry``'s newest first, by ``(published_on, id)``,
+    from the ``cursor`` in the query string rather than a page number (see
+    ``blargg.pagination``); so later pages cost the same as the first, and
+    there's no count. ``page_obj`` is a ``KeysetPage``, and there's no
+    ``paginator``."""
+    cursor_kwarg = 'cursor'
+
+    def get_paginate_by(self, queryset):
+        return blargg_settings.get('entries_paginate_by', 10)
+
+    def paginate_queryset(self, queryset, page_size):
+        cursor = self.request.GET.get(self.cursor_kwarg)
+        try:
+            with timed('queryset'):
+                page = keyset_page(queryset, cursor, page_size)
+        except ValueError:
+            raise Http404("Invalid cursor: {0}".format(cursor))
+        return (None, page, page.object_list, page.has_other_pages())
 
 
 class EntryStatsMixin(MultipleObjectMixin):
-    """This mixin will calculate entry stats (counting words) for a View's
-    queryset of objects."""
+    """This mixin will add entry stats (counting words) to a View's context.
+    For the date-based archives, these are read from the stored rollups for
+    the year, month, or day (and cached); otherwise they're aggregated from
+    the stored word counts of the View's queryset of objects."""
+
+    def get_stats_period(self, context):
+        """Returns a ``(year, month, day)`` tuple for the archive period in
+        the context (``month`` and ``day`` are 0 for larger periods), or
+        ``None`` if this isn't a date-based archive."""
+        if context.get('day'):
+            d = context['day']
+            return (d.year, d.month, d.day)
+        elif context.get('month'):
+            d = context['month']
+            return (d.year, d.month, 0)
+        elif context.get('year'):
+            return (context['year'].year, 0, 0)
+        return None
+
+    @timed('stats')
+    def get_period_stats(self, year, month=0, day=0):
+        """Returns the stats for an archive period. These are cached (for the
+        ``stats_cache_timeout`` setting), keyed on the number of Entries in
+        the period and the latest time one of them was updated; so they're
+        recomputed once an Entry in the period is published, edited, or
+        unpublished."""
+        timeout = blargg_settings.get('stats_cache_timeout', 86400)
+        if not timeout:
+            return ArchiveWordCount.objects.stats(year, month, day)
+
+        latest = Entry.objects.archived(year, month, day).aggregate(
+            count=Count('pk'),
+            updated_on=Max('updated_on')
+        )
+        key = make_key(
+            'stats',
+            get_generation('stats'),
+            year, month, day,
+            latest['count'],
+            latest['updated_on'],
+        )
+        return get_or_set_locked(
+            key,
+            lambda: ArchiveWordCount.objects.stats(year, month, day),
+            timeout
+        )
 
     def get_context_data(self, **kwargs):
         context = super(EntryStatsMixin, self).get_context_data(**kwargs)
 
-        # Calculate stats for the queryset of Entries & add to the context.
-        objects = context['object_list']
-        if not objects.exists() and 'date_list' in context and context['date_list']:
-            # EntryYearArchiveViews won't include any objects, so query for
-            # thos using the year
-            years = list(set(dt.year for dt in context['date_list']))
-            if len(years) > 0:
-                objects = Entry.objects.filter(published_on__year=years[0])
-
-        context.update(entry_stats(objects))
+        # Calculate stats for the period (or Entries) & add to the context.
+        period = self.get_stats_period(context)
+        if period is not None:
+            context.update(self.get_period_stats(*period))
+        else:
+            context.update(entry_stats(context['object_list']))
         return context
 
 
-class TaggedEntryListView(ListView):
+class TagListView(CachedResponseMixin, QuerysetTimingMixin, ListView):
+    """A tag cloud: the ``Tag``s used by published ``Entry``s, most used
+    first, with their ``entry_count``."""
+    cache_generation = 'tags'
+    cache_timeout_setting = 'tag_list_cache_timeout'
+    queryset = Tag.objects.cloud()
+
+    def get_paginate_by(self, queryset):
+        return blargg_settings.get('tag_list_paginate_by', 100)
+
+
+class TaggedEntryListView(KeysetPaginationMixin, QuerysetTimingMixin,
+                          ListView):
     """List all ``Entry``s that have the given ``Tag``(s). Mulitple ``Tag``s
     may be separated by a plus; For example: /blog/tags/foo+bar would retrieve
-    all ``Entry``s tagged with both "foo" and "bar".
+    all ``Entry``s tagged with both "foo" and "bar". Separate them with a
+    comma to retrieve ``Entry``s tagged with *either*; e.g. /blog/tags/foo,bar
 
     """
     allow_empty = True
     model = Entry
     tags = None
+    match_all = True
 
     def get_queryset(self):
-        tag_list = self.kwargs['tag_slug'].split('+')
-        self.tags = filter(lambda x: len(x) > 0, tag_list)
-        return Entry.objects.filter(tags__slug__in=self.tags).distinct()
+        tag_slug = self.kwargs['tag_slug']
+        self.match_all = ',' not in tag_slug
+        tag_list = tag_slug.split('+' if self.match_all else ',')
+        self.tags = [t for t in tag_list if len(t) > 0]
+        entries = Entry.objects.published().with_related().without_content()
+        return entries.tagged(self.tags, match_all=self.match_all)
 
     def get_context_data(self, **kwargs):
         context = super(TaggedEntryListView, self).get_context_data(**kwargs)
         context['tags'] = self.tags
+        context['match_all'] = self.match_all
         return context
 
 
-class EntryDetailView(DetailView):
-    """Detail for an ``Entry``."""
+def entry_last_modified(request, slug, **kwargs):
+    """The ``updated_on`` time of the requested ``Entry``, or the time its
+    related ``Entry``s (or the list of them) last changed if that's later;
+    this is only looked up once per request."""
+    if not hasattr(request, '_blargg_entry_updated_on'):
+        entries = Entry.objects.rendered().filter(slug=slug)
+        row = entries.values_list('updated_on').annotate(
+            related_on=Max('related_entries__created_on'),
+            related_updated_on=Max('related_entries__related__updated_on')
+        ).first()
+        request._blargg_entry_updated_on = row and max(
+            d for d in row if d is not None
+        )
+    return request._blargg_entry_updated_on
+
+
+def entry_etag(request, slug, **kwargs):
+    """An ETag for the requested ``Entry``, which changes whenever the
+    ``Entry`` is saved (or its related ``Entry``s change)."""
+    updated_on = entry_last_modified(request, slug)
+    if updated_on is not None:
+        return make_key('entry', slug, updated_on.isoformat())
+
+
+class EntryDetailView(CachedResponseMixin, QuerysetTimingMixin,
+                      DetailView):
+    """Detail for an ``Entry``. Responses include ETag and Last-Modified
+    headers (so revalidating clients get a 304 until the ``Entry`` changes)
+    and may be cached in full with the ``entry_detail_cache_timeout``
+    setting. The context includes the ``Entry``'s ``related_entries``."""
     model = Entry
+    queryset = Entry.objects.rendered().with_related()
     slug_field = 'slug'
+    cache_timeout_setting = 'entry_detail_cache_timeout'
+
+    def get_cache_key(self, request, *args, **kwargs):
+        # Saving an Entry changes its ETag, and so its key.
+        etag = entry_etag(request, **kwargs)
+        return etag and make_key('response', etag)
+
+    @method_decorator(condition(
+        etag_func=entry_etag,
+        last_modified_func=entry_last_modified
+    ))
+    def get(self, request, *args, **kwargs):
+        return super(EntryDetailView, self).get(request, *args, **kwargs)
+
+    def get_context_data(self, **kwargs):
+        context = super(EntryDetailView, self).get_context_data(**kwargs)
+        context['related_entries'] = RelatedEntry.objects.for_entry(
+            self.object
+        )
+        return context
 
 
 # Year, Month, Day Archives
 # -------------------------
 
-class EntryYearArchiveView(EntryStatsMixin, YearArchiveView):
-    queryset = Entry.objects.filter(published=True)
+class ArchiveCalendarMixin(object):
+    """Reads a date-based archive's ``date_list``, whether it's empty, and its
+    next & previous periods from the ``ArchiveDate`` calendar, rather than
+    querying ``Entry``s. Expects numeric year, month & day formats."""
+
+    def get_archive_period(self):
+        """Returns a ``(year, month, day)`` tuple for the requested period
+        (``month`` and ``day`` are 0 for larger periods)."""
+        year = int(self.get_year())
+        month = int(self.get_month()) if hasattr(self, 'get_month') else 0
+        day = int(self.get_day()) if hasattr(self, 'get_day') else 0
+        return (year, month, day)
+
+    def get_dated_queryset(self, **lookup):
+        """Like Django's, but checks the calendar for an empty period (rather
+        than loading the period's objects)."""
+        qs = self.get_queryset().filter(**lookup)
+        if not self.get_allow_future():
+            if self.uses_datetime_field:
+                now = timezone.now()
+            else:
+                now = timezone_today()
+            qs = qs.filter(**{'%s__lte' % self.get_date_field(): now})
+
+        if not self.get_allow_empty():
+            period = self.get_archive_period()
+            if not ArchiveDate.objects.entry_count(*period):
+                raise Http404("No entries available")
+        return qs
+
+    def get_date_list(self, queryset, date_type=None, ordering='ASC'):
+        """The months of the year (or days of the month) with entries."""
+        year, month, day = self.get_archive_period()
+        date_list = ArchiveDate.objects.date_list(year, month)
+        if not date_list and not self.get_allow_empty():
+            raise Http404("No entries available")
+        if ordering == 'DESC':
+            date_list.reverse()
+        return date_list
+
+    def get_adjacent_period(self, date, period, previous):
+        """Returns the first day of the next (or ``previous``) year, month or
+        day with entries; unless empty periods are allowed, in which case it's
+        simply the adjacent period (as Django would)."""
+        if self.get_allow_empty():
+            name = 'get_{0}_{1}'.format(
+                'previous' if previous else 'next', period
+            )
+            return getattr(super(ArchiveCalendarMixin, self), name)(date)
+
+        year = date.year
+        month = date.month if period in ('month', 'day') else 0
+        day = date.day if period == 'day' else 0
+        result = ArchiveDate.objects.adjacent(year, month, day, previous)
+        if result and not previous and not self.get_allow_future():
+            if result > timezone_today():
+                return None
+        return result
+
+    def get_next_year(self, date):
+        return self.get_adjacent_period(date, 'year', previous=False)
+
+    def get_previous_year(self, date):
+        return self.get_adjacent_period(date, 'year', previous=True)
+
+    def get_next_month(self, date):
+        return self.get_adjacent_period(date, 'month', previous=False)
+
+    def get_previous_month(self, date):
+        return self.get_adjacent_period(date, 'month', previous=True)
+
+    def get_next_day(self, date):
+        return self.get_adjacent_period(date, 'day', previous=False)
+
+    def get_previous_day(self, date):
+        return self.get_adjacent_period(date, 'day', previous=True)
+
+
+class EntryYearArchiveView(ArchiveCalendarMixin, EntryStatsMixin,
+                           QuerysetTimingMixin, YearArchiveView):
+    queryset = Entry.objects.published().with_related().without_content()
     date_field = "published_on"
     year_format = '%Y'
     template_name = "blargg/entry_archive_year.html"
 
 
-class EntryMonthArchiveView(EntryStatsMixin, MonthArchiveView):
-    queryset = Entry.objects.filter(published=True)
+class EntryMonthArchiveView(ArchiveCalendarMixin, EntryStatsMixin,
+                            KeysetPaginationMixin, QuerysetTimingMixin,
+                            MonthArchiveView):
+    queryset = Entry.objects.published().with_related().without_content()
     date_field = "published_on"
     year_format = '%Y'
     month_format = "%m"
     template_name = "blargg/entry_archive_month.html"
 
 
-class EntryDayArchiveView(EntryStatsMixin, DayArchiveView):
+class EntryDayArchiveView(ArchiveCalendarMixin, EntryStatsMixin,
+                          KeysetPaginationMixin, QuerysetTimingMixin,
+                          DayArchiveView):
     # NOTE: Entries are stored in UTC and this view converts dates to the
     # local timezone (if USE_TZ=True). Therefore, Entry.get_absolute_url also
     # converts to TIME_ZONE if USE_TZ=True.
-    queryset = Entry.objects.filter(published=True)
+    queryset = Entry.objects.published().with_related().without_content()
     date_field = "published_on"
     year_format = '%Y'
     month_format = "%m"
     day_format = "%d"
     template_name = "blargg/entry_archive_day.html"
     allow_empty = True
+
+
+class EntryArchiveIndexView(KeysetPaginationMixin, QuerysetTimingMixin,
+                            ArchiveIndexView):
+    """The latest published ``Entry``'s."""
+    queryset = Entry.objects.published().with_related().without_content()
+    date_field = "published_on"
+
+    def get_date_list(self, queryset, date_type=None, ordering='DESC'):
+        """The years with entries, from the ``ArchiveDate`` calendar (rather
+        than a ``DISTINCT`` query over every published ``Entry``)."""
+        date_list = [
+            date(year, 1, 1) for year, count in ArchiveDate.objects.years()
+        ]
+        if not date_list and not self.get_allow_empty():
+            raise Http404("No entries available")
+        if ordering == 'ASC':
+            date_list.reverse()
+        return date_list
+
+
+class EntrySearchView(ListView):
+    """Searches published ``Entry``'s for the words in the ``q`` query
+    parameter (see ``blargg.search``). Results are ranked, so they're paged
+    by number (``?page=``)."""
+    template_name = "blargg/entry_search.html"
+    context_object_name = "entries"
+    query_kwarg = 'q'
+
+    def get_paginate_by(self, queryset):
+        return blargg_settings.get('entries_paginate_by', 10)
+
+    def get_queryset(self):
+        self.query = self.request.GET.get(self.query_kwarg, '')
+        self.terms = search_terms(self.query)
+        return SearchResults(self.terms)
+
+    def get_context_data(self, **kwargs):
+        context = super(EntrySearchView, self).get_context_data(**kwargs)
+        context['query'] = self.query
+        context['terms'] = self.terms
+        return context